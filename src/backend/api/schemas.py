@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+
+from ..domain.models import DocumentRecord
 
 class ResearchRequest(BaseModel):
     goal: str
@@ -8,4 +10,9 @@ class ResearchRequest(BaseModel):
 class ReviewRequest(BaseModel):
     thread_id: str
     action: str
-    feedback: Optional[str] = None
\ No newline at end of file
+    feedback: Optional[str] = None
+
+class DocumentListResponse(BaseModel):
+    documents: List[DocumentRecord]
+    # 下一页游标 (为空表示没有更多文档)
+    next_cursor: Optional[str] = None
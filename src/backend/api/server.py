@@ -5,20 +5,31 @@ import os
 import asyncio 
 import aiofiles
 import json
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # 导入服务接口定义和请求模型 (注意别名，避免混淆)
 from ..services.agent_service import AgentService, ReportRequest as ServiceReportRequest
-from ..domain.models import DocumentSource
+from ..core.config import settings
+from ..domain.models import DocumentSource, DocumentRecord, stable_document_id
 from ..domain.interfaces import Ingestor
+from ..infrastructure.repository.tokenizer import close_jieba_tokenizer
 # 导入工厂方法
-from ..services.factory import get_agent_service, get_ingestion_service
+from ..services.document_service import DocumentService
+from ..services.factory import get_agent_service, get_ingestion_service, get_document_service
 # 导入 API 层定义的 Schema
-from .schemas import ResearchRequest, ReviewRequest
+from .schemas import ResearchRequest, ReviewRequest, DocumentListResponse
 
-app = FastAPI(title="Research Agent API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Jieba 分词进程池由所有存储共享，在应用退出时统一关闭
+    close_jieba_tokenizer()
+
+app = FastAPI(title="Research Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -125,11 +136,32 @@ async def save_upload_file_async(upload_file: UploadFile, destination: str):
 @app.post("/api/ingest/upload")
 async def upload_and_ingest_document(
     file: UploadFile = File(...),
-    ingestion_service: Ingestor = Depends(get_ingestion_service)
+    collection: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    replace: bool = Form(True),
+    ingestion_service: Ingestor = Depends(get_ingestion_service),
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
     上传文件并触发解析流程，实时流式返回解析日志。
+    collection 为空时写入默认集合 (OPENSEARCH_DEFAULT_COLLECTION)。
+    document_id 为空时由 (集合, 文件名) 派生: 同一集合中重新上传同名文件即更新该文档 (按块增量)。
+    replace=false 时若该文档已存在则返回 409，不覆盖 (用于区分同名的不同文件)。
     """
+    if collection and collection not in (settings.opensearch.default_collection, *settings.opensearch.collections):
+        raise HTTPException(status_code=400, detail=f"未知的集合: {collection}")
+
+    # 默认集合的 ID 与集合功能之前的文档保持一致
+    id_collection = collection if collection != settings.opensearch.default_collection else None
+    document_id = document_id or stable_document_id(file.filename, id_collection)
+    if not replace:
+        existing = await document_service.get_document(document_id, collection)
+        if existing is not None and existing.status != "deleted":
+            raise HTTPException(
+                status_code=409,
+                detail=f"文档已存在 (document_id: {document_id}，名称: {existing.document_name})"
+            )
+
     # 1. 准备路径
     if not os.path.exists(UPLOAD_DIR):
         os.makedirs(UPLOAD_DIR)
@@ -142,9 +174,10 @@ async def upload_and_ingest_document(
 
     # 3. 创建 DocumentSource 对象
     source = DocumentSource(
+        document_id=document_id,
         file_path=file_path,
         document_name=file.filename,
-        document_id=str(uuid.uuid4())
+        collection=collection
     )
 
     # 4. 定义流式生成器
@@ -189,5 +222,57 @@ async def upload_and_ingest_document(
         headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"} 
     )
 
+# ==========================================
+# 3. 文档管理接口 (只读取文档目录，与文档块数量无关)
+# ==========================================
+
+@app.get("/api/documents", response_model=DocumentListResponse)
+async def list_documents(
+    collection: Optional[str] = None,
+    status: Optional[str] = None,
+    page_size: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    分页列出已摄入的文档 (按集合与 document_id 排序，next_cursor 用于获取下一页)。
+    """
+    documents, next_cursor = await document_service.list_documents(
+        collection=collection, status=status, page_size=page_size, cursor=cursor
+    )
+    return DocumentListResponse(documents=documents, next_cursor=next_cursor)
+
+
+@app.get("/api/documents/{document_id}", response_model=DocumentRecord)
+async def get_document(
+    document_id: str,
+    collection: Optional[str] = None,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    查看单个文档的记录 (删除中的文档会返回最新的删除进度)。
+    """
+    record = await document_service.get_document(document_id, collection)
+    if record is None:
+        raise HTTPException(status_code=404, detail="文档不存在")
+    return record
+
+
+@app.delete("/api/documents/{document_id}", response_model=DocumentRecord, status_code=202)
+async def delete_document(
+    document_id: str,
+    collection: Optional[str] = None,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    以后台任务删除文档的全部文档块，立即返回 (status=deleting)；
+    之后通过 GET /api/documents/{document_id} 查询进度，完成后记录被移除 (返回 404)。
+    """
+    record = await document_service.delete_document(document_id, collection)
+    if record is None:
+        raise HTTPException(status_code=404, detail="文档不存在")
+    return record
+
+
 if __name__ == "__main__":
     uvicorn.run("src.backend.api.server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
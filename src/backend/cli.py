@@ -0,0 +1,188 @@
+"""
+运维命令行工具。
+
+用法 (在项目根目录执行):
+    python -m src.backend.cli reindex --mode auto --requests-per-second 500
+    python -m src.backend.cli reindex --collection finance
+    python -m src.backend.cli export --output chunks.jsonl
+    python -m src.backend.cli snapshot-export --output snapshots/2024-06-01
+    python -m src.backend.cli snapshot-import --input snapshots/2024-06-01
+    python -m src.backend.cli fit-pca --dimension 768
+"""
+import asyncio
+import argparse
+import logging
+from pathlib import Path
+
+from .core.logging import setup_logging
+from .domain.models import SearchFilter
+from .infrastructure.repository.factory import get_collection_router, get_search_repository
+from .infrastructure.repository.export import export_chunks
+from .infrastructure.repository.snapshot import export_snapshot, import_snapshot
+from .infrastructure.repository.projection import fit_pca
+from .infrastructure.repository.tokenizer import close_jieba_tokenizer
+from .infrastructure.llm.factory import get_embedding_batcher
+from .core.config import settings
+
+# === 日志配置 ===
+setup_logging()
+log = logging.getLogger(__name__)
+
+
+async def _reindex(args: argparse.Namespace):
+    store = get_collection_router()
+    try:
+        await store.reindex(
+            collection=args.collection,
+            mode=args.mode,
+            requests_per_second=args.requests_per_second,
+            slices=args.slices,
+            delete_old=args.delete_old
+        )
+    finally:
+        await store.close_connection()
+
+
+async def _export(args: argparse.Namespace):
+    store = get_search_repository()
+    filters = SearchFilter(
+        document_ids=args.document_id, document_names=args.document_name, collections=args.collection
+    )
+    try:
+        await export_chunks(
+            store,
+            Path(args.output),
+            fmt=args.format,
+            filters=filters,
+            include_vectors=args.include_vectors,
+            page_size=args.page_size
+        )
+    finally:
+        await store.close_connection()
+
+
+async def _snapshot_export(args: argparse.Namespace):
+    store = get_search_repository()
+    filters = SearchFilter(
+        document_ids=args.document_id, document_names=args.document_name, collections=args.collection
+    )
+    try:
+        await export_snapshot(
+            store,
+            Path(args.output),
+            filters=filters,
+            shard_size=args.shard_size,
+            page_size=args.page_size
+        )
+    finally:
+        await store.close_connection()
+
+
+async def _snapshot_import(args: argparse.Namespace):
+    store = get_search_repository()
+    try:
+        result = await import_snapshot(store, Path(args.input), batch_size=args.batch_size)
+        if result.failed:
+            raise SystemExit(f"快照导入存在 {result.failed} 个失败条目。")
+    finally:
+        await store.close_connection()
+
+
+async def _fit_pca(args: argparse.Namespace):
+    dimension = args.dimension or settings.embedding_projection.dimension
+    if not dimension:
+        raise SystemExit("请通过 --dimension 或 EMBEDDING_PROJECTION_DIMENSION 指定降维后的维度。")
+    store = get_search_repository()
+    try:
+        await fit_pca(
+            store,
+            get_embedding_batcher(),
+            dimension=dimension,
+            output=Path(args.output or settings.embedding_projection.pca_path),
+            sample_size=args.sample_size
+        )
+    finally:
+        await store.close_connection()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.backend.cli", description="DeepResearch 运维工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reindex = subparsers.add_parser(
+        "reindex",
+        help="按当前映射创建新版本索引，后台复制数据后原子切换读 / 写别名 (检索不中断)"
+    )
+    reindex.add_argument(
+        "--mode", choices=["auto", "reindex", "reembed"], default="auto",
+        help="reindex: 服务端 _reindex 复用向量；reembed: 重新 embedding；auto: 按向量维度是否一致自动选择"
+    )
+    reindex.add_argument(
+        "--requests-per-second", type=float, default=None,
+        help="复制限速 (每秒文档数)，-1 表示不限速，默认取 OPENSEARCH_REINDEX_REQUESTS_PER_SECOND"
+    )
+    reindex.add_argument("--slices", type=int, default=1, help="服务端 _reindex 的并行切片数")
+    reindex.add_argument("--delete-old", action="store_true", help="切换完成后删除旧版本索引")
+    reindex.add_argument("--collection", default=None, help="要重建的集合，默认为 OPENSEARCH_DEFAULT_COLLECTION")
+    reindex.set_defaults(handler=_reindex)
+
+    export = subparsers.add_parser(
+        "export",
+        help="使用 point-in-time + search_after 流式导出文档块到 JSONL / Parquet (内存占用与索引大小无关)"
+    )
+    export.add_argument("--output", required=True, help="输出文件 (.jsonl / .parquet)")
+    export.add_argument(
+        "--format", choices=["jsonl", "parquet"], default=None,
+        help="输出格式，默认按扩展名判断 (Parquet 需要安装 pyarrow)"
+    )
+    export.add_argument("--include-vectors", action="store_true", help="同时导出向量字段")
+    export.add_argument("--document-id", action="append", default=None, help="只导出指定文档 (可重复)")
+    export.add_argument("--document-name", action="append", default=None, help="只导出指定名称的文档 (可重复)")
+    export.add_argument("--collection", action="append", default=None, help="只导出指定集合 (可重复，默认全部集合)")
+    export.add_argument("--page-size", type=int, default=1000, help="每页读取 / 写出的文档块数")
+    export.set_defaults(handler=_export)
+
+    snapshot_export = subparsers.add_parser(
+        "snapshot-export",
+        help="导出文档块与 4 路向量快照 (records-*.jsonl + *.npy 分片 + manifest.json)，用于免 embedding 重建"
+    )
+    snapshot_export.add_argument("--output", required=True, help="快照目录 (不能已包含快照)")
+    snapshot_export.add_argument("--shard-size", type=int, default=10000, help="每个分片的文档块数")
+    snapshot_export.add_argument("--document-id", action="append", default=None, help="只导出指定文档 (可重复)")
+    snapshot_export.add_argument("--document-name", action="append", default=None, help="只导出指定名称的文档 (可重复)")
+    snapshot_export.add_argument(
+        "--collection", action="append", default=None, help="只导出指定集合 (可重复，默认全部集合)"
+    )
+    snapshot_export.add_argument("--page-size", type=int, default=None, help="每页读取的文档块数")
+    snapshot_export.set_defaults(handler=_snapshot_export)
+
+    snapshot_import = subparsers.add_parser(
+        "snapshot-import",
+        help="通过批量导入路径恢复快照 (直接使用快照中的向量，不调用 embedding 模型)"
+    )
+    snapshot_import.add_argument("--input", required=True, help="快照目录")
+    snapshot_import.add_argument("--batch-size", type=int, default=None, help="每个子批次的文档块数")
+    snapshot_import.set_defaults(handler=_snapshot_import)
+
+    pca = subparsers.add_parser(
+        "fit-pca",
+        help="用已入库文档块的原始 embedding 拟合 PCA 降维矩阵 (EMBEDDING_PROJECTION_MODE=pca 时使用)"
+    )
+    pca.add_argument("--dimension", type=int, default=None, help="降维后的维度，默认取 EMBEDDING_PROJECTION_DIMENSION")
+    pca.add_argument("--output", default=None, help="输出 .npz 文件，默认取 EMBEDDING_PROJECTION_PCA_PATH")
+    pca.add_argument("--sample-size", type=int, default=10000, help="参与拟合的文本条数")
+    pca.set_defaults(handler=_fit_pca)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        asyncio.run(args.handler(args))
+    finally:
+        close_jieba_tokenizer()
+
+
+if __name__ == "__main__":
+    main()
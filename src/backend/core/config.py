@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from typing import Literal, List, Tuple, Optional, Dict, Any
 
-from pydantic import Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # --- 路径配置 ---
@@ -83,12 +83,90 @@ class EmbeddingLLMSettings(LLMProviderConfig):
     model_config = SettingsConfigDict(env_prefix="EMBEDDING_LLM_")
     dimension: int = 2560
     max_concurrency: int = 5
+    # 单次 embedding 请求的打包上限 (条目数 / token 数)
+    max_batch_items: int = 64
+    max_batch_tokens: int = 8192
+
+
+class EmbeddingCacheSettings(BaseConfigSettings):
+    """
+    Embedding 持久化缓存配置 (EMBEDDING_CACHE_*)
+    以 (模型, 维度, sha256(种类 + 文本)) 为键 (文档向量与查询向量分开)，将向量保存在本地 SQLite 文件中。
+    """
+    model_config = SettingsConfigDict(env_prefix="EMBEDDING_CACHE_")
+
+    enabled: bool = True
+    path: str = str(BASE_DIR / "cache" / "embedding_cache.sqlite3")
+    max_entries: int = 500_000  # 超出后按最近访问时间 (LRU) 淘汰
+    touch_interval_seconds: float = 3600.0  # 命中时仅当最近访问时间早于该秒数才更新 (减少写库)
+
+    # 进程内查询向量缓存 (LRU + TTL + single-flight)
+    query_enabled: bool = True
+    query_max_entries: int = 2048
+    query_ttl_seconds: float = 3600.0
+
+
+class EmbeddingProjectionSettings(BaseConfigSettings):
+    """
+    向量降维配置 (EMBEDDING_PROJECTION_*)。文档向量与查询向量经过相同的投影后再写入 / 检索:
+    - none:     不降维，索引维度即 EMBEDDING_LLM_DIMENSION
+    - truncate: 截断为前 dimension 维后重新归一化 (仅适用于 Matryoshka (MRL) 训练的模型)
+    - pca:      使用 fit-pca 命令拟合并保存在 pca_path 的 PCA 矩阵投影后重新归一化
+    修改后需执行 reindex --mode reembed 重建索引 (原始向量由 embedding 缓存命中，无需重新请求模型)。
+    """
+    model_config = SettingsConfigDict(env_prefix="EMBEDDING_PROJECTION_")
+
+    mode: Literal["none", "truncate", "pca"] = "none"
+    dimension: Optional[int] = None  # 降维后的维度 (mode 不为 none 时必填)
+    pca_path: str = str(BASE_DIR / "cache" / "embedding_pca.npz")
+
+    @model_validator(mode="after")
+    def check_dimension(self) -> "EmbeddingProjectionSettings":
+        """
+        降维时必须指定维度 (索引映射与本地存储在导入时即读取该维度)。
+        """
+        if self.mode != "none" and not (self.dimension and self.dimension > 0):
+            raise ValueError(
+                f"EMBEDDING_PROJECTION_MODE={self.mode} 时必须将 EMBEDDING_PROJECTION_DIMENSION 设为正整数。"
+            )
+        return self
 
 
 # =============================================================================
 #  3. 其他非 LLM 类配置
 # =============================================================================
 
+class JiebaSettings(BaseConfigSettings):
+    """
+    Jieba 分词配置 (JIEBA_*)
+    文档分词使用专用进程池 (每个进程加载一次词典)，查询分词带 LRU 缓存。
+    """
+    model_config = SettingsConfigDict(env_prefix="JIEBA_")
+
+    workers: Optional[int] = None  # 进程数，默认为 CPU 核数；0 表示不使用进程池
+    chunk_size: int = 64  # 每个进程池任务处理的文本数
+    query_cache_size: int = 4096
+    user_dict: Optional[str] = None  # 自定义词典路径
+    warmup: bool = True  # 初始化时预加载词典并拉起工作进程
+
+
+class LocalStoreSettings(BaseConfigSettings):
+    """
+    本地嵌入式检索后端配置 (LOCAL_STORE_*)，SEARCH_BACKEND=local 时使用。
+    向量以 float32 矩阵保存为 .npy 文件 (内存映射加载)，BM25 倒排索引在加载时于内存中重建。
+    """
+    model_config = SettingsConfigDict(env_prefix="LOCAL_STORE_")
+
+    path: str = str(BASE_DIR / "data" / "local_store")
+    # 近似最近邻索引: none (暴力检索，精确) / faiss (HNSW，需另行安装 faiss-cpu)
+    ann: Literal["none", "faiss"] = "none"
+    ann_min_rows: int = 20000  # 行数少于该值时仍使用暴力检索
+    hnsw_m: int = 32
+    ef_search: int = 64
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+
+
 class DoclingGeneralSettings(BaseConfigSettings):
     """Docling 通用行为配置 (DOCLING_*)"""
     model_config = SettingsConfigDict(env_prefix="DOCLING_")
@@ -129,17 +207,217 @@ class TeiRerankSettings(BaseConfigSettings):
     timeout: float = 30.0
 
 
+class VectorFieldOptions(BaseModel):
+    """
+    单个 knn_vector 字段的索引参数。未设置的项沿用 OPENSEARCH_VECTOR_* 全局默认值。
+
+    - quantization: none (float32) / fp16 (faiss SQ) / int8 (Lucene 字节量化) / binary (faiss 二值量化)
+    - binary_bits: 二值量化的位数 (1/2/4)，对应 32x/16x/8x 压缩
+    - mode / compression_level: OpenSearch 的 on_disk 模式与压缩级别 (如 "32x")，
+      与 quantization 二选一，由 OpenSearch 自动选择量化方式
+    - rescore_oversample_factor: 查询时对量化字段做全精度重打分的过采样倍数
+    """
+    quantization: Optional[Literal["none", "fp16", "int8", "binary"]] = None
+    binary_bits: Optional[int] = None
+    mode: Optional[Literal["in_memory", "on_disk"]] = None
+    compression_level: Optional[str] = None
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+    rescore_oversample_factor: Optional[float] = None
+
+
+class RecallPathOptions(BaseModel):
+    """
+    单路召回的查询时参数 (路径名: bm25 或各 embedding_* 字段)。未设置的项使用默认行为。
+
+    - k: 该路召回的候选数 (默认 2 * k)
+    - ef_search: HNSW 查询时的候选列表大小 (method_parameters.ef_search)
+    - oversample_factor: 量化字段重打分的过采样倍数 (覆盖 VectorFieldOptions 中的值)
+    - min_score / max_distance: 径向检索阈值，设置后替代 k 近邻检索 (二者二选一)
+    """
+    k: Optional[int] = None
+    ef_search: Optional[int] = None
+    oversample_factor: Optional[float] = None
+    min_score: Optional[float] = None
+    max_distance: Optional[float] = None
+
+
+class CollectionOptions(BaseModel):
+    """
+    单个集合 (独立索引) 的分片参数。未设置的项沿用 OPENSEARCH_NUMBER_OF_SHARDS / OPENSEARCH_NUMBER_OF_REPLICAS。
+    只在创建索引 (首次写入或 reindex) 时生效。
+    """
+    number_of_shards: Optional[int] = None
+    number_of_replicas: Optional[int] = None
+
+
 class OpenSearchSettings(BaseConfigSettings):
     """OpenSearch 配置"""
     model_config = SettingsConfigDict(env_prefix="OPENSEARCH_")
     
+    # 读别名 (检索经由该名称)。实际数据存放在版本化索引 {index_name}_v{n} 中；
+    # 若已存在同名的具体索引 (旧版部署)，在执行 reindex 前直接读写该索引
     index_name: str = "rag_system_chunks_async"
+    # 写别名，默认 {index_name}_write
+    write_alias: Optional[str] = None
+    # 文档目录索引 (每个文档一条记录)，默认 {index_name}_catalog
+    catalog_index_name: Optional[str] = None
     host: str = 'localhost'
     port: int = 9200
     auth: str = Field(default='admin:admin', validation_alias="AUTH")
     use_ssl: bool = False
     verify_certs: bool = False
+    # 集群节点列表，JSON 格式，例如: ["node1:9200", "https://node2:9200"]；为空时使用 host / port
+    hosts: List[str] = Field(default_factory=list)
+    # 启动时 / 连接失败时嗅探集群中的其他节点 (节点地址需可从客户端直接访问)，sniffer_timeout 为定期嗅探间隔 (秒)
+    sniff_on_start: bool = False
+    sniff_on_connection_fail: bool = False
+    sniffer_timeout: Optional[float] = None
+    # 检索与写入使用两个独立客户端 (各自的连接池)，批量导入不会占满检索连接
+    # 每个节点的连接数上限
+    pool_maxsize: int = 25
+    write_pool_maxsize: int = 10
+    # 请求体 gzip 压缩 (bulk 请求包含大量浮点向量，写入客户端默认开启)
+    http_compress: bool = False
+    write_http_compress: bool = True
+    # 请求超时 (秒) 与传输层重试次数 (bulk 的拒绝由 BulkWriter 退避重试，写入客户端默认不在传输层重试)
+    search_timeout: float = 60
+    bulk_timeout: float = 120
+    max_retries: int = 3
+    write_max_retries: int = 0
+    # bulk 请求的初始条数，运行中按延迟与拒绝情况在 [min, max] 间自适应调整 (AIMD)
     bulk_chunk_size: int = 500
+    bulk_min_chunk_size: int = 50
+    bulk_max_chunk_size: int = 2000
+    bulk_target_latency: float = 2.0  # 单个 bulk 请求的目标耗时 (秒)
+    bulk_max_chunk_bytes: int = 10 * 1024 * 1024
+    # 被拒绝 (429 等) 条目的重试次数与指数退避参数 (秒)
+    bulk_max_retries: int = 5
+    bulk_initial_backoff: float = 1.0
+    bulk_max_backoff: float = 60.0
+    # 流水线批量导入: 每个子批次的文档数、同时准备 (embedding + 分词) 的子批次数、
+    # actions 队列容量、并发 bulk 请求数
+    bulk_pipeline_batch_size: int = 64
+    bulk_max_inflight_batches: int = 4
+    bulk_queue_size: int = 2000
+    bulk_concurrency: int = 2
+    # 批量导入会话: 是否临时将副本数设为 0；收尾时 force merge 的目标段数 (None 表示不合并)
+    bulk_load_disable_replicas: bool = False
+    bulk_load_force_merge_segments: Optional[int] = None
+    # reindex (蓝绿重建) 时的默认限速 (每秒文档数，-1 表示不限速) 与重新 embedding 时每页读取的文档数
+    reindex_requests_per_second: float = -1
+    reindex_page_size: int = 500
+    # 全量遍历 / 导出 (scan_chunks): 每页文档数与 point-in-time 的保持时间
+    scan_page_size: int = 1000
+    scan_keep_alive: str = "5m"
+    # 混合检索时将 5 路召回合并为一次 _msearch 请求 (False 则逐路发送 search)
+    use_msearch: bool = True
+    # 融合方式: client (客户端 RRF) / server (hybrid 查询 + search pipeline 服务端 RRF)
+    # server 需要 OpenSearch 2.19+ (score-ranker-processor)，pipeline 注册或查询失败时回退到客户端融合
+    fusion_mode: Literal["client", "server"] = "client"
+    # 检索服务 (RetrievalService) 每个查询取回的 Top K 与 RRF 常数
+    search_k: int = 10
+    # 同时作为服务端融合 pipeline 的默认 rank_constant (create_index 时预注册)
+    rrf_k: int = 60
+
+    # 向量召回的查询时默认参数 (可被 recall_path_options 按路径覆盖)
+    knn_ef_search: Optional[int] = None
+    # 按路径覆盖，JSON 格式，例如: {"embedding_parent_headings": {"k": 5, "ef_search": 64}}
+    recall_path_options: Dict[str, RecallPathOptions] = Field(default_factory=dict)
+
+    # 新建索引的分片 / 副本数 (为空时使用集群默认值)
+    number_of_shards: Optional[int] = None
+    number_of_replicas: Optional[int] = None
+
+    # 集合 (如按团队 / 语料划分)，每个集合使用独立的索引与读写别名 ({index_name}__{集合名})，
+    # 默认集合对应 index_name 本身。JSON 列表，例如: ["legal", "finance"]
+    collections: List[str] = Field(default_factory=list)
+    default_collection: str = "default"
+    # 按集合覆盖分片参数，JSON 格式，例如: {"legal": {"number_of_shards": 3}}
+    collection_options: Dict[str, CollectionOptions] = Field(default_factory=dict)
+
+    # 可过滤的 metadata 键 (JSON 列表)，入库时以 keyword 类型写入 metadata_keywords 字段
+    filterable_metadata_keys: List[str] = Field(default_factory=list)
+
+    # 召回路径策略: off (仅统计) / auto (按独有贡献率跳过或降权) / profile (使用 path_policy_weights)
+    # 服务端融合不返回各路结果: auto 模式下样本不足时、以及此后按 explore_rate 抽样的查询改用客户端融合以记录贡献
+    path_policy_mode: Literal["off", "auto", "profile"] = "off"
+    # profile 模式下各路权重，JSON 格式，0 表示跳过，例如: {"embedding_parent_headings": 0}
+    path_policy_weights: Dict[str, float] = Field(default_factory=dict)
+    # auto 模式: 样本不足时使用全部路径；独有贡献率低于阈值时跳过 / 降权
+    path_policy_min_samples: int = 200
+    path_policy_skip_below: float = 0.02
+    path_policy_downweight_below: float = 0.1
+    path_policy_downweight: float = 0.5
+    # auto 模式下执行全部路径的探索概率 (使被跳过的路径仍有新的统计)
+    path_policy_explore_rate: float = 0.05
+    # 每路保留的最近观测数
+    path_policy_window: int = 2000
+
+    # 索引结构预设: 决定生成 embedding、建立 HNSW 图并参与召回的向量字段，修改后需执行 reindex
+    # full (4 路) / content+questions (正文 + 假设问题) / content-only (仅正文)
+    schema_profile: Literal["full", "content+questions", "content-only"] = "full"
+
+    # knn_vector 字段的全局默认参数 (可被 vector_field_options 按字段覆盖)
+    vector_quantization: Literal["none", "fp16", "int8", "binary"] = "none"
+    vector_binary_bits: int = 1
+    vector_mode: Optional[Literal["in_memory", "on_disk"]] = None
+    vector_compression_level: Optional[str] = None
+    vector_rescore_oversample_factor: Optional[float] = None
+    hnsw_m: int = 48
+    hnsw_ef_construction: int = 256
+    # 按字段覆盖，JSON 格式，例如: {"embedding_parent_headings": {"quantization": "binary"}}
+    vector_field_options: Dict[str, VectorFieldOptions] = Field(default_factory=dict)
+
+    def get_vector_field_options(self, field_name: str) -> VectorFieldOptions:
+        """
+        合并全局默认值与字段级覆盖，返回该字段最终生效的参数。
+        """
+        defaults = VectorFieldOptions(
+            quantization=self.vector_quantization,
+            binary_bits=self.vector_binary_bits,
+            mode=self.vector_mode,
+            compression_level=self.vector_compression_level,
+            m=self.hnsw_m,
+            ef_construction=self.hnsw_ef_construction,
+            rescore_oversample_factor=self.vector_rescore_oversample_factor,
+        )
+        override = self.vector_field_options.get(field_name)
+        if override is None:
+            return defaults
+        return defaults.model_copy(update=override.model_dump(exclude_none=True))
+
+    def collection_index_name(self, collection: Optional[str] = None) -> str:
+        """
+        集合的读别名。默认集合沿用 index_name，其他集合为 {index_name}__{集合名}。
+        """
+        if not collection or collection == self.default_collection:
+            return self.index_name
+        return f"{self.index_name}__{collection}"
+
+    def get_collection_options(self, collection: Optional[str] = None) -> CollectionOptions:
+        """
+        合并全局分片参数与集合级覆盖。
+        """
+        options = CollectionOptions(number_of_shards=self.number_of_shards, number_of_replicas=self.number_of_replicas)
+        override = self.collection_options.get(collection or self.default_collection)
+        if override is None:
+            return options
+        return options.model_copy(update=override.model_dump(exclude_none=True))
+
+    def get_recall_path_options(
+        self, 
+        path_name: str, 
+        override: Optional[RecallPathOptions] = None
+    ) -> RecallPathOptions:
+        """
+        合并 全局默认值 < 配置中的路径级参数 < 调用时传入的参数，返回该路最终生效的参数。
+        """
+        options = RecallPathOptions(ef_search=self.knn_ef_search)
+        for layer in (self.recall_path_options.get(path_name), override):
+            if layer is not None:
+                options = options.model_copy(update=layer.model_dump(exclude_none=True))
+        return options
 
 
 class LangfuseSettings(BaseConfigSettings):
@@ -162,6 +440,8 @@ class Settings(BaseConfigSettings):
     # --- 全局 ---
     log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
     litellm_proxy_url: str = Field(validation_alias="LITELLM_PROXY_URL")
+    # 检索后端: opensearch / local (进程内嵌入式存储，适合单机小规模部署与测试)
+    search_backend: Literal["opensearch", "local"] = Field(default="opensearch", validation_alias="SEARCH_BACKEND")
 
     # --- 模块 ---
     docling_vlm: DoclingVLMSettings = Field(default_factory=DoclingVLMSettings)
@@ -173,13 +453,39 @@ class Settings(BaseConfigSettings):
     # LLM 实例
     preprocessing_llm: PreprocessingLLMSettings = Field(default_factory=PreprocessingLLMSettings)
     embedding_llm: EmbeddingLLMSettings = Field(default_factory=EmbeddingLLMSettings)
+    embedding_cache: EmbeddingCacheSettings = Field(default_factory=EmbeddingCacheSettings)
+    embedding_projection: EmbeddingProjectionSettings = Field(default_factory=EmbeddingProjectionSettings)
     rewrite_llm: RewriteLLMSettings = Field(default_factory=RewriteLLMSettings)
     research_llm : ResearchLLMSettings = Field(default_factory=ResearchLLMSettings)
     
     tei_rerank: TeiRerankSettings = Field(default_factory=TeiRerankSettings)
+    jieba: JiebaSettings = Field(default_factory=JiebaSettings)
     opensearch: OpenSearchSettings = Field(default_factory=OpenSearchSettings)
+    local_store: LocalStoreSettings = Field(default_factory=LocalStoreSettings)
     langfuse: LangfuseSettings = Field(default_factory=LangfuseSettings)
 
+    @model_validator(mode="after")
+    def check_projection_dimension(self) -> "Settings":
+        """
+        降维后的维度不能大于 embedding 模型的原始维度。
+        """
+        projection = self.embedding_projection
+        if projection.mode != "none" and projection.dimension > self.embedding_llm.dimension:
+            raise ValueError(
+                f"EMBEDDING_PROJECTION_DIMENSION ({projection.dimension}) 不能大于 "
+                f"EMBEDDING_LLM_DIMENSION ({self.embedding_llm.dimension})。"
+            )
+        return self
+
+    @property
+    def vector_dimension(self) -> int:
+        """
+        写入索引 / 参与检索的向量维度 (降维后的维度)。
+        """
+        if self.embedding_projection.mode == "none":
+            return self.embedding_llm.dimension
+        return self.embedding_projection.dimension
+
     def get_llm_config_by_name(self, name: str) -> LLMProviderConfig:
         """
         [工厂方法支持] 
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, AsyncGenerator
-from .models import DocumentSource, DocumentChunk, RetrievedChunk, ReportRequest, Report
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple, AsyncGenerator, AsyncIterable, AsyncIterator
+from .models import (
+    DocumentSource, DocumentChunk, RetrievedChunk, ReportRequest, Report, BulkIndexResult, SearchFilter,
+    DocumentRecord, DeletionStatus
+)
 import asyncio
 
 # --------------------------------------------------------------------
@@ -70,23 +74,93 @@ class PreProcessor(ABC):
 class SearchRepository(ABC):
     """
     对应 OpenSearch 的存储和检索抽象。
-    由 infrastructure/repository/opensearch_store.py 实现。
+    由 infrastructure/repository/opensearch_store.py 实现，
+    infrastructure/repository/local_store.py 提供进程内的嵌入式实现 (SEARCH_BACKEND=local)。
     """
 
     @abstractmethod
-    async def bulk_add_documents(self, chunks: List[DocumentChunk]):
+    async def bulk_add_documents(self, chunks: List[DocumentChunk]) -> BulkIndexResult:
         """
         批量添加（或更新）文档块到 OpenSearch。
         此方法内部应处理向量生成。
+        :return: 写入结果，只有永久失败的块计入 failed。
+        """
+        pass
+
+    async def bulk_add_documents_stream(
+        self, 
+        chunks: AsyncIterable[DocumentChunk], 
+        batch_size: int = 50
+    ) -> BulkIndexResult:
+        """
+        从异步流中批量添加文档块。
+        默认实现按 batch_size 分批调用 bulk_add_documents；实现方可提供流水线式的写入。
+        """
+        result = BulkIndexResult()
+        batch: List[DocumentChunk] = []
+        async for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                result = result.merge(await self.bulk_add_documents(batch))
+                batch = []
+        if batch:
+            result = result.merge(await self.bulk_add_documents(batch))
+        return result
+
+    @abstractmethod
+    async def bulk_add_sources(
+        self,
+        sources: AsyncIterable[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        写入已包含向量的文档块 _source，用于从快照恢复，不调用 embedding 模型。
+        """
+        pass
+
+    @abstractmethod
+    async def get_chunk_hashes(self, document_id: str, collection: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        获取某文档已入库的所有块 (chunk_id -> content_hash)，用于增量摄入。
+        :param collection: 文档所属的集合 (为空时为默认集合)
+        """
+        pass
+
+    @abstractmethod
+    async def delete_chunks(self, chunk_ids: List[str], refresh: bool = True, collection: Optional[str] = None) -> int:
+        """
+        按 chunk_id 删除文档块，返回删除的数量。
+        :param collection: 文档块所属的集合 (为空时为默认集合)
         """
         pass
 
     @abstractmethod
-    async def hybrid_search(self, query_text: str, k: int = 5, rrf_k: int = 60):
+    async def start_document_deletion(self, document_id: str, collection: Optional[str] = None) -> str:
+        """
+        在后台删除某文档的全部文档块，立即返回任务 ID，进度通过 get_deletion_status 查询。
+        """
+        pass
+
+    @abstractmethod
+    async def get_deletion_status(self, task_id: str) -> DeletionStatus:
+        """
+        查询后台删除任务的进度。
+        """
+        pass
+
+    @abstractmethod
+    async def hybrid_search(
+        self, 
+        query_text: str, 
+        k: int = 5, 
+        rrf_k: int = 60, 
+        filters: Optional[SearchFilter] = None
+    ):
         """
         执行混合检索。
         对应流程图2的 "检索、去重 (向量相似度+BM25)"。
         :param query: 单个子查询 (sub_query)。
+        :param filters: 限定检索范围 (文档 / 元数据)，应在召回阶段过滤而不是事后丢弃。
         :return: 检索到的原始文档块列表（带search_score）。
         """
         pass
@@ -96,13 +170,85 @@ class SearchRepository(ABC):
         self, 
         queries: List[str], 
         k: int = 5, 
-        rrf_k: int = 60
+        rrf_k: int = 60,
+        filters: Optional[SearchFilter] = None
     ) -> List[List[RetrievedChunk]]:
         """
         批量执行混合检索。
         """
         pass
 
+    @abstractmethod
+    def scan_chunks(
+        self,
+        filters: Optional[SearchFilter] = None,
+        page_size: Optional[int] = None,
+        include_vectors: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式遍历全部 (或满足 filters 的) 文档块，用于审计、导出与备份。
+        """
+        pass
+
+    @asynccontextmanager
+    async def bulk_load_session(self, collection: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        批量导入会话 (可选实现)。
+        实现方可在会话期间采用更适合大批量写入的索引设置，并在退出时统一收尾。
+        默认不做任何处理。
+        :param collection: 会话期间写入的集合 (为空时为默认集合)
+        """
+        yield
+
+
+class DocumentCatalog(ABC):
+    """
+    文档目录: 每个文档一条记录 (名称、块数、内容哈希、摄入时间与状态)。
+    由 infrastructure/repository/catalog.py 实现，列出文档时无需扫描文档块。
+    """
+
+    @abstractmethod
+    async def get(self, document_id: str, collection: Optional[str] = None) -> Optional[DocumentRecord]:
+        """
+        获取单个文档的记录，不存在时返回 None。
+        """
+        pass
+
+    @abstractmethod
+    async def upsert(self, record: DocumentRecord):
+        """
+        写入 (或覆盖) 一个文档的记录。
+        """
+        pass
+
+    @abstractmethod
+    async def remove(self, document_id: str, collection: Optional[str] = None):
+        """
+        删除一个文档的记录 (不存在时忽略)。
+        """
+        pass
+
+    @abstractmethod
+    async def list(
+        self,
+        collection: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DocumentRecord], Optional[str]]:
+        """
+        按 (集合, document_id) 顺序分页列出记录。
+        :param cursor: 上一页返回的游标，为空时从头开始
+        :return: (本页记录, 下一页游标)，没有更多记录时游标为 None
+        """
+        pass
+
+    async def close(self):
+        """
+        释放资源 (默认不做任何处理)。
+        """
+        pass
+
 
 # class IMessageProducer(ABC):
 #     """
@@ -182,9 +328,10 @@ class Retriever(ABC):
     """
 
     @abstractmethod
-    async def retrieve(self, query: str) -> List[RetrievedChunk]:
+    async def retrieve(self, query: str, filters: Optional[SearchFilter] = None) -> List[RetrievedChunk]:
         """
         编排完整的RAG检索流程。
+        :param filters: 限定检索范围 (如研究会话只涉及部分文档)。
         1. 调用 rewrite_client
         2. 并发调用 SearchRepository.hybrid_search
         3. 并发调用 rerank_client
@@ -1,4 +1,6 @@
 import uuid
+import json
+import hashlib
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, model_validator
@@ -8,6 +10,20 @@ import time
 # 1. 文档摄入模型 (对应流程图1：文档解析和摄入)
 # --------------------------------------------------------------------
 
+# 确定性 ID 的命名空间 (uuid5)。修改会导致所有已入库文档的 ID 变化。
+DOCUMENT_ID_NAMESPACE = uuid.UUID("6f1c1f5e-3b0a-5a4e-9d8c-2f7e4b9a1c30")
+
+
+def stable_document_id(document_name: str, collection: Optional[str] = None) -> str:
+    """
+    由文档的逻辑标识 (集合, 文档名称) 生成确定性的 document_id:
+    同一集合中同名文档的新版本得到相同的 ID，重复上传时按块增量更新。
+    collection 为空表示默认集合 (与早期只由名称派生的 ID 保持一致)。
+    """
+    key = document_name if not collection else f"{collection}/{document_name}"
+    return str(uuid.uuid5(DOCUMENT_ID_NAMESPACE, key))
+
+
 class DocumentSource(BaseModel):
     """
     描述一个待处理的原始文档来源。
@@ -24,6 +40,7 @@ class DocumentSource(BaseModel):
     )
     
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="其他元数据")
+    collection: Optional[str] = Field(None, description="写入的集合 (为空时为默认集合)")
 
     @model_validator(mode='before')
     @classmethod
@@ -48,6 +65,10 @@ class DocumentSource(BaseModel):
                     elif isinstance(file_path_val, Path):
                         data['document_name'] = file_path_val.name
                     # (如果 file_path_val 是其他类型，让 Pydantic 在后续步骤中正常失败)
+
+            # 5. 未指定 document_id 时由 (集合, 文档名称) 派生 (重复摄入同一文档时可增量更新)
+            if data.get('document_id') is None and isinstance(data.get('document_name'), str):
+                data['document_id'] = stable_document_id(data['document_name'], data.get('collection'))
         
         return data
 
@@ -71,12 +92,118 @@ class DocumentChunk(BaseModel):
     # 而是由 ISearchRepository 的实现在存入OpenSearch时生成和管理的。
     # 这里我们只定义业务数据。
     metadata: Dict[str, Any] = Field(default_factory=dict, description="其他元数据")
+    collection: Optional[str] = Field(None, description="所属集合 (为空时为默认集合)")
+
+    content_hash: Optional[str] = Field(None, description="内容哈希 (content + 父标题 + metadata)，用于增量摄入")
+
+    @model_validator(mode='after')
+    def compute_content_hash(self) -> "DocumentChunk":
+        """
+        未提供 content_hash 时根据 content、父标题与 metadata 计算。
+        (摘要和假设性问题由前两者生成，因此哈希不变即可复用已有的预处理与向量结果；
+        metadata 参与过滤与检索结果，只修改 metadata 的块同样需要重新写入。)
+        """
+        if self.content_hash is None:
+            hasher = hashlib.sha256()
+            hasher.update(self.content.encode("utf-8"))
+            for heading in self.parent_headings:
+                hasher.update(b"\x1f")
+                hasher.update(heading.encode("utf-8"))
+            hasher.update(b"\x1e")
+            hasher.update(json.dumps(self.metadata, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+            self.content_hash = hasher.hexdigest()
+        return self
+
+    def assign_stable_chunk_id(self, occurrence: int = 0):
+        """
+        将 chunk_id 设置为由 (document_id, content_hash, 出现序号) 派生的确定性 ID。
+        occurrence 用于区分同一文档中内容完全相同的多个块。
+        """
+        self.chunk_id = str(uuid.uuid5(
+            DOCUMENT_ID_NAMESPACE, f"{self.document_id}/{self.content_hash}/{occurrence}"
+        ))
+
+
+class BulkIndexResult(BaseModel):
+    """
+    批量写入结果。被拒绝后重试成功的块计入 success，只有永久失败的块计入 failed。
+    """
+    success: int = Field(0, description="成功写入的块数")
+    failed: int = Field(0, description="永久失败的块数")
+    retried: int = Field(0, description="被拒绝 (如 429) 后重新提交的次数")
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="永久失败条目的错误信息")
+
+    def merge(self, other: "BulkIndexResult") -> "BulkIndexResult":
+        return BulkIndexResult(
+            success=self.success + other.success,
+            failed=self.failed + other.failed,
+            retried=self.retried + other.retried,
+            errors=self.errors + other.errors
+        )
+
+
+def document_content_hash(chunk_hashes: List[Optional[str]]) -> str:
+    """
+    按块顺序合并各块的 content_hash，得到整个文档的内容哈希。
+    """
+    hasher = hashlib.sha256()
+    for chunk_hash in chunk_hashes:
+        hasher.update((chunk_hash or "").encode("utf-8"))
+        hasher.update(b"\x1f")
+    return hasher.hexdigest()
+
+
+class DocumentRecord(BaseModel):
+    """
+    文档目录中的一条记录 (每个文档一条，由摄入流程维护)。
+    列出文档时只读取目录，不扫描文档块。
+    """
+    document_id: str = Field(..., description="文档的唯一ID")
+    document_name: str = Field(..., description="文档原始名称")
+    collection: str = Field(..., description="所属集合")
+    chunk_count: int = Field(0, description="文档块数量")
+    content_hash: Optional[str] = Field(None, description="文档内容哈希 (见 document_content_hash)")
+    status: Literal["ingesting", "ready", "failed", "deleting", "delete_failed", "deleted"] = Field(
+        "ingesting", description="摄入 / 删除状态"
+    )
+    created_at: float = Field(default_factory=lambda: time.time(), description="首次摄入时间戳")
+    updated_at: float = Field(default_factory=lambda: time.time(), description="最近一次摄入 / 状态变更时间戳")
+    delete_task_id: Optional[str] = Field(None, description="后台删除任务 ID (status=deleting 时有效)")
+    error: Optional[str] = Field(None, description="最近一次失败的错误信息")
+
+
+class DeletionStatus(BaseModel):
+    """
+    后台删除任务的进度。
+    """
+    task_id: str = Field(..., description="任务 ID")
+    completed: bool = Field(False, description="任务是否已结束 (成功或失败)")
+    deleted: int = Field(0, description="已删除的文档块数")
+    total: Optional[int] = Field(None, description="待删除的文档块总数")
+    error: Optional[str] = Field(None, description="失败原因")
 
 
 # --------------------------------------------------------------------
 # 2. 检索模型 (对应流程图2：文档检索)
 # --------------------------------------------------------------------
 
+class SearchFilter(BaseModel):
+    """
+    检索过滤条件 (各条件之间为 AND，同一条件的多个值之间为 OR)。
+    metadata 的键需在 OPENSEARCH_FILTERABLE_METADATA_KEYS 中声明 (入库时按 keyword 索引)。
+    """
+    document_ids: Optional[List[str]] = Field(None, description="限定的文档 ID")
+    document_names: Optional[List[str]] = Field(None, description="限定的文档名称 (精确匹配)")
+    metadata: Dict[str, List[str]] = Field(default_factory=dict, description="元数据键 -> 允许的取值")
+    collections: Optional[List[str]] = Field(None, description="检索的集合 (为空时为默认集合)，多个集合并行检索后融合")
+
+    def is_empty(self) -> bool:
+        """
+        是否没有索引内的过滤条件 (collections 决定检索哪些索引，不计入)。
+        """
+        return not (self.document_ids or self.document_names or any(self.metadata.values()))
+
+
 class RetrievedChunk(BaseModel):
     """
     从检索系统返回的带分数的文档块。
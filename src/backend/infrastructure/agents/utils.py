@@ -5,6 +5,7 @@ import logging
 from ...core.config import settings
 from ...core.logging import setup_logging
 from .states import RawSearchResult
+from ...domain.models import SearchFilter
 from ..repository.factory import get_retrieval_service
 from ..langfuse.factory import init_langfuse_client
 
@@ -13,12 +14,13 @@ from ..langfuse.factory import init_langfuse_client
 setup_logging() 
 logger = logging.getLogger(__name__)
 
-async def fetch_rag_context(query: str) -> List[RawSearchResult]:
+async def fetch_rag_context(query: str, filters: Optional[SearchFilter] = None) -> List[RawSearchResult]:
     """
     异步执行 RAG 检索并解析结果。
     
     Args:
         query (str): 搜索查询词。
+        filters (SearchFilter, optional): 限定检索的文档 / 元数据范围。
 
     Returns:
         List[RawSearchResult]: 解析后的搜索结果列表。
@@ -30,7 +32,7 @@ async def fetch_rag_context(query: str) -> List[RawSearchResult]:
         retrieval_service = get_retrieval_service()
         
         # 2. 调用搜索方法
-        raw_results = await retrieval_service.retrieve(query)
+        raw_results = await retrieval_service.retrieve(query, filters=filters)
         
         # 3. 适配结果格式
         if raw_results:
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from typing import List, Optional, Dict
+
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+from .embedding_cache import PersistentEmbeddingCache
+
+log = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Store 级别的统一 Embedding 调度器。
+
+    职责：
+    1. 合并多路文本流 (content / headings / summary / questions)，批内去重、去空串。
+    2. 查询持久化缓存，只对未命中的文本发起请求。
+    3. 按 token 数和条目数将请求打包为若干子批次。
+    4. 通过共享的 Semaphore 限制并发 (对应 EMBEDDING_LLM_MAX_CONCURRENCY)，
+       多个文档同时摄入时也不会超过该上限。
+    5. 将向量按原始位置映射回去。
+    """
+
+    def __init__(
+        self,
+        client: Embeddings,
+        cache: Optional[PersistentEmbeddingCache] = None,
+        max_concurrency: int = 5,
+        max_batch_items: int = 64,
+        max_batch_tokens: int = 8192,
+        encoding_name: str = "cl100k_base"
+    ):
+        self.client = client
+        self.cache = cache
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # 打包只需要 token 数的估计值，编码器不可用 (如离线环境) 时按字符数估算
+        try:
+            self._tokenizer = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            log.warning(f"加载编码器 '{encoding_name}' 失败: {e}。将按字符数估算 token。")
+            self._tokenizer = None
+
+        log.info(
+            f"EmbeddingBatcher 初始化完毕。最大并发: {max_concurrency}，"
+            f"单批上限: {max_batch_items} 条 / {max_batch_tokens} tokens"
+        )
+
+    def _token_length(self, text: str) -> int:
+        if self._tokenizer is None:
+            return len(text)
+        try:
+            return len(self._tokenizer.encode(text, disallowed_special=()))
+        except Exception:
+            return len(text)
+
+    def _pack(self, texts: List[str]) -> List[List[str]]:
+        """
+        按 token 数和条目数贪心打包。单条超出 token 上限的文本独占一个批次。
+        """
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        for text in texts:
+            tokens = self._token_length(text)
+            if current and (
+                len(current) >= self.max_batch_items
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        async with self._semaphore:
+            return await self.client.aembed_documents(texts)
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        批量获取 embedding。返回与 texts 等长的列表，空文本对应位置为 None。
+        任一子批次失败时抛出异常 (与原 aembed_documents 行为一致)。
+        """
+        results: List[Optional[List[float]]] = [None for _ in texts]
+
+        # 1. 去空串 + 批内去重 (保持首次出现的顺序)
+        unique_texts = list(dict.fromkeys(t for t in texts if t and t.strip()))
+        if not unique_texts:
+            return results
+
+        # 2. 查询持久化缓存
+        vectors: Dict[str, List[float]] = {}
+        if self.cache:
+            cached = await self.cache.get_many(unique_texts)
+            vectors.update({t: v for t, v in zip(unique_texts, cached) if v is not None})
+
+        miss_texts = [t for t in unique_texts if t not in vectors]
+
+        # 3. 打包并在并发上限内发送
+        if miss_texts:
+            batches = self._pack(miss_texts)
+            batch_results = await asyncio.gather(*[self._embed_batch(b) for b in batches])
+
+            for batch, embeddings in zip(batches, batch_results):
+                vectors.update(zip(batch, embeddings))
+
+            if self.cache:
+                await self.cache.put_many(miss_texts, [vectors[t] for t in miss_texts])
+
+            log.debug(f"Embedding 请求: {len(miss_texts)} 条，拆分为 {len(batches)} 个子批次。")
+
+        log.debug(
+            f"批量 embedding: 输入 {len(texts)} 条，去重后 {len(unique_texts)} 条，"
+            f"缓存命中 {len(unique_texts) - len(miss_texts)} 条。"
+        )
+
+        # 4. 映射回原位置
+        for i, text in enumerate(texts):
+            if text and text.strip():
+                results[i] = vectors.get(text)
+        return results
+
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """
+        获取单条查询文本的 embedding (走 aembed_query)，同样受并发上限与缓存约束。
+        查询向量在缓存中与文档向量分开存放 (kind="query")。
+        """
+        if not text or not text.strip():
+            return None
+
+        if self.cache:
+            (cached,) = await self.cache.get_many([text], kind="query")
+            if cached is not None:
+                return cached
+
+        async with self._semaphore:
+            embedding = await self.client.aembed_query(text)
+
+        if self.cache:
+            await self.cache.put_many([text], [embedding], kind="query")
+        return embedding
+
+    async def embed_queries(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        批量获取查询向量：逐条走 aembed_query (与 embed_query 得到的向量一致)，并发受同一上限约束。
+        查询向量不能使用 embed (aembed_documents)，部分模型对查询与文档使用不同的指令前缀。
+        """
+        return list(await asyncio.gather(*[self.embed_query(text) for text in texts]))
@@ -0,0 +1,320 @@
+import os
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class PersistentEmbeddingCache:
+    """
+    基于本地 SQLite 的 Embedding 持久化缓存。
+
+    - 键: (embedding 模型, 维度, sha256(种类 + 文本))，切换模型或维度不会命中旧向量。
+      种类区分文档向量 (aembed_documents) 与查询向量 (aembed_query)：部分模型对两者使用不同的指令前缀，
+      同一文本的两种向量不能互相替代。文档向量的键沿用 sha256(文本)，已有缓存保持有效。
+    - 值: float32 向量的原始字节 (BLOB)，比 JSON 紧凑且解码无需解析。
+    - 淘汰: 超过 max_entries 后按 last_access 删除最久未使用的条目 (LRU)。
+      命中时只有 last_access 早于 touch_interval 秒前的条目才会被更新 (读多写少，避免每次命中都写库并提交)，
+      LRU 的时间精度因此为 touch_interval。
+    - 统计: 记录命中/未命中次数，可通过 stats() 查看。
+
+    SQLite 调用是同步阻塞的，异步接口统一通过 asyncio.to_thread 执行。
+    """
+
+    # 每次淘汰时额外多删除的比例，避免每次写入都触发淘汰
+    EVICTION_HEADROOM = 0.1
+
+    def __init__(
+        self,
+        path: str,
+        model: str,
+        dimension: int,
+        max_entries: int = 500_000,
+        touch_interval: float = 3600.0
+    ):
+        self.path = path
+        self.model = model
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 同一连接会被多个工作线程使用，用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, dimension, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+
+        log.info(f"Embedding 持久化缓存已打开: {path} (模型: {model}, 维度: {dimension}, 上限: {max_entries})")
+
+    @staticmethod
+    def hash_text(text: str, kind: str = "document") -> str:
+        if kind != "document":
+            text = f"{kind}\x1f{text}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # --- 同步实现 (在线程中执行) ---
+
+    def _get_many_sync(self, texts: List[str], kind: str) -> List[Optional[List[float]]]:
+        hashes = [self.hash_text(t, kind) for t in texts]
+        found: Dict[str, bytes] = {}
+        stale: List[str] = []
+        unique_hashes = list(dict.fromkeys(hashes))
+        now = time.time()
+
+        with self._lock:
+            # SQLite 单条语句的变量数量有限，分段查询
+            for start in range(0, len(unique_hashes), 500):
+                part = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector, last_access FROM embeddings "
+                    f"WHERE model = ? AND dimension = ? AND text_hash IN ({placeholders})",
+                    [self.model, self.dimension, *part]
+                ).fetchall()
+                for text_hash, vector, last_access in rows:
+                    found[text_hash] = vector
+                    if now - last_access >= self.touch_interval:
+                        stale.append(text_hash)
+
+            if stale:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND dimension = ? AND text_hash = ?",
+                    [(now, self.model, self.dimension, h) for h in stale]
+                )
+                self._conn.commit()
+
+            hits = sum(1 for h in hashes if h in found)
+            self.hits += hits
+            self.misses += len(hashes) - hits
+
+        return [
+            np.frombuffer(found[h], dtype=np.float32).tolist() if h in found else None
+            for h in hashes
+        ]
+
+    def _put_many_sync(self, texts: List[str], vectors: List[List[float]], kind: str):
+        now = time.time()
+        rows = [
+            (self.model, self.dimension, self.hash_text(t, kind),
+             np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+            if v is not None
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimension, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+
+        target = int(self.max_entries * (1 - self.EVICTION_HEADROOM))
+        to_delete = count - target
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            "SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (to_delete,)
+        )
+        self.evictions += to_delete
+        log.info(f"Embedding 缓存超过上限 ({count} > {self.max_entries})，已淘汰 {to_delete} 条。")
+
+    # --- 异步接口 ---
+
+    async def get_many(self, texts: List[str], kind: str = "document") -> List[Optional[List[float]]]:
+        """
+        批量查询缓存。返回与 texts 等长的列表，未命中的位置为 None。
+        :param kind: 向量种类 ("document" / "query")
+        """
+        if not texts:
+            return []
+        return await asyncio.to_thread(self._get_many_sync, texts, kind)
+
+    async def put_many(self, texts: List[str], vectors: List[List[float]], kind: str = "document"):
+        """
+        批量写入缓存 (vectors 中为 None 的条目会被跳过)。
+        :param kind: 向量种类 ("document" / "query")
+        """
+        if not texts:
+            return
+        await asyncio.to_thread(self._put_many_sync, texts, vectors, kind)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_rate": (hits / total) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class QueryEmbeddingCache:
+    """
+    进程内查询向量缓存 (LRU + TTL + single-flight)。
+
+    研究过程中同一查询会被反复检索 (规划任务重复、反思循环、多个 worker 并行)。
+    - 命中且未过期: 直接返回，省去一次 embedding 往返。
+    - 相同查询正在请求中: 共享同一个 in-flight 任务，不重复请求 (single-flight)。
+    - 未命中: 由调用方提供的 compute 函数批量计算，结果写入缓存。
+
+    in-flight 任务独立于调用方运行 (asyncio.shield)，
+    发起方被取消时不会连带取消其他正在等待的调用方。
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # text -> (vector, expires_at)
+        self._entries: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        # text -> 正在计算该文本的任务 (任务结果为 text -> vector 的字典)
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Optional[List[float]]]]"] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    def _lookup(self, text: str, now: float) -> Optional[List[float]]:
+        entry = self._entries.get(text)
+        if entry is None:
+            return None
+        vector, expires_at = entry
+        if expires_at <= now:
+            del self._entries[text]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(text)
+        return vector
+
+    def _store(self, text: str, vector: List[float]):
+        self._entries[text] = (vector, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(text)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _run(
+        self,
+        texts: List[str],
+        compute: Callable[[List[str]], Awaitable[List[Optional[List[float]]]]]
+    ) -> Dict[str, Optional[List[float]]]:
+        try:
+            vectors = await compute(texts)
+            computed = dict(zip(texts, vectors))
+            for text, vector in computed.items():
+                if vector is not None:
+                    self._store(text, vector)
+            return computed
+        finally:
+            for text in texts:
+                self._inflight.pop(text, None)
+
+    async def get_or_compute_many(
+        self,
+        texts: List[str],
+        compute: Callable[[List[str]], Awaitable[List[Optional[List[float]]]]]
+    ) -> List[Optional[List[float]]]:
+        """
+        批量获取查询向量。未命中且不在计算中的文本会合并为一次 compute 调用。
+        返回与 texts 等长的列表。compute 抛出的异常会传递给所有等待该结果的调用方。
+        """
+        now = time.monotonic()
+        results: Dict[str, Optional[List[float]]] = {}
+        pending: List["asyncio.Future[Dict[str, Optional[List[float]]]]"] = []
+        to_compute: List[str] = []
+
+        for text in dict.fromkeys(texts):
+            vector = self._lookup(text, now)
+            if vector is not None:
+                self.hits += 1
+                results[text] = vector
+                continue
+
+            task = self._inflight.get(text)
+            if task is not None:
+                self.coalesced += 1
+                if task not in pending:
+                    pending.append(task)
+                continue
+
+            self.misses += 1
+            to_compute.append(text)
+
+        if to_compute:
+            task = asyncio.ensure_future(self._run(to_compute, compute))
+            # 发起方被取消后无人读取异常时，避免 "exception was never retrieved" 警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            for text in to_compute:
+                self._inflight[text] = task
+            pending.append(task)
+
+        for task in pending:
+            results.update(await asyncio.shield(task))
+
+        return [results.get(text) for text in texts]
+
+    async def get_or_compute(
+        self,
+        text: str,
+        compute: Callable[[List[str]], Awaitable[List[Optional[List[float]]]]]
+    ) -> Optional[List[float]]:
+        (vector,) = await self.get_or_compute_many([text], compute)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "size": len(self._entries),
+            "hit_rate": ((self.hits + self.coalesced) / total) if total else 0.0,
+        }
@@ -7,6 +7,8 @@ from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from ...core.config import settings
 # 导入自定义的 Reranker Client 类
 from .reranker import TEIRerankerClient 
+from .embedding_cache import PersistentEmbeddingCache, QueryEmbeddingCache
+from .embedding_batcher import EmbeddingBatcher
 
 # ==========================================
 #  通用构建辅助函数 (核心解耦逻辑)
@@ -62,6 +64,53 @@ def get_embedding_model() -> OpenAIEmbeddings:
         api_key=config.api_key
     )
 
+@lru_cache()
+def get_embedding_cache() -> Optional[PersistentEmbeddingCache]:
+    """
+    获取 Embedding 持久化缓存单例。
+    未启用 (EMBEDDING_CACHE_ENABLED=False) 时返回 None。
+    """
+    if not settings.embedding_cache.enabled:
+        return None
+
+    return PersistentEmbeddingCache(
+        path=settings.embedding_cache.path,
+        model=settings.embedding_llm.model,
+        dimension=settings.embedding_llm.dimension,
+        max_entries=settings.embedding_cache.max_entries,
+        touch_interval=settings.embedding_cache.touch_interval_seconds
+    )
+
+@lru_cache()
+def get_query_embedding_cache() -> Optional[QueryEmbeddingCache]:
+    """
+    获取进程内查询向量缓存单例。
+    未启用 (EMBEDDING_CACHE_QUERY_ENABLED=False) 时返回 None。
+    """
+    if not settings.embedding_cache.query_enabled:
+        return None
+
+    return QueryEmbeddingCache(
+        max_entries=settings.embedding_cache.query_max_entries,
+        ttl_seconds=settings.embedding_cache.query_ttl_seconds
+    )
+
+@lru_cache()
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """
+    获取统一 Embedding 调度器单例。
+    所有 embedding 请求共享同一个并发上限 (EMBEDDING_LLM_MAX_CONCURRENCY)。
+    """
+    config = settings.embedding_llm
+    return EmbeddingBatcher(
+        client=get_embedding_model(),
+        cache=get_embedding_cache(),
+        max_concurrency=config.max_concurrency,
+        max_batch_items=config.max_batch_items,
+        max_batch_tokens=config.max_batch_tokens,
+        encoding_name=settings.splitter.encoding_name
+    )
+
 # ==========================================
 # 3. 查询重写 LLM (Rewrite LLM)
 # ==========================================
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Tuple
+from typing import List, Tuple, Dict
 from langchain_text_splitters import (
     MarkdownHeaderTextSplitter,
     RecursiveCharacterTextSplitter,
@@ -128,6 +128,7 @@ class MarkdownSplitter(TextSplitter):
                         content=chunk_content,
                         parent_headings=parent_headings,
                         metadata=chunk_metadata,
+                        collection=source.collection,
                     )
                 )
             else:
@@ -155,8 +156,16 @@ class MarkdownSplitter(TextSplitter):
                             content=sub_chunk.page_content,
                             parent_headings=sub_parent_headings,
                             metadata=sub_chunk_metadata,
+                            collection=source.collection,
                         )
                     )
 
+        # 确定性 chunk_id: 内容未变化的块在重复摄入时保持相同的 ID
+        occurrences: Dict[str, int] = {}
+        for chunk in final_chunks:
+            occurrence = occurrences.get(chunk.content_hash, 0)
+            occurrences[chunk.content_hash] = occurrence + 1
+            chunk.assign_stable_chunk_id(occurrence)
+
         log.info(f"文档 {source.document_name} 分割完毕，生成 {len(final_chunks)} 个块。")
         return final_chunks
\ No newline at end of file
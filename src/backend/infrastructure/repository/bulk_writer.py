@@ -0,0 +1,248 @@
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from opensearchpy import TransportError, ConnectionError as OpenSearchConnectionError
+
+from ...domain.models import BulkIndexResult
+
+log = logging.getLogger(__name__)
+
+# 可重试的状态码: 写线程池队列已满 (429) / 节点暂时不可用 (502/503/504)
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class AdaptiveBulkSizer:
+    """
+    AIMD (加性增、乘性减) 的 bulk 请求大小控制器，在多次调用和多个写入协程间共享。
+
+    - 请求成功且耗时低于 target_latency: 大小加 increase_step
+    - 请求耗时超过 target_latency 或出现拒绝 (429 等): 大小乘以 decrease_factor
+    大小始终限制在 [min_size, max_size] 之间。
+    """
+
+    def __init__(
+        self,
+        initial_size: int = 500,
+        min_size: int = 50,
+        max_size: int = 2000,
+        target_latency: float = 2.0,
+        increase_step: int = 50,
+        decrease_factor: float = 0.5
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._size = float(min(max(initial_size, min_size), max_size))
+
+        self.requests = 0
+        self.rejections = 0
+        self.decreases = 0
+
+    @property
+    def size(self) -> int:
+        return int(self._size)
+
+    def _decrease(self):
+        self._size = max(self.min_size, self._size * self.decrease_factor)
+        self.decreases += 1
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        if latency > self.target_latency:
+            self._decrease()
+        else:
+            self._size = min(self.max_size, self._size + self.increase_step)
+
+    def record_rejection(self):
+        self.requests += 1
+        self.rejections += 1
+        self._decrease()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "requests": self.requests,
+            "rejections": self.rejections,
+            "decreases": self.decreases,
+        }
+
+
+class _BulkItem:
+    __slots__ = ("doc_id", "data", "attempts")
+
+    def __init__(self, doc_id: str, data: str):
+        self.doc_id = doc_id
+        self.data = data
+        self.attempts = 0
+
+
+class BulkWriter:
+    """
+    直接调用 client.bulk 的写入器：从队列中取 action，按 AdaptiveBulkSizer 给出的大小组批发送。
+
+    - 被拒绝的条目 (429 等可重试状态、整个请求超时 / 连接失败) 以指数退避重新提交，
+      超过 max_retries 后计为永久失败。
+    - 其他错误 (如 mapping 冲突) 直接计为永久失败。
+    - 队列暂时为空时最多等待 flush_interval 秒凑批，避免生产较慢时发送过小的请求。
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        sizer: AdaptiveBulkSizer,
+        max_chunk_bytes: int = 10 * 1024 * 1024,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        flush_interval: float = 0.5
+    ):
+        self.client = client
+        self.sizer = sizer
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.flush_interval = flush_interval
+        self._serializer = client.transport.serializer
+
+    def _to_item(self, action: Dict[str, Any]) -> _BulkItem:
+        op_type = action.get("_op_type", "index")
+        header = {op_type: {"_index": action["_index"], "_id": action["_id"]}}
+        lines = [self._serializer.dumps(header)]
+        if op_type != "delete":
+            lines.append(self._serializer.dumps(action["_source"]))
+        return _BulkItem(action["_id"], "\n".join(lines) + "\n")
+
+    async def _fill(
+        self,
+        batch: List[_BulkItem],
+        carry: List[_BulkItem],
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]"
+    ) -> bool:
+        """
+        从队列补充 batch 直至达到目标大小或字节上限。读到结束标记时返回 True。
+        超出字节上限的条目放入 carry，留给下一批。
+        """
+        size = self.sizer.size
+        batch_bytes = sum(len(item.data) for item in batch)
+        while len(batch) < size:
+            try:
+                if batch:
+                    action = await asyncio.wait_for(queue.get(), timeout=self.flush_interval)
+                else:
+                    action = await queue.get()
+            except asyncio.TimeoutError:
+                return False
+            if action is None:
+                return True
+
+            item = self._to_item(action)
+            if batch and batch_bytes + len(item.data) > self.max_chunk_bytes:
+                carry.append(item)
+                return False
+            batch.append(item)
+            batch_bytes += len(item.data)
+        return False
+
+    def _take(self, pending: List[_BulkItem], size: int) -> Tuple[List[_BulkItem], List[_BulkItem]]:
+        """
+        从待发送 (重试 / 上一批溢出) 的条目中取出一批，同样遵守条数与字节上限 (至少取一条)。
+        """
+        taken = 0
+        batch_bytes = 0
+        for item in pending[:size]:
+            if taken and batch_bytes + len(item.data) > self.max_chunk_bytes:
+                break
+            taken += 1
+            batch_bytes += len(item.data)
+        return pending[:taken], pending[taken:]
+
+    async def _send(self, batch: List[_BulkItem]) -> Tuple[int, List[_BulkItem], List[Dict[str, Any]]]:
+        """
+        发送一个 bulk 请求。返回 (成功数, 可重试条目, 永久失败条目的错误信息)。
+        """
+        body = "".join(item.data for item in batch)
+        try:
+            response = await self.client.bulk(body=body)
+        except (OpenSearchConnectionError, asyncio.TimeoutError) as e:
+            log.warning(f"bulk 请求 ({len(batch)} 条) 连接失败 / 超时，整批重试: {e}")
+            return 0, list(batch), []
+        except TransportError as e:
+            if e.status_code in RETRYABLE_STATUS:
+                log.warning(f"bulk 请求 ({len(batch)} 条) 被拒绝 ({e.status_code})，整批重试。")
+                return 0, list(batch), []
+            log.error(f"bulk 请求 ({len(batch)} 条) 失败: {e.status_code} {e.info}")
+            return 0, [], [{"_id": item.doc_id, "status": e.status_code, "error": str(e.info)} for item in batch]
+
+        if not response.get("errors"):
+            return len(batch), [], []
+
+        success = 0
+        retry: List[_BulkItem] = []
+        failed: List[Dict[str, Any]] = []
+        for item, result in zip(batch, response.get("items", [])):
+            op_result = next(iter(result.values()))
+            status = op_result.get("status", 500)
+            if 200 <= status < 300:
+                success += 1
+            elif status in RETRYABLE_STATUS:
+                retry.append(item)
+            else:
+                failed.append({"_id": item.doc_id, "status": status, "error": op_result.get("error")})
+        return success, retry, failed
+
+    async def write_from_queue(self, queue: "asyncio.Queue[Optional[Dict[str, Any]]]") -> BulkIndexResult:
+        """
+        持续消费队列直到读到结束标记 (None) 且所有重试完成。
+        """
+        result = BulkIndexResult()
+        pending: List[_BulkItem] = []
+        finished = False
+
+        while True:
+            size = self.sizer.size
+            batch, pending = self._take(pending, size)
+            if len(batch) < size and not finished:
+                finished = await self._fill(batch, pending, queue)
+            if not batch:
+                if finished and not pending:
+                    break
+                continue
+
+            started = time.monotonic()
+            success, retry, failed = await self._send(batch)
+            latency = time.monotonic() - started
+
+            result.success += success
+            result.failed += len(failed)
+            result.errors.extend(failed)
+
+            if not retry:
+                self.sizer.record_success(latency)
+                continue
+
+            # 有条目被拒绝: 缩小批次，退避后优先重试这些条目 (退避时间按条目的重试次数指数增长)
+            self.sizer.record_rejection()
+            to_retry: List[_BulkItem] = []
+            for item in retry:
+                item.attempts += 1
+                if item.attempts > self.max_retries:
+                    result.failed += 1
+                    result.errors.append({"_id": item.doc_id, "error": "超过最大重试次数"})
+                else:
+                    result.retried += 1
+                    to_retry.append(item)
+            pending = to_retry + pending
+
+            max_attempts = max(item.attempts for item in retry)
+            backoff = min(self.max_backoff, self.initial_backoff * 2 ** (max_attempts - 1))
+            log.warning(
+                f"{len(retry)} 条被拒绝，{backoff:.1f}s 后重试 (批次大小调整为 {self.sizer.size})。"
+            )
+            await asyncio.sleep(backoff)
+
+        return result
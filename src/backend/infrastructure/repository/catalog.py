@@ -0,0 +1,188 @@
+import os
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from opensearchpy import AsyncOpenSearch, NotFoundError, RequestError
+
+from ...core.config import settings
+from ...domain.models import DocumentRecord
+from ...domain.interfaces import DocumentCatalog
+
+log = logging.getLogger(__name__)
+
+
+def catalog_id(document_id: str, collection: Optional[str] = None) -> str:
+    """
+    目录记录的 ID: {集合}:{document_id} (同名文档可以存在于不同集合)。
+    """
+    return f"{collection or settings.opensearch.default_collection}:{document_id}"
+
+
+# 目录索引的映射: 只索引用于过滤 / 排序的字段，其余字段 (如 error) 仅保存在 _source 中
+CATALOG_MAPPING = {
+    "settings": {
+        "index": {
+            "number_of_shards": 1
+        }
+    },
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "catalog_id": {"type": "keyword"},
+            "document_id": {"type": "keyword"},
+            "document_name": {"type": "keyword", "ignore_above": 512},
+            "collection": {"type": "keyword"},
+            "status": {"type": "keyword"},
+            "chunk_count": {"type": "integer"},
+            "content_hash": {"type": "keyword"},
+            "created_at": {"type": "double"},
+            "updated_at": {"type": "double"},
+            "delete_task_id": {"type": "keyword"},
+        }
+    }
+}
+
+
+class OpenSearchDocumentCatalog(DocumentCatalog):
+    """
+    OpenSearch 文档目录: 独立的小索引，每个文档一条记录，按 catalog_id 排序 + search_after 分页。
+    与文档块索引共用客户端 (读写分离同文档块索引)。
+    """
+
+    def __init__(self, client: AsyncOpenSearch, write_client: AsyncOpenSearch, index_name: str):
+        self.client = client
+        self.write_client = write_client
+        self.index_name = index_name
+        self._index_ready = False
+        log.info(f"文档目录索引: {self.index_name}")
+
+    async def _ensure_index(self):
+        if self._index_ready:
+            return
+        if not await self.client.indices.exists(index=self.index_name):
+            try:
+                await self.write_client.indices.create(index=self.index_name, body=CATALOG_MAPPING)
+                log.info(f"文档目录索引 '{self.index_name}' 创建成功。")
+            except RequestError as e:
+                # 并发创建时由其他进程先创建
+                if e.error != "resource_already_exists_exception":
+                    raise
+        self._index_ready = True
+
+    async def get(self, document_id: str, collection: Optional[str] = None) -> Optional[DocumentRecord]:
+        try:
+            response = await self.client.get(index=self.index_name, id=catalog_id(document_id, collection))
+        except NotFoundError:
+            return None
+        return DocumentRecord(**response["_source"])
+
+    async def upsert(self, record: DocumentRecord):
+        await self._ensure_index()
+        record_id = catalog_id(record.document_id, record.collection)
+        await self.write_client.index(
+            index=self.index_name,
+            id=record_id,
+            body={"catalog_id": record_id, **record.model_dump()},
+            refresh="wait_for"
+        )
+
+    async def remove(self, document_id: str, collection: Optional[str] = None):
+        try:
+            await self.write_client.delete(
+                index=self.index_name, id=catalog_id(document_id, collection), refresh="wait_for"
+            )
+        except NotFoundError:
+            pass
+
+    async def list(
+        self,
+        collection: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DocumentRecord], Optional[str]]:
+        filter_clauses: List[Dict[str, Any]] = []
+        if collection:
+            filter_clauses.append({"term": {"collection": collection}})
+        if status:
+            filter_clauses.append({"term": {"status": status}})
+        body: Dict[str, Any] = {
+            "size": page_size,
+            "query": {"bool": {"filter": filter_clauses}} if filter_clauses else {"match_all": {}},
+            "sort": [{"catalog_id": "asc"}]
+        }
+        if cursor:
+            body["search_after"] = [cursor]
+
+        try:
+            response = await self.client.search(index=self.index_name, body=body)
+        except NotFoundError:
+            # 尚未摄入过任何文档
+            return [], None
+        hits = response["hits"]["hits"]
+        records = [DocumentRecord(**hit["_source"]) for hit in hits]
+        next_cursor = hits[-1]["sort"][0] if len(hits) == page_size else None
+        return records, next_cursor
+
+
+class LocalDocumentCatalog(DocumentCatalog):
+    """
+    本地文档目录 (SEARCH_BACKEND=local): 保存在本地存储目录下的 catalog.json，
+    全部记录常驻内存，每次修改后原子替换文件。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.local_store.path) / "catalog.json"
+        self._records: Dict[str, DocumentRecord] = {}
+        self._write_lock = asyncio.Lock()
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._records = {record_id: DocumentRecord(**record) for record_id, record in data.items()}
+        log.info(f"本地文档目录 {self.path} ({len(self._records)} 个文档)。")
+
+    def _write_file(self, data: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    async def _persist(self):
+        async with self._write_lock:
+            data = {record_id: record.model_dump() for record_id, record in self._records.items()}
+            await asyncio.to_thread(self._write_file, data)
+
+    async def get(self, document_id: str, collection: Optional[str] = None) -> Optional[DocumentRecord]:
+        return self._records.get(catalog_id(document_id, collection))
+
+    async def upsert(self, record: DocumentRecord):
+        self._records[catalog_id(record.document_id, record.collection)] = record
+        await self._persist()
+
+    async def remove(self, document_id: str, collection: Optional[str] = None):
+        if self._records.pop(catalog_id(document_id, collection), None) is not None:
+            await self._persist()
+
+    async def list(
+        self,
+        collection: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DocumentRecord], Optional[str]]:
+        records: List[DocumentRecord] = []
+        last_id: Optional[str] = None
+        for record_id in sorted(self._records):
+            if cursor is not None and record_id <= cursor:
+                continue
+            record = self._records[record_id]
+            if (collection and record.collection != collection) or (status and record.status != status):
+                continue
+            records.append(record)
+            last_id = record_id
+            if len(records) >= page_size:
+                return records, last_id
+        return records, None
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncGenerator, AsyncIterable, AsyncIterator
+
+from ...core.config import settings, RecallPathOptions
+from ...domain.models import DocumentChunk, RetrievedChunk, BulkIndexResult, SearchFilter, DeletionStatus
+from ...domain.interfaces import SearchRepository
+from .opensearch_store import AsyncOpenSearchRAGStore
+from .common import rrf_fuse
+
+log = logging.getLogger(__name__)
+
+# 写入分流时每个集合的缓冲条数 (写满后反压到上游)
+ROUTE_QUEUE_SIZE = 256
+
+
+class CollectionRouter(SearchRepository):
+    """
+    多集合存储：每个集合对应一个 AsyncOpenSearchRAGStore (独立的索引、读写别名与分片设置，共用连接池)。
+
+    - 写入: 按 DocumentChunk.collection 分流到各集合的批量导入流水线 (为空时为默认集合)
+    - 检索: 按 SearchFilter.collections 选择集合 (为空时为默认集合)，
+      多个集合并行检索后以 RRF 融合；只选中一个集合时直接委托，没有额外开销
+    - 遍历 / 导出: 未指定集合时依次遍历全部集合
+    """
+
+    def __init__(self, default_store: AsyncOpenSearchRAGStore):
+        self.default_collection = default_store.collection
+        self._stores: Dict[str, AsyncOpenSearchRAGStore] = {default_store.collection: default_store}
+        self.collections = list(dict.fromkeys([self.default_collection, *settings.opensearch.collections]))
+        log.info(f"集合: {self.collections} (默认: {self.default_collection})")
+
+    def get_store(self, collection: Optional[str] = None) -> AsyncOpenSearchRAGStore:
+        """
+        获取集合对应的存储 (首次使用时创建，复用默认集合的客户端)。
+        """
+        name = collection or self.default_collection
+        store = self._stores.get(name)
+        if store is None:
+            if name not in self.collections:
+                raise ValueError(f"未知的集合 '{name}'，请将其加入 OPENSEARCH_COLLECTIONS。")
+            default_store = self._stores[self.default_collection]
+            store = AsyncOpenSearchRAGStore(
+                collection=name,
+                clients=(default_store.client, default_store.write_client)
+            )
+            self._stores[name] = store
+        return store
+
+    def _select_stores(self, filters: Optional[SearchFilter], all_by_default: bool = False) -> List[AsyncOpenSearchRAGStore]:
+        if filters is not None and filters.collections:
+            names = list(dict.fromkeys(filters.collections))
+        elif all_by_default:
+            names = self.collections
+        else:
+            names = [self.default_collection]
+        return [self.get_store(name) for name in names]
+
+    # --- 写入 ---
+
+    async def _route_stream(
+        self,
+        items: AsyncIterable[Any],
+        collection_of: Callable[[Any], Optional[str]],
+        write: Callable[[AsyncOpenSearchRAGStore, AsyncIterable[Any]], Awaitable[BulkIndexResult]]
+    ) -> BulkIndexResult:
+        """
+        [内部辅助] 将输入流按集合拆分为多个子流，各集合的批量导入流水线并发消费。
+        """
+        queues: Dict[str, "asyncio.Queue[Any]"] = {}
+        tasks: List[asyncio.Task] = []
+
+        async def _drain(queue: "asyncio.Queue[Any]") -> AsyncGenerator[Any, None]:
+            while (item := await queue.get()) is not None:
+                yield item
+
+        async def _put(name: str, item: Any):
+            # 消费端异常退出时不再阻塞在已满的队列上
+            put = asyncio.ensure_future(queues[name].put(item))
+            done, _ = await asyncio.wait([put, tasks_by_name[name]], return_when=asyncio.FIRST_COMPLETED)
+            if put not in done:
+                put.cancel()
+                tasks_by_name[name].result()
+
+        tasks_by_name: Dict[str, asyncio.Task] = {}
+        try:
+            async for item in items:
+                name = collection_of(item) or self.default_collection
+                if name not in queues:
+                    store = self.get_store(name)
+                    queues[name] = asyncio.Queue(maxsize=ROUTE_QUEUE_SIZE)
+                    tasks_by_name[name] = asyncio.create_task(write(store, _drain(queues[name])))
+                    tasks.append(tasks_by_name[name])
+                await _put(name, item)
+            for name in queues:
+                await _put(name, None)
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        result = BulkIndexResult()
+        for partial in results:
+            result = result.merge(partial)
+        return result
+
+    async def bulk_add_documents(self, documents: List[DocumentChunk]) -> BulkIndexResult:
+        if not documents:
+            log.warning("没有要添加的文档。")
+            return BulkIndexResult()
+
+        async def _iter_documents() -> AsyncGenerator[DocumentChunk, None]:
+            for doc in documents:
+                yield doc
+
+        return await self.bulk_add_documents_stream(_iter_documents())
+
+    async def bulk_add_documents_stream(
+        self,
+        documents: AsyncIterable[DocumentChunk],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        return await self._route_stream(
+            documents,
+            lambda doc: doc.collection,
+            lambda store, stream: store.bulk_add_documents_stream(stream, batch_size=batch_size)
+        )
+
+    async def bulk_add_sources(
+        self,
+        sources: AsyncIterable[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        return await self._route_stream(
+            sources,
+            lambda source: source.get("collection"),
+            lambda store, stream: store.bulk_add_sources(stream, batch_size=batch_size)
+        )
+
+    async def get_chunk_hashes(self, document_id: str, collection: Optional[str] = None) -> Dict[str, Optional[str]]:
+        return await self.get_store(collection).get_chunk_hashes(document_id)
+
+    async def delete_chunks(self, chunk_ids: List[str], refresh: bool = True, collection: Optional[str] = None) -> int:
+        return await self.get_store(collection).delete_chunks(chunk_ids, refresh=refresh)
+
+    async def start_document_deletion(self, document_id: str, collection: Optional[str] = None) -> str:
+        return await self.get_store(collection).start_document_deletion(document_id)
+
+    async def get_deletion_status(self, task_id: str) -> DeletionStatus:
+        # 任务 ID 在集群内唯一，与集合无关
+        return await self._stores[self.default_collection].get_deletion_status(task_id)
+
+    @asynccontextmanager
+    async def bulk_load_session(self, collection: Optional[str] = None, **kwargs) -> AsyncIterator[None]:
+        """
+        只对写入的集合开启批量导入会话 (其他集合的索引设置不变，也不会因此创建索引)。
+        会话期间写入其他集合的文档照常按批 refresh。
+        """
+        async with self.get_store(collection).bulk_load_session(**kwargs):
+            yield
+
+    # --- 检索 ---
+
+    def _fuse(self, results_lists: List[List[RetrievedChunk]], k: int, rrf_k: int) -> List[RetrievedChunk]:
+        """
+        以 RRF 融合各集合的检索结果 (各集合内部的分数不可直接比较，只使用名次)。
+        """
+        chunks: Dict[str, RetrievedChunk] = {}
+        hits_lists: List[List[Dict[str, Any]]] = []
+        for results in results_lists:
+            hits_lists.append([{"_id": chunk.chunk.chunk_id} for chunk in results])
+            for chunk in results:
+                chunks.setdefault(chunk.chunk.chunk_id, chunk)
+        return [
+            chunks[chunk_id].model_copy(update={"search_score": score})
+            for chunk_id, score in rrf_fuse(hits_lists, k_constant=rrf_k)[:k]
+        ]
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        k: int = 5,
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[RetrievedChunk]:
+        stores = self._select_stores(filters)
+        results_lists = await asyncio.gather(*[
+            store.hybrid_search(
+                query_text, k=k, rrf_k=rrf_k, fusion_mode=fusion_mode, path_options=path_options, filters=filters
+            )
+            for store in stores
+        ])
+        if len(stores) == 1:
+            return results_lists[0]
+        return self._fuse(results_lists, k, rrf_k)
+
+    async def hybrid_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[List[RetrievedChunk]]:
+        stores = self._select_stores(filters)
+        per_store = await asyncio.gather(*[
+            store.hybrid_search_batch(
+                queries, k=k, rrf_k=rrf_k, fusion_mode=fusion_mode, path_options=path_options, filters=filters
+            )
+            for store in stores
+        ])
+        if len(stores) == 1:
+            return per_store[0]
+        return [
+            self._fuse([results[qi] for results in per_store], k, rrf_k)
+            for qi in range(len(queries))
+        ]
+
+    async def scan_chunks(
+        self,
+        filters: Optional[SearchFilter] = None,
+        page_size: Optional[int] = None,
+        include_vectors: bool = False,
+        keep_alive: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        依次遍历选中的集合 (未指定时为全部集合)。
+        """
+        for store in self._select_stores(filters, all_by_default=True):
+            async for source in store.scan_chunks(
+                filters=filters, page_size=page_size, include_vectors=include_vectors, keep_alive=keep_alive
+            ):
+                source.setdefault("collection", store.collection)
+                yield source
+
+    # --- 运维 ---
+
+    async def reindex(self, collection: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        return await self.get_store(collection).reindex(**kwargs)
+
+    async def verify_connection(self):
+        await self._stores[self.default_collection].verify_connection()
+
+    async def close_connection(self):
+        # 其他集合复用默认集合的客户端，最后由默认集合关闭连接
+        for name, store in self._stores.items():
+            if name != self.default_collection:
+                await store.close_connection()
+        await self._stores[self.default_collection].close_connection()
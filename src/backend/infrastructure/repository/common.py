@@ -0,0 +1,75 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+from ...core.config import settings
+from ...domain.models import DocumentChunk, RetrievedChunk
+from .mappings import VECTOR_FIELDS, ALL_VECTOR_FIELDS
+
+# OpenSearch 与本地存储共用的检索逻辑 (召回路径、RRF 融合、结果组装)
+
+# 混合检索的召回路径 (顺序即各路结果列表的下标顺序)
+RECALL_PATHS = ["bm25", *VECTOR_FIELDS]
+
+# 各向量字段对应的源文本字段 (仅包含当前索引结构预设启用的字段，顺序同 VECTOR_FIELDS)
+VECTOR_SOURCE_FIELDS = {
+    field: text_field
+    for field, text_field in {
+        "embedding_content": "content",
+        "embedding_parent_headings": "parent_headings_merged",
+        "embedding_summary": "summary",
+        "embedding_hypothetical_questions": "hypothetical_questions_merged",
+    }.items()
+    if field in VECTOR_FIELDS
+}
+
+# 当前索引结构预设未启用的向量字段 (复用旧索引数据时需剔除)
+DROPPED_VECTOR_FIELDS = [field for field in ALL_VECTOR_FIELDS if field not in VECTOR_FIELDS]
+
+
+def rrf_fuse(
+    results_lists: List[List[Dict[str, Any]]],
+    k_constant: int = 60,
+    weights: Optional[List[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    使用 (加权) RRF 融合多路召回结果: score = Σ w / (k + rank)。
+    返回按分数降序排列的 (doc_id, rrf_score) 列表。
+    """
+    fused_scores: Dict[str, float] = {}
+    weights = weights or [1.0 for _ in results_lists]
+
+    for results, weight in zip(results_lists, weights):
+        for rank, doc in enumerate(results, 1):
+            doc_id = doc['_id']
+            fused_scores[doc_id] = fused_scores.get(doc_id, 0.0) + weight / (k_constant + rank)
+
+    return sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def source_to_retrieved_chunk(source: Dict[str, Any], score: float) -> RetrievedChunk:
+    """
+    将文档 _source 字典和分数转换为 RetrievedChunk 对象。
+    显式映射字段，不包含 embedding 向量等大字段。
+    """
+    doc_chunk = DocumentChunk(
+        chunk_id=source.get("chunk_id"),
+        document_id=source.get("document_id"),
+        document_name=source.get("document_name", ""),
+        content=source.get("content", ""),
+        summary=source.get("summary"),
+        metadata=source.get("metadata", {}),
+        collection=source.get("collection")
+    )
+    return RetrievedChunk(chunk=doc_chunk, search_score=score, rerank_score=None)
+
+
+def metadata_keywords(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    可过滤 metadata 键 (OPENSEARCH_FILTERABLE_METADATA_KEYS) 的 keyword 副本，值统一转为字符串 (列表保留为多值)。
+    """
+    keywords: Dict[str, Any] = {}
+    for key in settings.opensearch.filterable_metadata_keys:
+        value = (metadata or {}).get(key)
+        if value is None:
+            continue
+        keywords[key] = [str(v) for v in value] if isinstance(value, (list, tuple)) else str(value)
+    return keywords
@@ -0,0 +1,118 @@
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, IO
+
+from ...domain.interfaces import SearchRepository
+from ...domain.models import SearchFilter
+from .mappings import VECTOR_FIELDS, ALL_VECTOR_FIELDS
+
+log = logging.getLogger(__name__)
+
+# Parquet 中以字符串列保存的字段；其余字段 (如 metadata) 序列化为 JSON 字符串，
+# 未列出的字段统一放入 extra 列，避免不同批次推断出不一致的 schema
+PARQUET_STRING_FIELDS = [
+    "chunk_id",
+    "document_id",
+    "document_name",
+    "content",
+    "content_tokenized",
+    "parent_headings_merged",
+    "summary",
+    "hypothetical_questions_merged",
+    "content_hash",
+]
+PARQUET_JSON_FIELDS = ["metadata", "metadata_keywords"]
+
+
+class JsonlChunkWriter:
+    """
+    每行一个文档块 (_source) 的 JSONL 写入器。
+    """
+
+    def __init__(self, path: Path):
+        self._file: IO[str] = open(path, "w", encoding="utf-8")
+
+    def write(self, sources: List[Dict[str, Any]]):
+        for source in sources:
+            self._file.write(json.dumps(source, ensure_ascii=False))
+            self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetChunkWriter:
+    """
+    Parquet 写入器 (需要安装 pyarrow)。每次 write 写入一个 row group。
+    """
+
+    def __init__(self, path: Path, include_vectors: bool):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("导出 Parquet 需要安装 pyarrow: pip install pyarrow") from e
+
+        self._pa = pa
+        self._vector_fields = VECTOR_FIELDS if include_vectors else []
+        fields = [pa.field(name, pa.string()) for name in PARQUET_STRING_FIELDS + PARQUET_JSON_FIELDS + ["extra"]]
+        fields += [pa.field(name, pa.list_(pa.float32())) for name in self._vector_fields]
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def write(self, sources: List[Dict[str, Any]]):
+        known = set(PARQUET_STRING_FIELDS + PARQUET_JSON_FIELDS + self._vector_fields)
+        columns: Dict[str, List[Any]] = {name: [] for name in self._schema.names}
+        for source in sources:
+            for name in PARQUET_STRING_FIELDS:
+                value = source.get(name)
+                columns[name].append(None if value is None else str(value))
+            for name in PARQUET_JSON_FIELDS:
+                value = source.get(name)
+                columns[name].append(None if value is None else json.dumps(value, ensure_ascii=False))
+            for name in self._vector_fields:
+                columns[name].append(source.get(name))
+            extra = {k: v for k, v in source.items() if k not in known and k not in ALL_VECTOR_FIELDS}
+            columns["extra"].append(json.dumps(extra, ensure_ascii=False) if extra else None)
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+async def export_chunks(
+    store: SearchRepository,
+    output: Path,
+    fmt: Optional[str] = None,
+    filters: Optional[SearchFilter] = None,
+    include_vectors: bool = False,
+    page_size: int = 1000
+) -> int:
+    """
+    将索引中的文档块流式导出到 JSONL / Parquet 文件，返回导出的块数。
+    每积累 page_size 个块写出一次，内存占用与索引大小无关。
+
+    :param fmt: jsonl / parquet，默认按文件扩展名判断
+    """
+    fmt = fmt or ("parquet" if output.suffix.lower() == ".parquet" else "jsonl")
+    writer = ParquetChunkWriter(output, include_vectors) if fmt == "parquet" else JsonlChunkWriter(output)
+
+    count = 0
+    buffer: List[Dict[str, Any]] = []
+    try:
+        async for source in store.scan_chunks(filters=filters, page_size=page_size, include_vectors=include_vectors):
+            buffer.append(source)
+            if len(buffer) >= page_size:
+                writer.write(buffer)
+                count += len(buffer)
+                buffer = []
+                log.info(f"已导出 {count} 个文档块...")
+        if buffer:
+            writer.write(buffer)
+            count += len(buffer)
+    finally:
+        writer.close()
+
+    log.info(f"导出完成: {count} 个文档块 -> {output} ({fmt})")
+    return count
@@ -1,7 +1,12 @@
 from functools import lru_cache
 
+from ...core.config import settings
+
 from .opensearch_store import AsyncOpenSearchRAGStore
-from ...domain.interfaces import Retriever
+from .local_store import LocalRAGStore
+from .collection_router import CollectionRouter
+from .catalog import OpenSearchDocumentCatalog, LocalDocumentCatalog
+from ...domain.interfaces import Retriever, SearchRepository, DocumentCatalog
 from .retriever import RetrievalService
 from ..llm.factory import get_rewrite_llm, get_rerank_client
 
@@ -12,6 +17,42 @@ def get_opensearch_store() -> AsyncOpenSearchRAGStore:
     """
     return AsyncOpenSearchRAGStore()
 
+@lru_cache()
+def get_local_store() -> LocalRAGStore:
+    """
+    [工厂方法] 获取进程内嵌入式存储 LocalRAGStore 单例 (LOCAL_STORE_*)。
+    """
+    return LocalRAGStore()
+
+@lru_cache()
+def get_collection_router() -> CollectionRouter:
+    """
+    [工厂方法] 获取多集合存储 CollectionRouter 单例 (默认集合即 get_opensearch_store())。
+    """
+    return CollectionRouter(get_opensearch_store())
+
+def get_search_repository() -> SearchRepository:
+    """
+    [工厂方法] 按 SEARCH_BACKEND 返回检索后端 (opensearch / local)。
+    """
+    if settings.search_backend == "local":
+        return get_local_store()
+    return get_collection_router()
+
+@lru_cache()
+def get_document_catalog() -> DocumentCatalog:
+    """
+    [工厂方法] 按 SEARCH_BACKEND 获取文档目录单例 (OpenSearch 目录索引与文档块索引共用客户端)。
+    """
+    if settings.search_backend == "local":
+        return LocalDocumentCatalog()
+    store = get_opensearch_store()
+    return OpenSearchDocumentCatalog(
+        client=store.client,
+        write_client=store.write_client,
+        index_name=settings.opensearch.catalog_index_name or f"{settings.opensearch.index_name}_catalog"
+    )
+
 @lru_cache()
 def get_retrieval_service() -> Retriever:
     """
@@ -19,7 +60,9 @@ def get_retrieval_service() -> Retriever:
     这里负责将 infrastructure 层的具体实现注入到 service 层。
     """
     return RetrievalService(
-        search_repo=get_opensearch_store(),
+        search_repo=get_search_repository(),
         rewrite_llm=get_rewrite_llm(),
-        rerank_client=get_rerank_client()
-    )
\ No newline at end of file
+        rerank_client=get_rerank_client(),
+        search_k=settings.opensearch.search_k,
+        rrf_k=settings.opensearch.rrf_k
+    )
@@ -0,0 +1,772 @@
+import os
+import uuid
+import re
+import json
+import math
+import heapq
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Awaitable, AsyncGenerator, AsyncIterable, AsyncIterator
+
+import numpy as np
+
+from ...core.config import settings, RecallPathOptions
+from ...domain.models import DocumentChunk, RetrievedChunk, BulkIndexResult, SearchFilter, DeletionStatus
+from ...domain.interfaces import SearchRepository
+from ..llm.factory import get_embedding_batcher, get_query_embedding_cache
+from .mappings import VECTOR_FIELDS, ALL_VECTOR_FIELDS
+from .tokenizer import get_jieba_tokenizer
+from .projection import get_embedding_projector
+from .common import RECALL_PATHS, VECTOR_SOURCE_FIELDS, rrf_fuse, source_to_retrieved_chunk, metadata_keywords
+
+log = logging.getLogger(__name__)
+
+EMBEDDING_DIM = settings.vector_dimension
+
+# 与 OpenSearch multi_match (best_fields) 的字段与权重一致: 每个文档取各字段加权得分的最大值
+BM25_FIELD_BOOSTS = {
+    "content_tokenized": 3.0,
+    "content": 2.0,
+    "hypothetical_questions_merged": 2.0,
+    "summary": 1.5,
+    "parent_headings_merged": 1.5,
+    "document_name": 1.0,
+}
+
+# 近似 OpenSearch standard 分析器: 小写的字母数字词，中日韩字符逐字切分
+_STANDARD_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def _standard_analyze(text: str) -> List[str]:
+    return _STANDARD_TOKEN_PATTERN.findall(text.lower())
+
+
+def _whitespace_analyze(text: str) -> List[str]:
+    return text.split()
+
+
+class _BM25Field:
+    """
+    单个文本字段的 BM25 倒排索引 (词 -> {chunk_id: 词频})，打分公式与 Lucene BM25Similarity 一致。
+    同时保存每个文档包含的词 (chunk_id -> 词)，删除时只修改这些词的倒排表。
+    """
+
+    def __init__(self, analyzer: Callable[[str], List[str]], k1: float, b: float):
+        self.analyzer = analyzer
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.doc_tokens: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def add(self, doc_id: str, text: Optional[str]):
+        self.remove(doc_id)
+        tokens = self.analyzer(text or "")
+        if not tokens:
+            return
+        counts = Counter(tokens)
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+        self.doc_tokens[doc_id] = list(counts)
+        self.lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for token in self.doc_tokens.pop(doc_id):
+            docs = self.postings[token]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[token]
+
+    def score(self, query_text: str, allowed: Optional[Set[str]] = None) -> Dict[str, float]:
+        n = len(self.lengths)
+        if n == 0:
+            return {}
+        avgdl = self.total_length / n
+
+        scores: Dict[str, float] = {}
+        for token, qtf in Counter(self.analyzer(query_text)).items():
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (self.k1 + 1) / norm
+        return scores
+
+
+def _normalize_rows(vectors: List[Optional[List[float]]]) -> np.ndarray:
+    """
+    转换为 float32 矩阵并按行归一化 (内积即余弦相似度)。缺失 / 零向量保存为全零行。
+    """
+    matrix = np.zeros((len(vectors), EMBEDDING_DIM), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        if vector is not None:
+            matrix[i] = vector
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class LocalRAGStore(SearchRepository):
+    """
+    进程内嵌入式检索后端 (单机小规模部署 / 测试)，检索语义与 AsyncOpenSearchRAGStore 一致:
+
+    - 各向量字段 (索引结构预设启用的字段) 各自保存为连续的 float32 矩阵 (已归一化，内积即余弦相似度)，
+      持久化为 .npy 文件并以内存映射加载；默认暴力检索 (精确)，可选 faiss HNSW 近似索引。
+    - BM25 倒排索引使用与 OpenSearch 相同的字段与权重 (best_fields)，content_tokenized 同样由 Jieba 分词。
+    - 多路召回的候选数、路径参数 (OPENSEARCH_RECALL_PATH_OPTIONS) 与 RRF 融合均与 OpenSearch 后端相同。
+
+    写入先在内存中完成，再整体重写到 LOCAL_STORE_PATH (批量导入会话期间推迟到会话结束)。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.config = settings.local_store
+        self.path = Path(path or self.config.path)
+
+        self.embedder = get_embedding_batcher()
+        self.query_embedding_cache = get_query_embedding_cache()
+        self.projector = get_embedding_projector()
+        self.tokenizer = get_jieba_tokenizer()
+
+        # chunk_id -> _source (不含向量)，以及 行号 <-> chunk_id 的映射 (被覆盖 / 删除的行标记为无效)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._rows: Dict[str, int] = {}
+        self._row_ids: List[Optional[str]] = []
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._matrices: Dict[str, np.ndarray] = {
+            field: np.zeros((0, EMBEDDING_DIM), dtype=np.float32) for field in VECTOR_FIELDS
+        }
+        self._bm25: Dict[str, _BM25Field] = {
+            field: _BM25Field(
+                _whitespace_analyze if field == "content_tokenized" else _standard_analyze,
+                self.config.bm25_k1,
+                self.config.bm25_b
+            )
+            for field in BM25_FIELD_BOOSTS
+        }
+
+        # faiss 索引 (字段 -> (索引, 索引位置 -> 行号))，写入后失效、下次检索时重建
+        self._ann: Dict[str, Tuple[Any, np.ndarray]] = {}
+        self._ann_available = self.config.ann == "faiss"
+
+        self._dirty = False
+        self._write_lock = asyncio.Lock()
+        self._bulk_load_depth = 0
+        # 已完成的删除任务 (task_id -> 结果)，仅保存在进程内
+        self._deletion_tasks: Dict[str, DeletionStatus] = {}
+
+        self._load()
+        log.info(f"LocalRAGStore (路径: {self.path}，文档块: {len(self._records)}) 已初始化。")
+
+    # --- 持久化 ---
+
+    def _load(self):
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            log.info(f"本地存储 {self.path} 尚无数据。")
+            return
+
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest["dimension"] != EMBEDDING_DIM:
+            raise ValueError(
+                f"本地存储的向量维度 ({manifest['dimension']}) 与当前配置 ({EMBEDDING_DIM}) 不一致，请重新导入数据。"
+            )
+        projection = self.projector.fingerprint()
+        if manifest.get("projection", "none") != projection:
+            raise ValueError(
+                f"本地存储的向量投影方式 ({manifest.get('projection', 'none')}) 与当前配置 ({projection}) 不一致，请重新导入数据。"
+            )
+        missing_fields = [field for field in VECTOR_FIELDS if field not in manifest["fields"]]
+        if missing_fields:
+            raise ValueError(
+                f"本地存储缺少当前索引结构预设所需的向量字段 {missing_fields}，请重新导入数据。"
+            )
+
+        with open(self.path / "records.jsonl", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        matrices = {field: np.load(self.path / f"{field}.npy", mmap_mode="r") for field in VECTOR_FIELDS}
+        for field, matrix in matrices.items():
+            if matrix.shape != (len(records), EMBEDDING_DIM):
+                raise ValueError(f"本地存储文件不完整: {field}.npy 形状为 {matrix.shape}，记录数为 {len(records)}。")
+
+        self._matrices = matrices
+        self._size = len(records)
+        self._alive = np.ones(self._size, dtype=bool)
+        self._row_ids = [record["chunk_id"] for record in records]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._row_ids)}
+        self._records = {record["chunk_id"]: record for record in records}
+        for record in records:
+            self._index_bm25(record)
+
+    def _write_files(self, rows: np.ndarray, records: List[Dict[str, Any]]):
+        """
+        [同步] 将有效行压缩后写入临时文件并原子替换，最后写 manifest。
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        def _replace(name: str, write: Callable[[Any], None], mode: str):
+            tmp_path = self.path / f"{name}.tmp"
+            with open(tmp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+                write(f)
+            os.replace(tmp_path, self.path / name)
+
+        _replace(
+            "records.jsonl",
+            lambda f: f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records),
+            "w"
+        )
+        for field in VECTOR_FIELDS:
+            matrix = np.ascontiguousarray(self._matrices[field][rows])
+            _replace(f"{field}.npy", lambda f: np.save(f, matrix), "wb")
+        _replace(
+            "manifest.json",
+            lambda f: json.dump({
+                "dimension": EMBEDDING_DIM,
+                "projection": self.projector.fingerprint(),
+                "count": len(records),
+                "fields": VECTOR_FIELDS
+            }, f),
+            "w"
+        )
+
+    async def _persist(self):
+        """
+        将内存中的数据写回磁盘，并以内存映射重新加载压缩后的矩阵。
+        文件写入在线程中进行；替换内存状态在事件循环中一次完成，检索不会看到不一致的中间状态。
+        """
+        async with self._write_lock:
+            # 持有写锁直到内存状态替换完成: 写入期间的 _upsert / _remove 会等待，不会被替换丢失
+            if not self._dirty:
+                return
+            rows = np.flatnonzero(self._alive[:self._size])
+            row_ids = [self._row_ids[row] for row in rows]
+            records = [self._records[chunk_id] for chunk_id in row_ids]
+            await asyncio.to_thread(self._write_files, rows, records)
+
+            self._matrices = {
+                field: np.load(self.path / f"{field}.npy", mmap_mode="r") for field in VECTOR_FIELDS
+            }
+            self._size = len(row_ids)
+            self._alive = np.ones(self._size, dtype=bool)
+            self._row_ids = row_ids
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(row_ids)}
+            self._ann.clear()
+            self._dirty = False
+            log.info(f"本地存储已写入 {self.path} ({self._size} 个文档块)。")
+
+    # --- 内存索引维护 ---
+
+    def _index_bm25(self, record: Dict[str, Any]):
+        for field, index in self._bm25.items():
+            index.add(record["chunk_id"], record.get(field))
+
+    def _ensure_capacity(self, extra: int):
+        """
+        保证矩阵可写且有足够的剩余行 (容量按倍数增长，内存映射的只读矩阵在首次写入时复制到内存)。
+        """
+        needed = self._size + extra
+        capacity = len(self._alive)
+        writable = all(matrix.flags.writeable for matrix in self._matrices.values())
+        if needed <= capacity and writable:
+            return
+
+        new_capacity = max(needed, capacity * 2, 1024)
+        for field, matrix in self._matrices.items():
+            grown = np.zeros((new_capacity, EMBEDDING_DIM), dtype=np.float32)
+            grown[:self._size] = matrix[:self._size]
+            self._matrices[field] = grown
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _upsert(self, records: List[Dict[str, Any]], vectors: Dict[str, np.ndarray]):
+        """
+        写入一批文档 (同一 chunk_id 的旧行标记为无效，新内容追加到末尾)。调用方需持有 _write_lock。
+        """
+        self._ensure_capacity(len(records))
+        for i, record in enumerate(records):
+            chunk_id = record["chunk_id"]
+            old_row = self._rows.get(chunk_id)
+            if old_row is not None:
+                self._alive[old_row] = False
+                self._row_ids[old_row] = None
+
+            row = self._size
+            for field in VECTOR_FIELDS:
+                self._matrices[field][row] = vectors[field][i]
+            self._alive[row] = True
+            self._row_ids.append(chunk_id)
+            self._rows[chunk_id] = row
+            self._records[chunk_id] = record
+            self._index_bm25(record)
+            self._size += 1
+
+        self._ann.clear()
+        self._dirty = True
+
+    def _remove(self, chunk_id: str) -> bool:
+        """
+        删除一个文档块 (行标记为无效)。调用方需持有 _write_lock。
+        """
+        row = self._rows.pop(chunk_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._row_ids[row] = None
+        del self._records[chunk_id]
+        for index in self._bm25.values():
+            index.remove(chunk_id)
+        self._ann.clear()
+        self._dirty = True
+        return True
+
+    # --- 写入 ---
+
+    async def _build_records_async(self, documents: List[DocumentChunk]) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+        """
+        [内部辅助] 生成一批文档的 _source 与归一化向量 (各路字段合并为一次 embedding 调度，与 Jieba 分词并发)。
+        """
+        records = [
+            {
+                "chunk_id": doc.chunk_id,
+                "document_id": doc.document_id,
+                "document_name": doc.document_name,
+                "content": doc.content,
+                "parent_headings_merged": " ".join(doc.parent_headings),
+                "summary": doc.summary,
+                "hypothetical_questions_merged": " ".join(doc.hypothetical_questions),
+                "metadata": doc.metadata,
+                "content_hash": doc.content_hash,
+                "collection": doc.collection or settings.opensearch.default_collection,
+            }
+            for doc in documents
+        ]
+        texts = [record.get(text_field) or "" for text_field in VECTOR_SOURCE_FIELDS.values() for record in records]
+
+        embeddings, tokenized = await asyncio.gather(
+            self.embedder.embed(texts),
+            self.tokenizer.tokenize_many([record["content"] for record in records])
+        )
+        for record, tokens in zip(records, tokenized):
+            record["content_tokenized"] = tokens
+
+        embeddings = self.projector.project(embeddings)
+        n = len(records)
+        vectors = {
+            field: _normalize_rows(embeddings[fi * n:(fi + 1) * n])
+            for fi, field in enumerate(VECTOR_SOURCE_FIELDS)
+        }
+        return records, vectors
+
+    async def bulk_add_documents(self, documents: List[DocumentChunk]) -> BulkIndexResult:
+        if not documents:
+            log.warning("没有要添加的文档。")
+            return BulkIndexResult()
+
+        async def _iter_documents() -> AsyncGenerator[DocumentChunk, None]:
+            for doc in documents:
+                yield doc
+
+        return await self.bulk_add_documents_stream(_iter_documents())
+
+    async def bulk_add_documents_stream(
+        self,
+        documents: AsyncIterable[DocumentChunk],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        按批生成向量与分词后写入内存索引，结束后写回磁盘 (批量导入会话中推迟到会话结束)。
+        """
+        return await self._write_batches(
+            documents, self._build_records_async, item_id=lambda doc: doc.chunk_id, batch_size=batch_size
+        )
+
+    async def _build_records_from_sources_async(
+        self,
+        sources: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+        """
+        [内部辅助] 拆分已包含向量的 _source (缺少 content_tokenized 时补做分词)。
+        """
+        records = [
+            {key: value for key, value in source.items() if key not in ALL_VECTOR_FIELDS and key != "metadata_keywords"}
+            for source in sources
+        ]
+        for record in records:
+            record.setdefault("collection", settings.opensearch.default_collection)
+        missing = [record for record in records if "content_tokenized" not in record]
+        tokenized = await self.tokenizer.tokenize_many([record.get("content") or "" for record in missing])
+        for record, tokens in zip(missing, tokenized):
+            record["content_tokenized"] = tokens
+
+        vectors = {field: _normalize_rows([source.get(field) for source in sources]) for field in VECTOR_FIELDS}
+        return records, vectors
+
+    async def bulk_add_sources(
+        self,
+        sources: AsyncIterable[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        直接写入已包含向量的 _source (快照恢复)，不调用 embedding 模型。
+        """
+        return await self._write_batches(
+            sources, self._build_records_from_sources_async, item_id=lambda source: source["chunk_id"],
+            batch_size=batch_size
+        )
+
+    async def _write_batches(
+        self,
+        items: AsyncIterable[Any],
+        build_records: Callable[[List[Any]], Awaitable[Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]]],
+        item_id: Callable[[Any], str],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        [内部辅助] 分批准备 -> 写入内存索引 -> 写回磁盘 (bulk_add_documents_stream 与 bulk_add_sources 共用)。
+        """
+        batch_size = batch_size or settings.opensearch.bulk_pipeline_batch_size
+        result = BulkIndexResult()
+
+        async def _write(batch: List[Any]):
+            # 同一批中重复的 chunk_id 只保留最后一个
+            batch = list({item_id(item): item for item in batch}.values())
+            try:
+                records, vectors = await build_records(batch)
+            except Exception as e:
+                result.failed += len(batch)
+                result.errors.extend({"_id": item_id(item), "error": str(e)} for item in batch)
+                log.error(f"子批次 ({len(batch)} 个文档) 生成 embedding / 分词失败: {e}", exc_info=True)
+                return
+            async with self._write_lock:
+                self._upsert(records, vectors)
+            result.success += len(records)
+
+        batch: List[Any] = []
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await _write(batch)
+                batch = []
+        if batch:
+            await _write(batch)
+
+        if self._bulk_load_depth == 0:
+            await self._persist()
+        log.info(f"本地批量导入完成。成功: {result.success}, 失败: {result.failed}")
+        return result
+
+    @staticmethod
+    def _record_collection(record: Dict[str, Any]) -> str:
+        # 早于集合功能写入的记录属于默认集合
+        return record.get("collection") or settings.opensearch.default_collection
+
+    async def get_chunk_hashes(self, document_id: str, collection: Optional[str] = None) -> Dict[str, Optional[str]]:
+        collection = collection or settings.opensearch.default_collection
+        return {
+            chunk_id: record.get("content_hash")
+            for chunk_id, record in self._records.items()
+            if record.get("document_id") == document_id and self._record_collection(record) == collection
+        }
+
+    async def delete_chunks(self, chunk_ids: List[str], refresh: bool = True, collection: Optional[str] = None) -> int:
+        async with self._write_lock:
+            deleted_count = sum(1 for chunk_id in chunk_ids if self._remove(chunk_id))
+        if deleted_count and self._bulk_load_depth == 0:
+            await self._persist()
+        log.info(f"已删除 {deleted_count}/{len(chunk_ids)} 个文档块。")
+        return deleted_count
+
+    async def start_document_deletion(self, document_id: str, collection: Optional[str] = None) -> str:
+        """
+        本地删除只修改内存索引并写回磁盘，直接同步完成；任务 ID 仅用于与 OpenSearch 后端保持一致的查询方式。
+        """
+        collection = collection or settings.opensearch.default_collection
+        chunk_ids = [
+            chunk_id for chunk_id, record in self._records.items()
+            if record.get("document_id") == document_id and self._record_collection(record) == collection
+        ]
+        task_id = f"local:{uuid.uuid4().hex}"
+        deleted = await self.delete_chunks(chunk_ids) if chunk_ids else 0
+        self._deletion_tasks[task_id] = DeletionStatus(
+            task_id=task_id, completed=True, deleted=deleted, total=len(chunk_ids)
+        )
+        return task_id
+
+    async def get_deletion_status(self, task_id: str) -> DeletionStatus:
+        status = self._deletion_tasks.get(task_id)
+        if status is None:
+            return DeletionStatus(task_id=task_id, completed=True, error="任务不存在或已过期")
+        return status
+
+    @asynccontextmanager
+    async def bulk_load_session(self, collection: Optional[str] = None, **kwargs) -> AsyncIterator[None]:
+        """
+        批量导入会话：会话期间的写入只更新内存索引，最后一个会话退出时统一写回磁盘。
+        全部集合保存在同一份存储中，collection 不影响会话范围。
+        """
+        self._bulk_load_depth += 1
+        try:
+            yield
+        finally:
+            self._bulk_load_depth -= 1
+            if self._bulk_load_depth == 0:
+                await self._persist()
+
+    # --- 检索 ---
+
+    def _filter_ids(self, filters: Optional[SearchFilter], all_collections: bool = False) -> Optional[Set[str]]:
+        """
+        满足过滤条件的 chunk_id 集合 (None 表示不过滤)，规则与 OpenSearch 后端的 filter 子句一致。
+        集合的选择与 CollectionRouter 一致: 未指定时检索默认集合 (all_collections 时为全部集合)。
+        """
+        if filters is not None and filters.collections:
+            collections = set(filters.collections)
+        elif settings.opensearch.collections and not all_collections:
+            collections = {settings.opensearch.default_collection}
+        else:
+            collections = None
+        if collections is None and (filters is None or filters.is_empty()):
+            return None
+        filters = filters or SearchFilter()
+
+        metadata_filters = {key: set(values) for key, values in filters.metadata.items() if values}
+        for key in metadata_filters:
+            if key not in settings.opensearch.filterable_metadata_keys:
+                raise ValueError(
+                    f"metadata 键 '{key}' 不可过滤，请将其加入 OPENSEARCH_FILTERABLE_METADATA_KEYS。"
+                )
+        document_ids = set(filters.document_ids or [])
+        document_names = set(filters.document_names or [])
+
+        allowed: Set[str] = set()
+        for chunk_id, record in self._records.items():
+            if collections is not None and self._record_collection(record) not in collections:
+                continue
+            if document_ids and record.get("document_id") not in document_ids:
+                continue
+            if document_names and record.get("document_name") not in document_names:
+                continue
+            if metadata_filters:
+                keywords = metadata_keywords(record.get("metadata"))
+                if not all(
+                    values.intersection(keywords[key] if isinstance(keywords.get(key), list) else [keywords.get(key)])
+                    for key, values in metadata_filters.items()
+                ):
+                    continue
+            allowed.add(chunk_id)
+        return allowed
+
+    def _bm25_search(self, tokenized_query: str, k: int, allowed: Optional[Set[str]]) -> List[Dict[str, Any]]:
+        best: Dict[str, float] = {}
+        for field, boost in BM25_FIELD_BOOSTS.items():
+            for chunk_id, score in self._bm25[field].score(tokenized_query, allowed).items():
+                best[chunk_id] = max(best.get(chunk_id, 0.0), score * boost)
+        top = heapq.nlargest(k, best.items(), key=lambda item: item[1])
+        return [{"_id": chunk_id, "_score": score, "_source": self._records[chunk_id]} for chunk_id, score in top]
+
+    def _use_ann(self) -> bool:
+        return self._ann_available and len(self._records) >= self.config.ann_min_rows
+
+    def _get_ann(self, field: str) -> Optional[Tuple[Any, np.ndarray]]:
+        """
+        获取 (必要时重建) 字段的 faiss HNSW 索引。faiss 不可用时返回 None 并改为暴力检索。
+        """
+        if field in self._ann:
+            return self._ann[field]
+        try:
+            import faiss
+        except ImportError:
+            log.warning("未安装 faiss (pip install faiss-cpu)，本地存储改为暴力检索。")
+            self._ann_available = False
+            return None
+
+        rows = np.flatnonzero(self._alive[:self._size])
+        index = faiss.IndexHNSWFlat(EMBEDDING_DIM, self.config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.add(np.ascontiguousarray(self._matrices[field][rows]))
+        self._ann[field] = (index, rows)
+        log.info(f"字段 {field} 的 HNSW 索引已构建 ({len(rows)} 行)。")
+        return self._ann[field]
+
+    def _knn_search(
+        self,
+        field: str,
+        query: np.ndarray,
+        k: int,
+        options: RecallPathOptions,
+        allowed_rows: Optional[np.ndarray]
+    ) -> List[Dict[str, Any]]:
+        """
+        单个向量字段的检索。分数与 OpenSearch cosinesimil 一致: (1 + cos) / 2。
+        过滤 (allowed_rows) 与径向检索 (min_score / max_distance) 使用精确的暴力检索。
+        """
+        if self._size == 0:
+            return []
+
+        radial = options.min_score is not None or options.max_distance is not None
+        ann = self._get_ann(field) if allowed_rows is None and not radial and self._use_ann() else None
+        if ann is not None:
+            index, ann_rows = ann
+            index.hnsw.efSearch = max(options.ef_search or self.config.ef_search, k)
+            sims, positions = index.search(query[None, :], k)
+            keep = positions[0] >= 0
+            rows, sims = ann_rows[positions[0][keep]], sims[0][keep]
+        else:
+            rows = allowed_rows if allowed_rows is not None else np.flatnonzero(self._alive[:self._size])
+            if len(rows) == 0:
+                return []
+            sims = self._matrices[field][rows] @ query
+            if options.min_score is not None:
+                keep = (1 + sims) / 2 >= options.min_score
+                rows, sims = rows[keep], sims[keep]
+            elif options.max_distance is not None:
+                keep = 1 - sims <= options.max_distance
+                rows, sims = rows[keep], sims[keep]
+            if len(rows) > k:
+                top = np.argpartition(-sims, k - 1)[:k]
+                rows, sims = rows[top], sims[top]
+            order = np.argsort(-sims, kind="stable")
+            rows, sims = rows[order], sims[order]
+
+        return [
+            {"_id": self._row_ids[row], "_score": float((1 + sim) / 2), "_source": self._records[self._row_ids[row]]}
+            for row, sim in zip(rows.tolist(), sims.tolist())
+        ]
+
+    async def _get_query_embeddings_batch_async(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        查询向量与 OpenSearch 后端一致走 aembed_query (不使用文档向量)。
+        """
+        try:
+            if self.query_embedding_cache:
+                embeddings = await self.query_embedding_cache.get_or_compute_many(texts, self.embedder.embed_queries)
+            else:
+                embeddings = await self.embedder.embed_queries(texts)
+            return self.projector.project(embeddings)
+        except Exception as e:
+            log.error(f"批量获取查询 embedding 失败: {e}", exc_info=True)
+            return [None for _ in texts]
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        k: int = 5,
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[RetrievedChunk]:
+        """
+        混合检索 (BM25 + 各路向量 + RRF)。fusion_mode 仅为与 OpenSearch 后端保持签名一致，始终在本地融合。
+        """
+        (results,) = await self.hybrid_search_batch(
+            [query_text], k=k, rrf_k=rrf_k, path_options=path_options, filters=filters
+        )
+        return results
+
+    async def hybrid_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        批量混合检索：所有查询共用一次 embedding 调用，召回与融合均在进程内完成。
+        """
+        if not queries:
+            return []
+
+        # 先校验过滤条件 (不可过滤的 metadata 键直接报错，不调用 embedding)
+        self._filter_ids(filters)
+        unique_queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        if not unique_queries:
+            return [[] for _ in queries]
+
+        tokenized_queries, query_embeddings = await asyncio.gather(
+            asyncio.gather(*[self.tokenizer.tokenize_query(q) for q in unique_queries]),
+            self._get_query_embeddings_batch_async(unique_queries)
+        )
+        # 等待 embedding 期间索引可能已被修改: 过滤集合在此之后计算，之后的召回与融合之间不再让出事件循环
+        allowed = self._filter_ids(filters)
+
+        path_options = path_options or {}
+        resolved = {
+            path: settings.opensearch.get_recall_path_options(path, path_options.get(path))
+            for path in RECALL_PATHS
+        }
+        allowed_rows = None
+        if allowed is not None:
+            allowed_rows = np.array(sorted(self._rows[chunk_id] for chunk_id in allowed), dtype=np.int64)
+
+        candidate_k = k * 2
+        results_map: Dict[str, List[RetrievedChunk]] = {}
+        for query_text, tokenized_query, query_embedding in zip(unique_queries, tokenized_queries, query_embeddings):
+            results_lists = [self._bm25_search(tokenized_query, resolved["bm25"].k or candidate_k, allowed)]
+            if query_embedding is None:
+                log.warning(f"未能获取查询 '{query_text}' 的 embedding，仅执行 BM25 召回。")
+                results_lists.extend([] for _ in VECTOR_FIELDS)
+            else:
+                (query_vector,) = _normalize_rows([query_embedding])
+                results_lists.extend(
+                    self._knn_search(field, query_vector, resolved[field].k or candidate_k, resolved[field], allowed_rows)
+                    for field in VECTOR_FIELDS
+                )
+
+            sources = {hit['_id']: hit['_source'] for results in results_lists for hit in results}
+            results_map[query_text] = [
+                source_to_retrieved_chunk(sources[chunk_id], score)
+                for chunk_id, score in rrf_fuse(results_lists, k_constant=rrf_k)[:k]
+            ]
+
+        return [list(results_map.get(q, [])) for q in queries]
+
+    async def scan_chunks(
+        self,
+        filters: Optional[SearchFilter] = None,
+        page_size: Optional[int] = None,
+        include_vectors: bool = False,
+        keep_alive: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        按 chunk_id 顺序遍历全部 (或满足 filters 的) 文档块。向量为归一化后的值。
+        """
+        page_size = page_size or settings.opensearch.scan_page_size
+        allowed = self._filter_ids(filters, all_collections=True)
+        chunk_ids = sorted(chunk_id for chunk_id in self._records if allowed is None or chunk_id in allowed)
+
+        for i, chunk_id in enumerate(chunk_ids, 1):
+            record = self._records.get(chunk_id)
+            if record is None:
+                # 遍历期间已被删除
+                continue
+            source = dict(record)
+            if include_vectors:
+                row = self._rows[chunk_id]
+                for field in VECTOR_FIELDS:
+                    source[field] = self._matrices[field][row].tolist()
+            yield source
+            if i % page_size == 0:
+                await asyncio.sleep(0)
+
+    async def verify_connection(self):
+        log.info(f"使用本地存储 {self.path}，无需连接。")
+
+    async def close_connection(self):
+        await self._persist()
+        log.info("本地存储已关闭。")
@@ -1,13 +1,83 @@
-from ...core.config import settings
+from ...core.config import settings, VectorFieldOptions
+
+# 从配置获取维度 (降维后的维度)，保证动态性
+EMBEDDING_DIM = settings.vector_dimension
+
+# 全部向量字段
+ALL_VECTOR_FIELDS = [
+    "embedding_content",
+    "embedding_parent_headings",
+    "embedding_summary",
+    "embedding_hypothetical_questions",
+]
+
+# 索引结构预设 (OPENSEARCH_SCHEMA_PROFILE) 启用的向量字段
+SCHEMA_PROFILES = {
+    "full": ALL_VECTOR_FIELDS,
+    "content+questions": ["embedding_content", "embedding_hypothetical_questions"],
+    "content-only": ["embedding_content"],
+}
+
+# 当前启用的向量索引字段 (每个字段对应 hybrid_search 的一路向量召回)
+VECTOR_FIELDS = SCHEMA_PROFILES[settings.opensearch.schema_profile]
+
+
+def get_knn_field_mapping(options: VectorFieldOptions) -> dict:
+    """
+    根据字段参数构建单个 knn_vector 字段的映射。
+
+    - none:   faiss HNSW，float32 全精度
+    - fp16:   faiss HNSW + SQ fp16 编码 (内存减半)
+    - int8:   Lucene HNSW + 字节标量量化 (faiss 不支持 int8 编码，约 4x 压缩)
+    - binary: faiss HNSW + 二值量化 (1/2/4 bit，32x/16x/8x 压缩，建议配合查询时 rescore)
+    - mode / compression_level: 交由 OpenSearch 按压缩级别自动量化，可使用 on_disk 模式
+    """
+    quantization = options.quantization or "none"
+    if quantization != "none" and options.compression_level:
+        raise ValueError(
+            f"quantization ({quantization}) 与 compression_level ({options.compression_level}) 不能同时设置。"
+        )
+
+    method = {
+        "name": "hnsw",
+        "engine": "faiss",
+        "space_type": "cosinesimil",
+        "parameters": {
+            "ef_construction": options.ef_construction,
+            "m": options.m
+        }
+    }
+
+    if quantization == "fp16":
+        method["parameters"]["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+    elif quantization == "int8":
+        method["engine"] = "lucene"
+        method["parameters"]["encoder"] = {"name": "sq"}
+    elif quantization == "binary":
+        method["parameters"]["encoder"] = {"name": "binary", "parameters": {"bits": options.binary_bits or 1}}
+
+    field = {
+        "type": "knn_vector",
+        "dimension": EMBEDDING_DIM,
+        "method": method
+    }
+    if options.mode:
+        field["mode"] = options.mode
+    if options.compression_level:
+        field["compression_level"] = options.compression_level
+    return field
 
-# 从配置获取维度，保证动态性
-EMBEDDING_DIM = settings.embedding_llm.dimension
 
 def get_opensearch_mapping() -> dict:
     """
     获取 OpenSearch 索引映射配置。
     封装在函数中可以更方便地动态注入参数。
     """
+    vector_properties = {
+        field_name: get_knn_field_mapping(settings.opensearch.get_vector_field_options(field_name))
+        for field_name in VECTOR_FIELDS
+    }
+
     return {
         "settings": {
             "index": {
@@ -18,97 +88,63 @@ def get_opensearch_mapping() -> dict:
             "properties": {
                 # === 1. 关键索引字段 ===
                 "chunk_id": {
-                    "type": "keyword" 
+                    "type": "keyword"
                 },
                 "document_id": {
-                    "type": "keyword" 
+                    "type": "keyword"
+                },
+                "content_hash": {
+                    "type": "keyword"
                 },
-                
+                "collection": {
+                    "type": "keyword"
+                },
+
                 # === 2. 文本字段 (用于 BM25 和存储) ===
                 "document_name": {
                     "type": "text",
-                    "analyzer": "standard"
+                    "analyzer": "standard",
+                    "fields": {
+                        "keyword": {"type": "keyword", "ignore_above": 512}
+                    }
                 },
                 "content": {
                     "type": "text",
-                    "analyzer": "standard" 
+                    "analyzer": "standard"
                 },
-                "content_tokenized": { 
+                "content_tokenized": {
                     "type": "text",
-                    "analyzer": "whitespace" 
+                    "analyzer": "whitespace"
                 },
-                "parent_headings_merged": { 
+                "parent_headings_merged": {
                     "type": "text",
-                    "analyzer": "standard" 
+                    "analyzer": "standard"
                 },
                 "summary": {
                     "type": "text",
-                    "analyzer": "standard" 
+                    "analyzer": "standard"
                 },
                 "hypothetical_questions_merged": {
                     "type": "text",
-                    "analyzer": "standard" 
+                    "analyzer": "standard"
                 },
 
-                # === 3. 向量索引字段 ===
-                "embedding_content": {
-                    "type": "knn_vector",
-                    "dimension": EMBEDDING_DIM,
-                    "method": {
-                        "name": "hnsw",
-                        "engine": "faiss", 
-                        "space_type": "cosinesimil", 
-                        "parameters": {
-                            "ef_construction": 256,
-                            "m": 48
-                        }
-                    }
-                },
-                "embedding_parent_headings": {
-                    "type": "knn_vector",
-                    "dimension": EMBEDDING_DIM,
-                    "method": {
-                        "name": "hnsw",
-                        "engine": "faiss",
-                        "space_type": "cosinesimil",
-                        "parameters": {
-                            "ef_construction": 256,
-                            "m": 48
-                        }
-                    }
-                },
-                "embedding_summary": {
-                    "type": "knn_vector",
-                    "dimension": EMBEDDING_DIM,
-                    "method": {
-                        "name": "hnsw",
-                        "engine": "faiss",
-                        "space_type": "cosinesimil",
-                        "parameters": {
-                            "ef_construction": 256,
-                            "m": 48
-                        }
-                    }
-                },
-                "embedding_hypothetical_questions": {
-                    "type": "knn_vector",
-                    "dimension": EMBEDDING_DIM,
-                    "method": {
-                        "name": "hnsw",
-                        "engine": "faiss",
-                        "space_type": "cosinesimil",
-                        "parameters": {
-                            "ef_construction": 256,
-                            "m": 48
-                        }
-                    }
-                },
+                # === 3. 向量索引字段 (量化 / on_disk 参数见 OPENSEARCH_VECTOR_*) ===
+                **vector_properties,
 
                 # === 4. 元数据 ===
                 "metadata": {
                     "type": "object",
-                    "enabled": False 
+                    "enabled": False
+                },
+                # 可过滤的 metadata 键 (OPENSEARCH_FILTERABLE_METADATA_KEYS) 的 keyword 副本
+                "metadata_keywords": {
+                    "type": "object",
+                    "dynamic": False,
+                    "properties": {
+                        key: {"type": "keyword"} for key in settings.opensearch.filterable_metadata_keys
+                    }
                 }
             }
         }
-    }
\ No newline at end of file
+    }
@@ -1,186 +1,859 @@
+import re
 import time
 import json
-import jieba
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncGenerator, AsyncIterable, AsyncIterator, Tuple, Callable, Awaitable
 
 # --- OpenSearch 异步客户端 ---
 from opensearchpy import AsyncOpenSearch, TransportError, NotFoundError
-from opensearchpy.helpers import async_bulk
 
 # --- 项目核心模块 ---
 # 导入配置 (config)
-from ...core.config import settings
+from ...core.config import settings, RecallPathOptions
 # 导入日志 (logging)
 from ...core.logging import setup_logging
-from ..llm.factory import get_embedding_model
-from ...domain.models import DocumentChunk, RetrievedChunk
+from ..llm.factory import get_embedding_batcher, get_query_embedding_cache
+from ...domain.models import DocumentChunk, RetrievedChunk, BulkIndexResult, SearchFilter, DeletionStatus
 from ...domain.interfaces import SearchRepository
-from .mappings import get_opensearch_mapping
+from .mappings import get_opensearch_mapping, VECTOR_FIELDS, ALL_VECTOR_FIELDS
+from .path_policy import RecallPathPolicy
+from .tokenizer import get_jieba_tokenizer
+from .bulk_writer import AdaptiveBulkSizer, BulkWriter
+from .common import RECALL_PATHS, VECTOR_SOURCE_FIELDS, DROPPED_VECTOR_FIELDS, rrf_fuse, source_to_retrieved_chunk, metadata_keywords
+from .projection import get_embedding_projector
 
 # === 日志配置 ===
 setup_logging() 
 log = logging.getLogger(__name__)
 
-# === 从配置中获取 Embedding 维度 ===
-EMBEDDING_DIM = settings.embedding_llm.dimension
+# === 从配置中获取索引向量维度 (降维后) ===
+EMBEDDING_DIM = settings.vector_dimension
+
+# === 检索结果只返回组装 RetrievedChunk 所需的字段 (向量等大字段不回传) ===
+RESULT_SOURCE_FIELDS = [
+    "chunk_id",
+    "document_id",
+    "document_name",
+    "content",
+    "summary",
+    "metadata",
+    "collection",
+]
+
+# 服务端 _reindex 时按相同规则补全 metadata_keywords (旧文档可能没有该字段)
+METADATA_KEYWORDS_SCRIPT = """
+if (ctx._source.metadata != null) {
+    Map keywords = new HashMap();
+    for (String key : params.keys) {
+        def value = ctx._source.metadata.get(key);
+        if (value == null) { continue; }
+        if (value instanceof List) {
+            List values = new ArrayList();
+            for (def v : value) { values.add(v.toString()); }
+            keywords.put(key, values);
+        } else {
+            keywords.put(key, value.toString());
+        }
+    }
+    ctx._source.metadata_keywords = keywords;
+}
+"""
+
+# 服务端 _reindex 时剔除当前索引结构预设未启用的向量字段 (否则会被动态映射为普通数值数组)
+DROP_VECTOR_FIELDS_SCRIPT = """
+for (String field : params.drop_fields) {
+    ctx._source.remove(field);
+}
+"""
+
+# 批量导入会话开始时将原索引设置记录在索引 _meta 的此键下，进程崩溃后据此恢复
+BULK_LOAD_META_KEY = "bulk_load_saved_settings"
 
 class AsyncOpenSearchRAGStore(SearchRepository):
     """
     一个用于 RAG 系统的 异步 OpenSearch 存储和检索类。
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        collection: Optional[str] = None,
+        clients: Optional[Tuple[AsyncOpenSearch, AsyncOpenSearch]] = None
+    ):
         """
         初始化 (同步)。
         从 `settings` 模块加载配置。
+
+        :param collection: 集合名 (为空时为默认集合)，每个集合对应独立的索引与读写别名
+        :param clients: 复用已有的 (检索, 写入) 客户端 (多个集合共用连接池)，为空时新建
         """
         # 从 config 模块导入 (使用 settings.opensearch.*)
-        self.index_name = settings.opensearch.index_name
+        # 检索经由读别名 index_name，写入经由写别名 (均指向版本化索引 {index_name}_v{n})
+        self.collection = collection or settings.opensearch.default_collection
+        self.index_name = settings.opensearch.collection_index_name(self.collection)
+        if self.collection == settings.opensearch.default_collection and settings.opensearch.write_alias:
+            self.write_alias = settings.opensearch.write_alias
+        else:
+            self.write_alias = f"{self.index_name}_write"
         self.host = settings.opensearch.host
         self.port = settings.opensearch.port
         
         # 使用 logging
         log.info(f"正在初始化 AsyncOpenSearchRAGStore...")
-        log.info(f"目标索引: {self.index_name}")
-        log.info(f"OpenSearch 地址: {self.host}:{self.port}")
-        log.info(f"Embedding 维度: {EMBEDDING_DIM}")
+        log.info(f"目标索引: {self.index_name} (写别名: {self.write_alias})")
+        self.hosts = settings.opensearch.hosts or [{'host': self.host, 'port': self.port}]
+        log.info(f"OpenSearch 地址: {self.hosts}")
+        log.info(f"Embedding 维度: {EMBEDDING_DIM} (降维方式: {settings.embedding_projection.mode})")
 
         # [Async Change] 实例化 AsyncOpenSearch 客户端
-        self.client = AsyncOpenSearch(
-            hosts=[{'host': self.host, 'port': self.port}],
-            http_auth=settings.opensearch.auth,  
-            use_ssl=settings.opensearch.use_ssl,
-            verify_certs=settings.opensearch.verify_certs,
-            ssl_assert_hostname=False,
-            ssl_show_warn=False,
-            timeout=60,
-            max_retry=3,
-            retry_on_timeout=True
-        )
+        # 检索 / 管理请求与写入请求使用独立的连接池，批量导入期间检索仍有可用连接
+        config = settings.opensearch
+        self._owns_clients = clients is None
+        if clients is not None:
+            self.client, self.write_client = clients
+        else:
+            self.client = self._create_client(
+                maxsize=config.pool_maxsize,
+                http_compress=config.http_compress,
+                timeout=config.search_timeout,
+                max_retries=config.max_retries
+            )
+            self.write_client = self._create_client(
+                maxsize=config.write_pool_maxsize,
+                http_compress=config.write_http_compress,
+                timeout=config.bulk_timeout,
+                max_retries=config.write_max_retries
+            )
         
-        # 使用 liteLLM 客户端
-        self.embedding_client = get_embedding_model()
+        # 使用 liteLLM 客户端，经由统一调度器 (打包 + 并发限制 + 持久化缓存) 访问
+        self.embedder = get_embedding_batcher()
+        self.embedding_client = self.embedder.client
+        self.embedding_cache = self.embedder.cache
+        # 进程内查询向量缓存 (可选)，重复/并发的相同查询只请求一次 embedding
+        self.query_embedding_cache = get_query_embedding_cache()
+        # 可选的降维 (文档向量与查询向量使用同一投影；缓存中保存的是原始向量)
+        self.projector = get_embedding_projector()
+
+        # bulk 请求大小自适应控制器 (跨批次、跨写入协程共享)
+        self.bulk_sizer = AdaptiveBulkSizer(
+            initial_size=settings.opensearch.bulk_chunk_size,
+            min_size=settings.opensearch.bulk_min_chunk_size,
+            max_size=settings.opensearch.bulk_max_chunk_size,
+            target_latency=settings.opensearch.bulk_target_latency
+        )
+
+        # 写别名是否已确认存在 (首次写入时检查，必要时创建索引与别名)
+        self._aliases_ready = False
+        self._aliases_lock = asyncio.Lock()
+
+        # 批量导入会话 (引用计数，允许多个摄入任务并发共享同一会话)
+        self._bulk_load_depth = 0
+        self._bulk_load_lock = asyncio.Lock()
+        self._bulk_load_indices: List[str] = []
+        self._bulk_load_saved_settings: Dict[str, Any] = {}
+
+        # 服务端融合模式下已注册的 search pipeline (rrf_k -> pipeline 名称)
+        self._search_pipelines: Dict[int, str] = {}
+
+        # 召回路径策略：统计各路对融合结果的贡献，并据此跳过 / 降权低价值路径
+        self.path_policy = RecallPathPolicy(
+            paths=RECALL_PATHS,
+            mode=settings.opensearch.path_policy_mode,
+            weights=settings.opensearch.path_policy_weights,
+            min_samples=settings.opensearch.path_policy_min_samples,
+            skip_below=settings.opensearch.path_policy_skip_below,
+            downweight_below=settings.opensearch.path_policy_downweight_below,
+            downweight=settings.opensearch.path_policy_downweight,
+            explore_rate=settings.opensearch.path_policy_explore_rate,
+            window=settings.opensearch.path_policy_window
+        )
         log.info("Embedding 客户端 (liteLLM) 已链接。")
+
+        # Jieba 分词器 (文档分词走专用进程池，查询分词带 LRU 缓存)
+        self.tokenizer = get_jieba_tokenizer()
         log.info("Jieba 分词器已准备就绪。")
         log.info(f"AsyncOpenSearchRAGStore (索引: {self.index_name}) 已初始化。")
 
+    def _create_client(self, maxsize: int, http_compress: bool, timeout: float, max_retries: int) -> AsyncOpenSearch:
+        config = settings.opensearch
+        return AsyncOpenSearch(
+            hosts=self.hosts,
+            http_auth=config.auth,
+            use_ssl=config.use_ssl,
+            verify_certs=config.verify_certs,
+            ssl_assert_hostname=False,
+            ssl_show_warn=False,
+            maxsize=maxsize,
+            http_compress=http_compress,
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_on_timeout=True,
+            sniff_on_start=config.sniff_on_start,
+            sniff_on_connection_fail=config.sniff_on_connection_fail,
+            sniffer_timeout=config.sniffer_timeout
+        )
+
     async def verify_connection(self):
         """
         异步检查与 OpenSearch 的连接。
         """
         try:
             if not await self.client.ping():
-                log.error(f"无法 Ping 通 OpenSearch (在 {self.host}:{self.port})。")
-                raise ConnectionError(f"无法连接到 OpenSearch (在 {self.host}:{self.port})。")
-            log.info(f"成功连接到 OpenSearch (在 {self.host}:{self.port})。")
+                log.error(f"无法 Ping 通 OpenSearch (在 {self.hosts})。")
+                raise ConnectionError(f"无法连接到 OpenSearch (在 {self.hosts})。")
+            log.info(f"成功连接到 OpenSearch (在 {self.hosts})。")
         except Exception as e:
             log.error(f"连接到 OpenSearch 失败: {e}", exc_info=True)
             raise
 
     # --- 异步 Embedding 封装 ---
 
+    async def _embed_queries(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return await self.embedder.embed_queries(texts)
+
     async def _get_embedding_async(self, text: str) -> List[float]:
         if not text: 
             return None
         try:
-            return await self.embedding_client.aembed_query(text)
+            if self.query_embedding_cache:
+                embedding = await self.query_embedding_cache.get_or_compute(text, self._embed_queries)
+            else:
+                embedding = await self.embedder.embed_query(text)
+            (projected,) = self.projector.project([embedding])
+            return projected
         except Exception as e:
             log.error(f"获取单个 embedding (aembed_query) 失败: {e}", exc_info=True)
             return None
 
+    async def _get_query_embeddings_batch_async(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        批量获取查询向量：与单条查询相同走 aembed_query (未命中查询缓存的查询并发请求)，
+        同一查询无论经由哪条检索路径都得到相同的向量。
+        失败时返回全 None 列表 (调用方降级为仅 BM25)。
+        """
+        try:
+            if self.query_embedding_cache:
+                embeddings = await self.query_embedding_cache.get_or_compute_many(texts, self._embed_queries)
+            else:
+                embeddings = await self._embed_queries(texts)
+            return self.projector.project(embeddings)
+        except Exception as e:
+            log.error(f"批量获取查询 embedding 失败: {e}", exc_info=True)
+            return [None for _ in texts]
+
     async def _get_embeddings_batch_async(self, texts: List[str]) -> List[List[float]]:
         if not texts:
             return []
         
-        valid_texts = []
-        valid_indices = []
-        for i, text in enumerate(texts):
-            if text and text.strip():
-                valid_texts.append(text)
-                valid_indices.append(i)
-            
-        if not valid_texts:
-            return [None for _ in texts]
-        
-        results: List[Optional[List[float]]] = [None for _ in texts]
-        
         try:
-            embeddings = await self.embedding_client.aembed_documents(valid_texts)
-            
-            for i, embedding in enumerate(embeddings):
-                original_index = valid_indices[i]
-                results[original_index] = embedding
-                
-            return results
-            
+            return self.projector.project(await self.embedder.embed(texts))
         except Exception as e:
             log.error(f"获取批量 embeddings (aembed_documents) 失败: {e}", exc_info=True)
             raise e
 
     # --- Jieba 分词封装 ---
 
-    def _tokenize_with_jieba_sync(self, text: str) -> str:
-        tokens = jieba.cut_for_search(text) 
-        return " ".join(tokens)
-
     async def _tokenize_with_jieba_async(self, text: str) -> str:
-        if not text:
-            return ""
-        return await asyncio.to_thread(self._tokenize_with_jieba_sync, text)
+        """
+        查询分词 (带 LRU 缓存)。
+        """
+        return await self.tokenizer.tokenize_query(text)
+
+    async def _tokenize_batch_with_jieba_async(self, texts: List[str]) -> List[str]:
+        """
+        文档批量分词 (进程池)。
+        """
+        return await self.tokenizer.tokenize_many(texts)
     
     # 数据转换
     def _convert_to_retrieved_chunk(self, source: Dict[str, Any], score: float) -> RetrievedChunk:
         """
-        [内部辅助] 将 OpenSearch 的 _source 字典和分数转换为 RetrievedChunk 对象。
-        
-        注意：这里显式构建 DocumentChunk，通常不包含 embedding 向量字段，
-        以减少后续流程的内存开销。
-        """
-        # 显式映射字段，避免传入多余的 OpenSearch 内部字段 (如 vectors)
-        doc_chunk = DocumentChunk(
-            chunk_id=source.get("chunk_id"),
-            document_id=source.get("document_id"),
-            document_name=source.get("document_name", ""),
-            content=source.get("content", ""),
-            summary=source.get("summary"),
-            metadata=source.get("metadata", {})
-        )
-        
-        return RetrievedChunk(
-            chunk=doc_chunk,
-            search_score=score,
-            rerank_score=None # 此时还没重排序
-        )
+        [内部辅助] 将 OpenSearch 的 _source 字典和分数转换为 RetrievedChunk 对象 (不含向量字段)。
+        """
+        return source_to_retrieved_chunk(source, score)
 
     # --- 索引管理 (DDL) ---
 
     async def create_index(self):
         """
         显式创建索引的方法。应在应用启动时调用。
+        首次创建时建立版本化索引 {index_name}_v1，并将读别名 / 写别名指向它。
+        """
+        try:
+            await self._ensure_aliases()
+        except TransportError as e:
+            log.error(f"创建索引时出错: {e.status_code} {e.info}", exc_info=True)
+        except Exception as e:
+            log.error(f"创建索引时发生未知错误: {e}", exc_info=True)
+
+        if not self._bulk_load_depth:
+            await self._restore_stale_bulk_load()
+
+        if settings.opensearch.fusion_mode == "server":
+            await self._ensure_search_pipeline(settings.opensearch.rrf_k)
+
+    # --- 别名与版本化索引 ---
+
+    def _index_body(self) -> Dict[str, Any]:
+        """
+        新建索引的 settings / mappings (含该集合的分片 / 副本数)。
+        _meta 中记录向量的投影方式 (reindex 时据此判断向量能否复用) 与索引结构预设。
+        """
+        body = get_opensearch_mapping()
+        options = settings.opensearch.get_collection_options(self.collection)
+        if options.number_of_shards:
+            body["settings"]["index"]["number_of_shards"] = options.number_of_shards
+        if options.number_of_replicas is not None:
+            body["settings"]["index"]["number_of_replicas"] = options.number_of_replicas
+        body["mappings"]["_meta"] = {
+            "embedding_projection": self.projector.fingerprint(),
+            "schema_profile": settings.opensearch.schema_profile
+        }
+        return body
+
+    def _versioned_index_name(self, version: int) -> str:
+        return f"{self.index_name}_v{version}"
+
+    async def _get_alias_indices(self, alias: str) -> List[str]:
         """
-        mapping_body = get_opensearch_mapping() # 获取配置
-        if not await self.client.indices.exists(index=self.index_name):
+        返回别名当前指向的具体索引 (别名不存在时为空列表)。
+        """
+        try:
+            response = await self.client.indices.get_alias(name=alias)
+            return list(response.keys())
+        except NotFoundError:
+            return []
+
+    async def _is_legacy_index(self) -> bool:
+        """
+        index_name 是否为旧版部署直接创建的具体索引 (而不是读别名)。
+        """
+        return (
+            not await self._get_alias_indices(self.index_name)
+            and await self.client.indices.exists(index=self.index_name)
+        )
+
+    async def _ensure_aliases(self):
+        """
+        确保写别名存在:
+        - 读别名已存在: 写别名指向读别名的索引
+        - index_name 为旧版具体索引: 写别名直接指向它 (reindex 时再迁移到版本化索引)
+        - 都不存在: 按当前映射创建 {index_name}_v1，并建立读别名与写别名
+        """
+        if await self._get_alias_indices(self.write_alias):
+            return
+
+        actions: List[Dict[str, Any]] = []
+        read_indices = await self._get_alias_indices(self.index_name)
+        if read_indices:
+            target = read_indices[0]
+        elif await self.client.indices.exists(index=self.index_name):
+            target = self.index_name
+            log.warning(f"'{self.index_name}' 为旧版具体索引，执行 reindex 后将迁移为别名。")
+        else:
+            target = self._versioned_index_name(1)
             try:
-                await self.client.indices.create(index=self.index_name, body=mapping_body)
-                log.info(f"索引 '{self.index_name}' 创建成功。")
+                await self.client.indices.create(index=target, body=self._index_body())
+                log.info(f"索引 '{target}' 创建成功。")
             except TransportError as e:
-                log.error(f"创建索引时出错: {e.status_code} {e.info}", exc_info=True)
-            except Exception as e:
-                log.error(f"创建索引时发生未知错误: {e}", exc_info=True)
+                # 其他进程可能同时创建 (resource_already_exists_exception)
+                if e.status_code != 400:
+                    raise
+                log.warning(f"索引 '{target}' 已存在: {e.info}")
+            actions.append({"add": {"index": target, "alias": self.index_name}})
+
+        actions.append({"add": {"index": target, "alias": self.write_alias, "is_write_index": True}})
+        await self.client.indices.update_aliases(body={"actions": actions})
+        log.info(f"别名已就绪: 读 '{self.index_name}'，写 '{self.write_alias}' -> '{target}'。")
+
+    async def _write_index(self) -> str:
+        """
+        返回写入目标 (写别名)。首次调用时确保别名存在，避免写入时自动创建无映射的索引。
+        """
+        if not self._aliases_ready:
+            async with self._aliases_lock:
+                if not self._aliases_ready:
+                    await self._ensure_aliases()
+                    # 本进程首次写入 (尚未进入过批量导入模式): 先恢复上次崩溃遗留的设置
+                    await self._restore_stale_bulk_load()
+                    self._aliases_ready = True
+        return self.write_alias
+
+    def _search_pipeline_name(self, rrf_k: int) -> str:
+        return f"{self.index_name}-rrf-{rrf_k}"
+
+    async def _ensure_search_pipeline(self, rrf_k: int) -> Optional[str]:
+        """
+        注册 (幂等) 用于服务端融合的 search pipeline，返回 pipeline 名称。
+        pipeline 使用 score-ranker-processor (OpenSearch 2.19+) 按 RRF 融合 hybrid 查询的各子查询结果，
+        rank_constant 与客户端 _rrf_fuse 的 k_constant 含义一致。
+        注册失败时返回 None 并记住失败 (不在每次查询时重试)，调用方应回退到客户端融合。
+        """
+        if rrf_k in self._search_pipelines:
+            return self._search_pipelines[rrf_k]
+
+        name = self._search_pipeline_name(rrf_k)
+        body = {
+            "description": f"RRF fusion for {self.index_name} (rank_constant={rrf_k})",
+            "phase_results_processors": [
+                {
+                    "score-ranker-processor": {
+                        "combination": {
+                            "technique": "rrf",
+                            "rank_constant": rrf_k
+                        }
+                    }
+                }
+            ]
+        }
+        try:
+            await self.client.search_pipeline.put(id=name, body=body)
+            self._search_pipelines[rrf_k] = name
+            log.info(f"Search pipeline '{name}' 已注册。")
+            return name
+        except TransportError as e:
+            self._search_pipelines[rrf_k] = None
+            log.error(
+                f"注册 search pipeline '{name}' 失败 (score-ranker-processor 需要 OpenSearch 2.19+)，"
+                f"改用客户端 RRF 融合: {e.status_code} {e.info}", exc_info=True
+            )
+            return None
+
+    async def _next_index_version(self) -> int:
+        try:
+            response = await self.client.indices.get(index=f"{self.index_name}_v*")
+        except NotFoundError:
+            return 1
+        pattern = re.compile(rf"^{re.escape(self.index_name)}_v(\d+)$")
+        versions = [int(m.group(1)) for name in response if (m := pattern.match(name))]
+        return max(versions, default=0) + 1
+
+    async def _vectors_reusable(self, source_indices: List[str]) -> bool:
+        """
+        源索引的向量能否直接复用: 当前索引结构预设启用的各向量字段都存在、维度与当前配置一致，
+        且投影方式 (_meta) 相同。源索引多出的向量字段在复制时剔除。
+        (更换了维度相同的 embedding 模型时无法检测，需显式指定 mode="reembed")
+        """
+        fingerprint = self.projector.fingerprint()
+        response = await self.client.indices.get_mapping(index=",".join(source_indices))
+        for index, body in response.items():
+            mappings = body.get("mappings", {})
+            projection = mappings.get("_meta", {}).get("embedding_projection", "none")
+            if projection != fingerprint:
+                log.info(f"索引 '{index}' 的向量投影方式为 {projection} (当前配置 {fingerprint})，需要重新 embedding。")
+                return False
+            properties = mappings.get("properties", {})
+            for field in VECTOR_FIELDS:
+                if field not in properties:
+                    log.info(f"索引 '{index}' 没有向量字段 {field} (索引结构预设已变更)，需要重新 embedding。")
+                    return False
+                dimension = properties[field].get("dimension")
+                if dimension != EMBEDDING_DIM:
+                    log.info(f"索引 '{index}' 的字段 {field} 维度为 {dimension} (当前配置 {EMBEDDING_DIM})，需要重新 embedding。")
+                    return False
+        return True
+
+    async def reindex(
+        self,
+        mode: str = "auto",
+        requests_per_second: Optional[float] = None,
+        slices: int = 1,
+        delete_old: bool = False,
+        poll_interval: float = 5.0
+    ) -> Dict[str, Any]:
+        """
+        蓝绿重建: 按当前映射 (维度 / HNSW 参数 / 量化 / 分析器) 创建新版本索引 {index_name}_v{n+1}，
+        在后台复制数据后原子切换读别名。整个过程中检索始终由旧索引提供服务。
+
+        1. 创建新索引 (构建期间关闭 refresh、副本数设为 0)
+        2. 将写别名切换到新索引：此后新写入的文档直接进入新索引
+        3. 复制旧索引数据 (op_type=create，不覆盖步骤 2 之后写入的新版本):
+           - reindex: 向量可复用时使用服务端 _reindex (后台任务，按 requests_per_second 限速)
+           - reembed: 向量不可复用时逐页读取旧文档、重新 embedding 后写入 (同样限速)
+           - auto:    按向量字段维度是否一致自动选择
+        4. 恢复新索引设置并 refresh，原子切换读别名 (旧版具体索引在切换的同一请求中删除)
+
+        注意: 步骤 2-4 之间新写入的文档在读别名切换前不可检索；此期间的删除只作用于新索引。
+        复制失败时写别名切回旧索引，新索引保留以便排查。
+
+        :param requests_per_second: 每秒复制的文档数，默认取 OPENSEARCH_REINDEX_REQUESTS_PER_SECOND (-1 不限速)
+        :param slices: 服务端 _reindex 的并行切片数
+        :param delete_old: 切换完成后删除旧版本索引
+        :return: 重建统计 (source / target / mode / total / created / version_conflicts / failures)
+        """
+        if mode not in ("auto", "reindex", "reembed"):
+            raise ValueError(f"未知的 reindex 模式: {mode}")
+        if requests_per_second is None:
+            requests_per_second = settings.opensearch.reindex_requests_per_second
+
+        await self._write_index()
+        legacy = await self._is_legacy_index()
+        source_indices = [self.index_name] if legacy else await self._get_alias_indices(self.index_name)
+        old_write_indices = await self._get_alias_indices(self.write_alias)
+        if not source_indices:
+            raise RuntimeError(f"读别名 '{self.index_name}' 未指向任何索引。")
+
+        if mode == "auto":
+            mode = "reindex" if await self._vectors_reusable(source_indices) else "reembed"
+
+        target = self._versioned_index_name(await self._next_index_version())
+        await self.client.indices.create(index=target, body=self._index_body())
+        await self.client.indices.put_settings(
+            index=target,
+            body={"index.refresh_interval": "-1", "index.number_of_replicas": 0}
+        )
+        log.info(f"新索引 '{target}' 已创建 (模式: {mode})，源索引: {source_indices}")
+
+        await self._move_write_alias(old_write_indices, target)
+        try:
+            if mode == "reindex":
+                result = await self._copy_with_reindex(source_indices, target, requests_per_second, slices, poll_interval)
+            else:
+                result = await self._copy_with_reembed(target, requests_per_second)
+        except Exception:
+            log.error(f"复制数据到 '{target}' 失败，写别名切回 {old_write_indices}，新索引保留以便排查。")
+            await self._move_write_alias([target], old_write_indices[0])
+            raise
+
+        # 恢复为集群默认值后刷新，再切换读别名
+        await self.client.indices.put_settings(
+            index=target,
+            body={"index.refresh_interval": None, "index.number_of_replicas": None}
+        )
+        await self.client.indices.refresh(index=target)
+
+        actions: List[Dict[str, Any]] = []
+        if legacy:
+            actions.append({"remove_index": {"index": self.index_name}})
         else:
-            log.warning(f"索引 '{self.index_name}' 已存在。")
+            actions.extend({"remove": {"index": index, "alias": self.index_name}} for index in source_indices)
+        actions.append({"add": {"index": target, "alias": self.index_name}})
+        await self.client.indices.update_aliases(body={"actions": actions})
+        log.info(f"读别名 '{self.index_name}' 已切换到 '{target}'。")
 
-    async def delete_index(self):
-        if await self.client.indices.exists(index=self.index_name):
+        if delete_old and not legacy:
+            await self.client.indices.delete(index=",".join(source_indices))
+            log.info(f"旧索引已删除: {source_indices}")
+
+        summary = {"source": source_indices, "target": target, "mode": mode, **result}
+        log.info(f"重建完成: {summary}")
+        return summary
+
+    async def _move_write_alias(self, from_indices: List[str], to_index: str):
+        actions: List[Dict[str, Any]] = [
+            {"remove": {"index": index, "alias": self.write_alias}} for index in from_indices
+        ]
+        actions.append({"add": {"index": to_index, "alias": self.write_alias, "is_write_index": True}})
+        await self.client.indices.update_aliases(body={"actions": actions})
+        log.info(f"写别名 '{self.write_alias}' 已切换到 '{to_index}'。")
+
+    async def _copy_with_reindex(
+        self,
+        source_indices: List[str],
+        target: str,
+        requests_per_second: float,
+        slices: int,
+        poll_interval: float
+    ) -> Dict[str, Any]:
+        """
+        [内部辅助] 服务端 _reindex (后台任务)，轮询直至完成。
+        """
+        body: Dict[str, Any] = {
+            "conflicts": "proceed",
+            "source": {"index": ",".join(source_indices)},
+            "dest": {"index": target, "op_type": "create"}
+        }
+        scripts: List[str] = []
+        params: Dict[str, Any] = {}
+        if settings.opensearch.filterable_metadata_keys:
+            scripts.append(METADATA_KEYWORDS_SCRIPT)
+            params["keys"] = settings.opensearch.filterable_metadata_keys
+        if DROPPED_VECTOR_FIELDS:
+            scripts.append(DROP_VECTOR_FIELDS_SCRIPT)
+            params["drop_fields"] = DROPPED_VECTOR_FIELDS
+        if scripts:
+            body["script"] = {"lang": "painless", "source": "".join(scripts), "params": params}
+        response = await self.client.reindex(
+            body=body,
+            wait_for_completion=False,
+            requests_per_second=requests_per_second,
+            slices=slices
+        )
+        task_id = response['task']
+        log.info(f"_reindex 任务已提交: {task_id}")
+
+        result = await self._wait_for_task(task_id, poll_interval, label="复制")
+        return {
+            "total": result.get('total'),
+            "created": result.get('created'),
+            "version_conflicts": result.get('version_conflicts'),
+            "failures": 0,
+        }
+
+    async def _wait_for_task(self, task_id: str, poll_interval: float, label: str) -> Dict[str, Any]:
+        """
+        [内部辅助] 轮询后台任务 (_reindex / _delete_by_query) 直至完成，返回任务的 response；
+        任务出错或存在失败条目时抛出 RuntimeError。
+        """
+        while True:
+            task = await self.client.tasks.get(task_id=task_id)
+            if task.get('completed'):
+                break
+            status = task.get('task', {}).get('status', {})
+            done = status.get('created', 0) + status.get('deleted', 0) + status.get('version_conflicts', 0)
+            log.info(f"{label}进度: {done}/{status.get('total', '?')}")
+            await asyncio.sleep(poll_interval)
+
+        if 'error' in task:
+            raise RuntimeError(f"后台任务 {task_id} 失败: {task['error']}")
+        result = task.get('response', {})
+        if result.get('failures'):
+            raise RuntimeError(f"后台任务 {task_id} 存在失败条目: {result['failures'][:5]}")
+        return result
+
+    async def _build_reembed_actions_async(self, sources: List[Dict[str, Any]], index: str) -> List[Dict[str, Any]]:
+        """
+        [内部辅助] 保留原文档的文本、分词与元数据字段，仅按当前 embedding 配置重新生成向量。
+        """
+        n = len(sources)
+        texts = [
+            source.get(text_field) or ""
+            for text_field in VECTOR_SOURCE_FIELDS.values()
+            for source in sources
+        ]
+        embeddings = await self._get_embeddings_batch_async(texts)
+
+        actions: List[Dict[str, Any]] = []
+        for i, source in enumerate(sources):
+            doc_body = dict(source)
+            doc_body["metadata_keywords"] = metadata_keywords(source.get("metadata"))
+            doc_body["collection"] = self.collection
+            for fi, field in enumerate(VECTOR_SOURCE_FIELDS):
+                doc_body[field] = embeddings[fi * n + i]
+            actions.append({
+                "_op_type": "create",
+                "_index": index,
+                "_id": source["chunk_id"],
+                "_source": doc_body
+            })
+        return actions
+
+    async def _copy_with_reembed(self, target: str, requests_per_second: float) -> Dict[str, Any]:
+        """
+        [内部辅助] 读取旧文档并重新 embedding 后写入新索引 (复用批量导入流水线)。
+        目标中已存在的文档 (重建期间的新写入) 产生的 409 冲突不计为失败。
+        """
+        scan_errors: List[Exception] = []
+
+        async def _sources() -> AsyncGenerator[Dict[str, Any], None]:
+            # 按 requests_per_second 限速读取 (消费端反压时读取也会自然放慢)
+            started = time.monotonic()
+            count = 0
             try:
-                await self.client.indices.delete(index=self.index_name)
-                log.info(f"索引 '{self.index_name}' 删除成功。")
-            except TransportError as e:
-                log.error(f"删除索引时出错: {e.status_code} {e.info}", exc_info=True)
-        else:
+                async for source in self.scan_chunks(page_size=settings.opensearch.reindex_page_size):
+                    yield source
+                    count += 1
+                    if requests_per_second > 0:
+                        delay = count / requests_per_second - (time.monotonic() - started)
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+            except Exception as e:
+                scan_errors.append(e)
+                raise
+
+        result = await self._run_bulk_pipeline(
+            _sources(),
+            lambda batch: self._build_reembed_actions_async(batch, target),
+            index=target,
+            item_id=lambda source: source["chunk_id"]
+        )
+        if scan_errors:
+            raise RuntimeError(f"读取源索引失败: {scan_errors[0]}") from scan_errors[0]
+        conflicts = sum(1 for err in result.errors if err.get("status") == 409)
+        failures = result.failed - conflicts
+        if failures:
+            raise RuntimeError(f"重新 embedding 写入存在 {failures} 个失败条目。")
+        return {
+            "total": result.success + result.failed,
+            "created": result.success,
+            "version_conflicts": conflicts,
+            "failures": 0,
+        }
+
+    # --- 批量导入会话 ---
+
+    @asynccontextmanager
+    async def bulk_load_session(
+        self,
+        collection: Optional[str] = None,
+        disable_replicas: Optional[bool] = None,
+        force_merge_segments: Optional[int] = None
+    ) -> AsyncIterator[None]:
+        """
+        批量导入会话。会话期间:
+        - 索引 refresh_interval 设为 -1 (可选 number_of_replicas 设为 0)
+        - bulk_add_documents 不再在每批后手动 refresh
+
+        会话按引用计数共享：并发的摄入任务只会在首次进入时修改设置、最后退出时收尾
+        (refresh，可选 force merge，并恢复原有索引设置)。
+        每个会话退出时都会显式 refresh 一次写入的索引，因此有其他会话进行中时，已完成的摄入也立即可检索。
+        原设置同时记录在索引 _meta 中，进程崩溃后由下次启动 (create_index / 首次写入) 恢复。
+
+        :param collection: 仅为与 SearchRepository 接口一致 (本存储只对应一个集合)
+        :param disable_replicas: 默认取 OPENSEARCH_BULK_LOAD_DISABLE_REPLICAS
+        :param force_merge_segments: 收尾时合并到的段数，默认取 OPENSEARCH_BULK_LOAD_FORCE_MERGE_SEGMENTS (None 表示不合并)
+        """
+        if disable_replicas is None:
+            disable_replicas = settings.opensearch.bulk_load_disable_replicas
+        if force_merge_segments is None:
+            force_merge_segments = settings.opensearch.bulk_load_force_merge_segments
+
+        async with self._bulk_load_lock:
+            self._bulk_load_depth += 1
+            if self._bulk_load_depth == 1:
+                await self._begin_bulk_load(disable_replicas)
+        try:
+            yield
+        finally:
+            async with self._bulk_load_lock:
+                self._bulk_load_depth -= 1
+                last = self._bulk_load_depth == 0
+                if last:
+                    await self._finish_bulk_load(force_merge_segments)
+            if not last:
+                await self._refresh_bulk_load_indices()
+
+    async def _begin_bulk_load(self, disable_replicas: bool):
+        """
+        [内部辅助] 记录当前索引设置，并关闭自动 refresh (可选关闭副本)。
+        失败时仅记录日志，会话仍然有效 (仅跳过每批 refresh)。
+        """
+        try:
+            # 记录具体索引：会话期间写别名可能被 reindex 切换，收尾时仍需恢复原索引
+            await self._write_index()
+            self._bulk_load_indices = await self._get_alias_indices(self.write_alias)
+            index = ",".join(self._bulk_load_indices)
+            response = await self.client.indices.get_settings(index=index, flat_settings=True)
+            current = next(iter(response.values()), {}).get('settings', {})
+            self._bulk_load_saved_settings = {
+                # 原本未显式设置的项恢复为 None (即集群默认值)
+                "index.refresh_interval": current.get("index.refresh_interval"),
+            }
+            new_settings: Dict[str, Any] = {"index.refresh_interval": "-1"}
+            if disable_replicas:
+                self._bulk_load_saved_settings["index.number_of_replicas"] = current.get("index.number_of_replicas")
+                new_settings["index.number_of_replicas"] = 0
+
+            await self._update_index_meta(index, {BULK_LOAD_META_KEY: self._bulk_load_saved_settings})
+            await self.client.indices.put_settings(index=index, body=new_settings)
+            log.info(f"已进入批量导入模式 (索引: {index}，设置: {new_settings})。")
+        except TransportError as e:
+            self._bulk_load_saved_settings = {}
+            log.error(f"进入批量导入模式失败: {e.status_code} {e.info}", exc_info=True)
+
+    async def _finish_bulk_load(self, force_merge_segments: Optional[int]):
+        """
+        [内部辅助] 批量导入收尾：refresh -> 可选 force merge -> 恢复索引设置。
+        force merge 在恢复副本之前执行，副本直接复制合并后的段。
+        """
+        index = ",".join(self._bulk_load_indices) or self.write_alias
+        try:
+            await self.client.indices.refresh(index=index)
+            log.info(f"批量导入收尾: 索引 {index} 已刷新。")
+
+            if force_merge_segments:
+                log.info(f"批量导入收尾: 开始 force merge (max_num_segments={force_merge_segments})...")
+                await self.client.indices.forcemerge(
+                    index=index,
+                    max_num_segments=force_merge_segments,
+                    request_timeout=3600
+                )
+        except TransportError as e:
+            log.error(f"批量导入收尾 (refresh / force merge) 失败: {e.status_code} {e.info}", exc_info=True)
+        finally:
+            if self._bulk_load_saved_settings:
+                try:
+                    await self.client.indices.put_settings(
+                        index=index,
+                        body=self._bulk_load_saved_settings
+                    )
+                    await self._update_index_meta(index, {BULK_LOAD_META_KEY: None})
+                    log.info(f"已退出批量导入模式，索引设置已恢复: {self._bulk_load_saved_settings}")
+                except TransportError as e:
+                    log.error(
+                        f"恢复索引设置失败，请手动检查 {index} 的 refresh_interval / number_of_replicas: "
+                        f"{e.status_code} {e.info}", exc_info=True
+                    )
+                self._bulk_load_saved_settings = {}
+
+    async def _refresh_bulk_load_indices(self):
+        """
+        [内部辅助] 单个会话退出 (仍有其他会话进行中) 时 refresh 写入的索引，使该次摄入立即可检索。
+        """
+        index = ",".join(self._bulk_load_indices) or self.write_alias
+        try:
+            await self.client.indices.refresh(index=index)
+        except TransportError as e:
+            log.error(f"批量导入会话退出时 refresh {index} 失败: {e.status_code} {e.info}", exc_info=True)
+
+    async def _update_index_meta(self, index: str, updates: Dict[str, Any]):
+        """
+        [内部辅助] 合并更新索引映射的 _meta (put_mapping 会整体替换 _meta)。值为 None 的键被删除。
+        """
+        response = await self.client.indices.get_mapping(index=index)
+        for name, body in response.items():
+            meta = dict(body.get("mappings", {}).get("_meta", {}))
+            for key, value in updates.items():
+                if value is None:
+                    meta.pop(key, None)
+                else:
+                    meta[key] = value
+            await self.client.indices.put_mapping(index=name, body={"_meta": meta})
+
+    async def _restore_stale_bulk_load(self):
+        """
+        [内部辅助] 恢复异常退出 (进程崩溃) 的批量导入会话遗留在写入索引上的设置:
+        _meta 中有会话记录的设置时按记录恢复，否则仅将 refresh_interval=-1 恢复为集群默认值。
+        若恰好有其他进程的会话进行中，恢复只会使其写入期间照常自动 refresh，不影响正确性。
+        """
+        indices = await self._get_alias_indices(self.write_alias)
+        if not indices:
+            return
+        try:
+            settings_response = await self.client.indices.get_settings(index=",".join(indices), flat_settings=True)
+            mapping_response = await self.client.indices.get_mapping(index=",".join(indices))
+            for name in indices:
+                saved = mapping_response.get(name, {}).get("mappings", {}).get("_meta", {}).get(BULK_LOAD_META_KEY)
+                refresh_interval = settings_response.get(name, {}).get("settings", {}).get("index.refresh_interval")
+                if saved is None and refresh_interval != "-1":
+                    continue
+                restore = saved if saved is not None else {"index.refresh_interval": None}
+                await self.client.indices.put_settings(index=name, body=restore)
+                if saved is not None:
+                    await self._update_index_meta(name, {BULK_LOAD_META_KEY: None})
+                log.warning(f"索引 {name} 残留上次批量导入会话的设置 (refresh_interval={refresh_interval})，已恢复: {restore}")
+        except TransportError as e:
+            log.error(f"检查 / 恢复批量导入遗留设置失败，请手动检查 {indices} 的 refresh_interval: {e.status_code} {e.info}", exc_info=True)
+
+    async def delete_index(self):
+        """
+        删除读别名 / 写别名指向的所有索引 (旧版部署则删除同名具体索引)。
+        """
+        indices = set(await self._get_alias_indices(self.index_name))
+        indices.update(await self._get_alias_indices(self.write_alias))
+        if not indices and await self.client.indices.exists(index=self.index_name):
+            indices.add(self.index_name)
+
+        if not indices:
             log.warning(f"索引 '{self.index_name}' 不存在，无需删除。")
+            return
+        try:
+            await self.client.indices.delete(index=",".join(sorted(indices)))
+            self._aliases_ready = False
+            log.info(f"索引 {sorted(indices)} 删除成功。")
+        except TransportError as e:
+            log.error(f"删除索引时出错: {e.status_code} {e.info}", exc_info=True)
             
     # --- 文档操作 (CRUD) ---
 
@@ -189,23 +862,19 @@ class AsyncOpenSearchRAGStore(SearchRepository):
         
         headings_str = " ".join(chunk.parent_headings)
         questions_str = " ".join(chunk.hypothetical_questions)
-        summary_str = chunk.summary or "" 
+        texts = {
+            "content": chunk.content,
+            "parent_headings_merged": headings_str,
+            "summary": chunk.summary or "",
+            "hypothetical_questions_merged": questions_str,
+        }
 
         try:
-            tasks = [
-                self._tokenize_with_jieba_async(chunk.content), 
-                self._get_embedding_async(chunk.content), 
-                self._get_embedding_async(headings_str),  
-                self._get_embedding_async(summary_str),   
-                self._get_embedding_async(questions_str)  
-            ]
-            (
-                tokenized_content,
-                emb_content,
-                emb_headings,
-                emb_summary,
-                emb_questions,
-            ) = await asyncio.gather(*tasks)
+            # 索引结构预设启用的字段合并为一次 embedding 调度，空串与重复文本由调度器处理
+            (tokenized_content,), embeddings = await asyncio.gather(
+                self._tokenize_batch_with_jieba_async([chunk.content]),
+                self._get_embeddings_batch_async([texts[text_field] for text_field in VECTOR_SOURCE_FIELDS.values()])
+            )
 
         except Exception as e:
             log.error(f"处理 chunk {chunk.chunk_id} 时 (gather) 失败: {e}", exc_info=True)
@@ -220,16 +889,16 @@ class AsyncOpenSearchRAGStore(SearchRepository):
             "parent_headings_merged": headings_str,
             "summary": chunk.summary,
             "hypothetical_questions_merged": questions_str,
-            "embedding_content": emb_content,
-            "embedding_parent_headings": emb_headings,
-            "embedding_summary": emb_summary,
-            "embedding_hypothetical_questions": emb_questions,
-            "metadata": chunk.metadata
+            **dict(zip(VECTOR_SOURCE_FIELDS, embeddings)),
+            "metadata": chunk.metadata,
+            "metadata_keywords": metadata_keywords(chunk.metadata),
+            "collection": self.collection,
+            "content_hash": chunk.content_hash
         }
         
         try:
-            await self.client.index(
-                index=self.index_name,
+            await self.write_client.index(
+                index=await self._write_index(),
                 body=doc_body,
                 id=chunk.chunk_id, 
                 refresh='wait_for' if refresh else False
@@ -252,8 +921,8 @@ class AsyncOpenSearchRAGStore(SearchRepository):
     async def delete_document(self, chunk_id: str, refresh: bool = True) -> bool:
         log.warning(f"请求删除 chunk_id: {chunk_id}")
         try:
-            await self.client.delete(
-                index=self.index_name, 
+            await self.write_client.delete(
+                index=await self._write_index(),
                 id=chunk_id,
                 refresh='wait_for' if refresh else False
             )
@@ -266,52 +935,302 @@ class AsyncOpenSearchRAGStore(SearchRepository):
             log.error(f"删除文档 {chunk_id} 时出错: {e.status_code} {e.info}", exc_info=True)
             return False
 
-    async def delete_by_document_id(self, document_id: str, refresh: bool = True) -> int:
+    async def start_document_deletion(self, document_id: str, collection: Optional[str] = None, refresh: bool = True) -> str:
+        """
+        以后台任务 (_delete_by_query, wait_for_completion=False) 删除某文档的全部文档块，立即返回任务 ID。
+        大文档的删除不再占用请求连接；任务结束时统一 refresh 一次。
+        (collection 由 CollectionRouter 用于分流，本实现只读写自身所属的集合。)
+        """
         log.warning(f"请求删除所有关联 document_id: {document_id} 的文档块...")
-        query = {
-            "query": {
-                "term": {
-                    "document_id": document_id
-                }
-            }
+        response = await self.write_client.delete_by_query(
+            index=await self._write_index(),
+            body={"query": {"term": {"document_id": document_id}}},
+            conflicts="proceed",
+            refresh=refresh,
+            slices="auto",
+            wait_for_completion=False
+        )
+        task_id = response['task']
+        log.info(f"删除任务已提交: {task_id} (document_id: {document_id})")
+        return task_id
+
+    async def get_deletion_status(self, task_id: str) -> DeletionStatus:
+        try:
+            task = await self.client.tasks.get(task_id=task_id)
+        except NotFoundError:
+            return DeletionStatus(task_id=task_id, completed=True, error="任务不存在或已过期")
+
+        if not task.get('completed'):
+            status = task.get('task', {}).get('status', {})
+            return DeletionStatus(task_id=task_id, deleted=status.get('deleted', 0), total=status.get('total'))
+
+        result = task.get('response', {})
+        error = None
+        if 'error' in task:
+            error = str(task['error'].get('reason', task['error']))
+        elif result.get('failures'):
+            error = f"{len(result['failures'])} 个文档块删除失败: {result['failures'][:3]}"
+        return DeletionStatus(
+            task_id=task_id,
+            completed=True,
+            deleted=result.get('deleted', 0),
+            total=result.get('total'),
+            error=error
+        )
+
+    async def delete_by_document_id(self, document_id: str, refresh: bool = True, poll_interval: float = 1.0) -> int:
+        """
+        删除某文档的全部文档块并等待完成 (后台任务 + 轮询，不长时间占用请求连接)，返回删除的数量。
+        """
+        try:
+            task_id = await self.start_document_deletion(document_id, refresh=refresh)
+            result = await self._wait_for_task(task_id, poll_interval, label="删除")
+        except (TransportError, RuntimeError) as e:
+            log.error(f"按 document_id ({document_id}) 删除时出错: {e}", exc_info=True)
+            return 0
+        deleted_count = result.get('deleted', 0)
+        log.info(f"成功删除 {deleted_count} 个与 document_id: {document_id} 关联的文档块。")
+        return deleted_count
+
+    async def get_chunk_hashes(
+        self,
+        document_id: str,
+        page_size: int = 1000,
+        collection: Optional[str] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        获取某文档已入库的所有块: chunk_id -> content_hash (旧数据没有该字段时为 None)。
+        使用按 chunk_id 排序的 search_after 分页，不受 max_result_window 限制。
+        (collection 由 CollectionRouter 用于分流，本实现只读写自身所属的集合。)
+        """
+        hashes: Dict[str, Optional[str]] = {}
+        body: Dict[str, Any] = {
+            "size": page_size,
+            "query": {"term": {"document_id": document_id}},
+            "_source": ["content_hash"],
+            "sort": [{"chunk_id": "asc"}]
         }
         try:
-            response = await self.client.delete_by_query(
-                index=self.index_name,
-                body=query,
-                refresh='wait_for' if refresh else False,
-                wait_for_completion=True 
-            )
-            deleted_count = response.get('deleted', 0)
-            log.info(f"成功删除 {deleted_count} 个与 document_id: {document_id} 关联的文档块。")
-            return deleted_count
+            while True:
+                response = await self.client.search(index=self.index_name, body=body)
+                hits = response['hits']['hits']
+                for hit in hits:
+                    hashes[hit['_id']] = hit.get('_source', {}).get('content_hash')
+                if len(hits) < page_size:
+                    break
+                body["search_after"] = hits[-1]['sort']
+        except NotFoundError:
+            log.warning(f"索引 '{self.index_name}' 不存在，视为文档 {document_id} 尚未入库。")
         except TransportError as e:
-            log.error(f"按 document_id ({document_id}) 删除时出错: {e.status_code} {e.info}", exc_info=True)
+            log.error(f"查询文档 {document_id} 已入库的块时出错: {e.status_code} {e.info}", exc_info=True)
+            raise
+        return hashes
+
+    async def delete_chunks(self, chunk_ids: List[str], refresh: bool = True, collection: Optional[str] = None) -> int:
+        """
+        按 chunk_id 批量删除文档块，返回实际删除的数量。
+        批量导入会话中不单独 refresh (由会话收尾统一处理)。
+        """
+        if not chunk_ids:
             return 0
 
+        refresh = refresh and self._bulk_load_depth == 0
+        index = await self._write_index()
+        deleted_count = 0
+        step = settings.opensearch.bulk_chunk_size
+        for start in range(0, len(chunk_ids), step):
+            body = [
+                {"delete": {"_index": index, "_id": chunk_id}}
+                for chunk_id in chunk_ids[start:start + step]
+            ]
+            try:
+                response = await self.write_client.bulk(body=body, refresh='wait_for' if refresh else False)
+            except TransportError as e:
+                log.error(f"批量删除文档块时出错: {e.status_code} {e.info}", exc_info=True)
+                continue
+            deleted_count += sum(
+                1 for item in response.get('items', [])
+                if item.get('delete', {}).get('result') == 'deleted'
+            )
+
+        log.info(f"已删除 {deleted_count}/{len(chunk_ids)} 个文档块。")
+        return deleted_count
+
+    # --- 全量遍历 ---
+
+    async def _open_pit(self, index: str, keep_alive: str) -> Optional[str]:
+        try:
+            response = await self.client.create_pit(index=index, keep_alive=keep_alive)
+            return response['pit_id']
+        except TransportError as e:
+            log.warning(f"创建 point-in-time 失败 ({e.status_code} {e.info})，改为直接在索引上分页 (不保证快照一致)。")
+            return None
+
+    async def _close_pit(self, pit_id: str):
+        try:
+            await self.client.delete_pit(body={"pit_id": [pit_id]})
+        except TransportError as e:
+            log.warning(f"删除 point-in-time 失败 (将在 keep_alive 到期后自动释放): {e.status_code} {e.info}")
+
+    async def scan_chunks(
+        self,
+        filters: Optional[SearchFilter] = None,
+        page_size: Optional[int] = None,
+        include_vectors: bool = False,
+        keep_alive: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        [异步生成器] 按 chunk_id 顺序流式遍历读别名下的全部 (或满足 filters 的) 文档块，逐条产出 _source。
+
+        使用 point-in-time + search_after 分页：遍历期间看到一致的快照，不受 max_result_window 限制，
+        内存中同时只保留一页。集群不支持 PIT 时退化为直接在索引上 search_after。
+
+        :param page_size: 每页文档数，默认取 OPENSEARCH_SCAN_PAGE_SIZE
+        :param include_vectors: 是否返回向量字段 (体积大，默认不返回)
+        :param keep_alive: 每页之间 PIT 的保持时间，默认取 OPENSEARCH_SCAN_KEEP_ALIVE
+        """
+        page_size = page_size or settings.opensearch.scan_page_size
+        keep_alive = keep_alive or settings.opensearch.scan_keep_alive
+        filter_clauses = self._build_filter_clauses(filters)
+
+        body: Dict[str, Any] = {
+            "size": page_size,
+            "query": {"bool": {"filter": filter_clauses}} if filter_clauses else {"match_all": {}},
+            "sort": [{"chunk_id": "asc"}]
+        }
+        if not include_vectors:
+            body["_source"] = {"excludes": ALL_VECTOR_FIELDS}
+
+        pit_id = await self._open_pit(self.index_name, keep_alive)
+        try:
+            while True:
+                if pit_id:
+                    body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                    response = await self.client.search(body=body)
+                    # PIT 续期后 id 可能变化，下一页使用最新的 id
+                    pit_id = response.get('pit_id', pit_id)
+                else:
+                    response = await self.client.search(index=self.index_name, body=body)
+
+                hits = response['hits']['hits']
+                for hit in hits:
+                    yield hit['_source']
+                if len(hits) < page_size:
+                    break
+                body["search_after"] = hits[-1]['sort']
+        finally:
+            if pit_id:
+                await self._close_pit(pit_id)
+
     # --- 高并发检索算法 ---
 
-    async def bm25_search(self, query_text: str, k: int = 5) -> List[Dict[str, Any]]:
-        tokenized_query = await self._tokenize_with_jieba_async(query_text)
-        log.debug(f"[BM25] 原始查询: '{query_text}', Jieba分词: '{tokenized_query}'")
-        
-        query = {
+    def _build_filter_clauses(self, filters: Optional[SearchFilter]) -> List[Dict[str, Any]]:
+        """
+        将 SearchFilter 转换为 filter 子句 (不参与打分，可被缓存)。
+        """
+        if filters is None or filters.is_empty():
+            return []
+
+        clauses: List[Dict[str, Any]] = []
+        if filters.document_ids:
+            clauses.append({"terms": {"document_id": filters.document_ids}})
+        if filters.document_names:
+            clauses.append({"terms": {"document_name.keyword": filters.document_names}})
+        for key, values in filters.metadata.items():
+            if not values:
+                continue
+            if key not in settings.opensearch.filterable_metadata_keys:
+                raise ValueError(
+                    f"metadata 键 '{key}' 不可过滤，请将其加入 OPENSEARCH_FILTERABLE_METADATA_KEYS 后重建索引。"
+                )
+            clauses.append({"terms": {f"metadata_keywords.{key}": values}})
+        return clauses
+
+    def _build_bm25_query(
+        self, 
+        tokenized_query: str, 
+        k: int, 
+        filter_clauses: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        query: Dict[str, Any] = {
+            "multi_match": {
+                "query": tokenized_query, 
+                "type": "best_fields",
+                "fields": [
+                    "content_tokenized^3", 
+                    "content^2",
+                    "hypothetical_questions_merged^2",
+                    "summary^1.5",
+                    "parent_headings_merged^1.5",
+                    "document_name^1.0"
+                ]
+            }
+        }
+        if filter_clauses:
+            query = {"bool": {"must": [query], "filter": filter_clauses}}
+        return {
             "size": k,
+            "_source": {"includes": RESULT_SOURCE_FIELDS},
+            "query": query
+        }
+
+    def _build_knn_query(
+        self, 
+        field_name: str, 
+        query_embedding: List[float], 
+        k: int, 
+        options: Optional[RecallPathOptions] = None,
+        filter_clauses: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        filter_clauses 作为 kNN 的 filter (faiss / lucene 引擎在图搜索过程中过滤)，
+        过滤后仍返回最多 k 个满足条件的结果，而不是先取 k 个再丢弃。
+        """
+        options = options or RecallPathOptions()
+        knn_params: Dict[str, Any] = {"vector": query_embedding}
+
+        # 径向检索 (min_score / max_distance) 与 k 近邻二选一；size 仍限制返回条数
+        if options.min_score is not None:
+            knn_params["min_score"] = options.min_score
+        elif options.max_distance is not None:
+            knn_params["max_distance"] = options.max_distance
+        else:
+            knn_params["k"] = k
+
+        if options.ef_search:
+            knn_params["method_parameters"] = {"ef_search": options.ef_search}
+
+        # 量化字段可在查询时用全精度向量对过采样的候选重打分
+        oversample_factor = (
+            options.oversample_factor
+            or settings.opensearch.get_vector_field_options(field_name).rescore_oversample_factor
+        )
+        if oversample_factor:
+            knn_params["rescore"] = {"oversample_factor": oversample_factor}
+
+        if filter_clauses:
+            knn_params["filter"] = {"bool": {"filter": filter_clauses}}
+
+        return {
+            "size": k,
+            "_source": {"includes": RESULT_SOURCE_FIELDS},
             "query": {
-                "multi_match": {
-                    "query": tokenized_query, 
-                    "type": "best_fields",
-                    "fields": [
-                        "content_tokenized^3", 
-                        "content^2",
-                        "hypothetical_questions_merged^2",
-                        "summary^1.5",
-                        "parent_headings_merged^1.5",
-                        "document_name^1.0"
-                    ]
+                "knn": {
+                    field_name: knn_params
                 }
             }
         }
+
+    async def bm25_search(
+        self, 
+        query_text: str, 
+        k: int = 5, 
+        filters: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        tokenized_query = await self._tokenize_with_jieba_async(query_text)
+        log.debug(f"[BM25] 原始查询: '{query_text}', Jieba分词: '{tokenized_query}'")
+        
+        query = self._build_bm25_query(tokenized_query, k, self._build_filter_clauses(filters))
         try:
             response = await self.client.search(
                 index=self.index_name,
@@ -322,18 +1241,15 @@ class AsyncOpenSearchRAGStore(SearchRepository):
             log.error(f"BM25 (multi_match) 检索时出错: {e.status_code} {e.info}", exc_info=True)
             return []
 
-    async def _base_vector_search(self, field_name: str, query_embedding: List[float], k: int) -> List[Dict[str, Any]]:
-        query = {
-            "size": k,
-            "query": {
-                "knn": {
-                    field_name: {
-                        "vector": query_embedding,
-                        "k": k
-                    }
-                }
-            }
-        }
+    async def _base_vector_search(
+        self, 
+        field_name: str, 
+        query_embedding: List[float], 
+        k: int, 
+        options: Optional[RecallPathOptions] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        query = self._build_knn_query(field_name, query_embedding, k, options, self._build_filter_clauses(filters))
         try:
             response = await self.client.search(
                 index=self.index_name,
@@ -344,163 +1260,422 @@ class AsyncOpenSearchRAGStore(SearchRepository):
             log.error(f"向量检索字段 '{field_name}' 时出错: {e.status_code} {e.info}", exc_info=False) 
             return []
 
-    def _rrf_fuse(self, 
-                  results_lists: List[List[Dict[str, Any]]], 
-                  k_constant: int = 60) -> List[Tuple[str, float]]:
+    async def _msearch(self, bodies: List[Dict[str, Any]], labels: List[str]) -> List[List[Dict[str, Any]]]:
         """
-        使用 RRF 融合多路召回结果。
+        [内部辅助] 通过一次 _msearch 请求执行多个检索，按顺序返回各自的 hits。
         
-        返回值从 List[str] 改为 List[Tuple[str, float]]。
-        返回 (doc_id, rrf_score) 的列表，以便保留分数信息。
+        单个子检索失败时只将该路结果置为空列表，其余路径照常使用；
+        整个请求失败时所有路径均返回空列表。
         """
-        fused_scores: Dict[str, float] = {}
-        
-        for results in results_lists:
-            for rank, doc in enumerate(results, 1):
-                doc_id = doc['_id'] 
-                # RRF 公式: 1 / (k + rank)
-                rrf_score = 1.0 / (k_constant + rank)
-                
-                if doc_id not in fused_scores:
-                    fused_scores[doc_id] = 0.0
-                fused_scores[doc_id] += rrf_score
-        
-        # 按分数降序排序
-        sorted_docs = sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs
+        if not bodies:
+            return []
 
-    async def hybrid_search(
+        payload: List[Dict[str, Any]] = []
+        for body in bodies:
+            payload.append({"index": self.index_name})
+            payload.append(body)
+
+        try:
+            response = await self.client.msearch(body=payload)
+        except TransportError as e:
+            log.error(f"_msearch 请求出错: {e.status_code} {e.info}", exc_info=True)
+            return [[] for _ in bodies]
+
+        results: List[List[Dict[str, Any]]] = []
+        for label, sub_response in zip(labels, response.get('responses', [])):
+            if 'error' in sub_response:
+                log.error(f"_msearch 子检索 '{label}' 出错: {sub_response.get('status')} {sub_response['error']}")
+                results.append([])
+            else:
+                results.append(sub_response['hits']['hits'])
+
+        # 防御：响应条数与请求不一致时补齐
+        results.extend([] for _ in range(len(bodies) - len(results)))
+        return results
+
+    def _resolve_path_options(
+        self, 
+        path_options: Optional[Dict[str, RecallPathOptions]] = None
+    ) -> Dict[str, RecallPathOptions]:
+        """
+        [内部辅助] 计算每一路召回最终生效的查询参数 (配置 + 调用时覆盖)。
+        """
+        path_options = path_options or {}
+        return {
+            path_name: settings.opensearch.get_recall_path_options(path_name, path_options.get(path_name))
+            for path_name in RECALL_PATHS
+        }
+
+    def _build_recall_bodies(
+        self, 
+        tokenized_query: str, 
+        query_embedding: Optional[List[float]], 
+        candidate_k: int,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        path_weights: Optional[List[float]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        [内部辅助] 构建单个查询的多路召回请求体: [bm25, *VECTOR_FIELDS]。
+        每路的候选数默认为 candidate_k，可被 path_options 中的 k 覆盖。
+        无法获取 query embedding 或被路径策略跳过 (权重为 0) 的路径为 None。
+        filters 同时作用于每一路 (BM25 的 bool filter 与 kNN 的 filter)。
+        """
+        resolved = self._resolve_path_options(path_options)
+        filter_clauses = self._build_filter_clauses(filters)
+        path_weights = path_weights or [1.0 for _ in RECALL_PATHS]
+
+        bodies: List[Optional[Dict[str, Any]]] = []
+        for path_name, weight in zip(RECALL_PATHS, path_weights):
+            options = resolved[path_name]
+            if weight <= 0:
+                bodies.append(None)
+            elif path_name == "bm25":
+                bodies.append(self._build_bm25_query(tokenized_query, options.k or candidate_k, filter_clauses))
+            elif query_embedding is not None:
+                bodies.append(self._build_knn_query(
+                    path_name, query_embedding, options.k or candidate_k, options, filter_clauses
+                ))
+            else:
+                bodies.append(None)
+        return bodies
+
+    async def _recall_batch_msearch(
+        self, 
+        queries: List[str], 
+        candidate_k: int,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        path_weights: Optional[List[float]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> Tuple[List[List[List[Dict[str, Any]]]], List[List[bool]]]:
+        """
+        [内部辅助] 批量召回：所有查询一次 embedding 调用，所有 (查询 × 召回路径) 一次 _msearch 往返。
+        返回 (results, executed)：results[查询下标][路径下标]，路径顺序为 [bm25, *VECTOR_FIELDS]；
+        executed 标记各路是否实际发送了请求 (被跳过或缺少查询向量的路为 False)。
+        """
+        tokenized_queries, query_embeddings = await asyncio.gather(
+            asyncio.gather(*[self._tokenize_with_jieba_async(q) for q in queries]),
+            self._get_query_embeddings_batch_async(queries)
+        )
+
+        bodies: List[Dict[str, Any]] = []
+        labels: List[str] = []
+        slots: List[Tuple[int, int]] = []
+        for qi, (query_text, tokenized_query, query_embedding) in enumerate(
+            zip(queries, tokenized_queries, query_embeddings)
+        ):
+            log.debug(f"[BM25] 原始查询: '{query_text}', Jieba分词: '{tokenized_query}'")
+            if query_embedding is None:
+                # 降级策略：无法获取 query embedding 时仅使用 BM25
+                log.warning(f"未能获取查询 '{query_text}' 的 embedding，仅执行 BM25 召回。")
+
+            path_bodies = self._build_recall_bodies(
+                tokenized_query, query_embedding, candidate_k, path_options, path_weights, filters
+            )
+            for pi, (label, body) in enumerate(zip(RECALL_PATHS, path_bodies)):
+                if body is None:
+                    continue
+                bodies.append(body)
+                labels.append(f"{label}#{qi}")
+                slots.append((qi, pi))
+
+        responses = await self._msearch(bodies, labels)
+
+        results = [[[] for _ in RECALL_PATHS] for _ in queries]
+        executed = [[False for _ in RECALL_PATHS] for _ in queries]
+        for (qi, pi), hits in zip(slots, responses):
+            results[qi][pi] = hits
+            executed[qi][pi] = True
+        return results, executed
+
+    async def _recall_separately(
         self, 
         query_text: str, 
-        k: int = 5, 
-        rrf_k: int = 60
-    ) -> List[RetrievedChunk]: # [修改] 返回类型变更
+        candidate_k: int,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        path_weights: Optional[List[float]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> Tuple[List[List[Dict[str, Any]]], List[bool]]:
         """
-        [异步] 高并发混合搜索 (BM25 + 4路向量)。
-        返回标准的 RetrievedChunk 列表。
+        [内部辅助] 逐路发送 search 请求的召回方式 (OPENSEARCH_USE_MSEARCH=False)。
+        被路径策略跳过 (权重为 0) 的路径不发送请求，结果为空列表。
+        返回 (各路结果, 各路是否实际执行)。
         """
-        log.info(f"--- 开始 *异步* 混合搜索 (5路召回) (查询: '{query_text}') ---")
+        resolved = self._resolve_path_options(path_options)
+        enabled = dict(zip(RECALL_PATHS, [w > 0 for w in (path_weights or [1.0 for _ in RECALL_PATHS])]))
 
-        if not query_text or not query_text.strip():
+        async def _skipped() -> List[Dict[str, Any]]:
             return []
-        
+
         # 1. 并发获取 query embedding 和 BM25 结果
-        try:
-            (query_embedding, bm25_results) = await asyncio.gather(
-                self._get_embedding_async(query_text),
-                self.bm25_search(query_text, k=k*2) 
-            )
-        except Exception as e:
-            log.error(f"混合搜索第一阶段失败: {e}", exc_info=True)
-            return []
+        (query_embedding, bm25_results) = await asyncio.gather(
+            self._get_embedding_async(query_text),
+            self.bm25_search(query_text, k=resolved["bm25"].k or candidate_k, filters=filters)
+            if enabled["bm25"] else _skipped()
+        )
 
         # 2. 并发执行向量搜索
         vector_tasks = [
-            self._base_vector_search("embedding_content", query_embedding, k=k*2),
-            self._base_vector_search("embedding_parent_headings", query_embedding, k=k*2),
-            self._base_vector_search("embedding_summary", query_embedding, k=k*2),
-            self._base_vector_search("embedding_hypothetical_questions", query_embedding, k=k*2)
+            self._base_vector_search(
+                field_name, query_embedding, 
+                k=resolved[field_name].k or candidate_k, 
+                options=resolved[field_name],
+                filters=filters
+            ) if enabled[field_name] else _skipped()
+            for field_name in VECTOR_FIELDS
         ]
         
+        vector_executed = [enabled[field_name] and query_embedding is not None for field_name in VECTOR_FIELDS]
         try:
-            (
-                vec_content_results, vec_headings_results, 
-                vec_summary_results, vec_questions_results
-            ) = await asyncio.gather(*vector_tasks)
+            vector_results = await asyncio.gather(*vector_tasks)
         except Exception as e:
             log.error(f"混合搜索第二阶段失败: {e}", exc_info=True)
             # 降级策略：如果向量搜索失败，仅使用 BM25
-            vec_content_results, vec_headings_results, vec_summary_results, vec_questions_results = [], [], [], []
+            vector_results = [[] for _ in VECTOR_FIELDS]
+            vector_executed = [False for _ in VECTOR_FIELDS]
 
-        # 3. RRF 融合 (获取 ID 和 RRF 分数)
-        all_results_lists = [
-            bm25_results, vec_content_results, vec_headings_results, 
-            vec_summary_results, vec_questions_results
-        ]
-        
-        # 获取 [(id, score), ...]
-        fused_results_with_score = self._rrf_fuse(all_results_lists, k_constant=rrf_k)
-        
-        # 截取 Top K
-        top_k_results = fused_results_with_score[:k]
-        
-        if not top_k_results:
-            log.warning("混合搜索未找到任何结果。")
+        return [bm25_results, *vector_results], [enabled["bm25"], *vector_executed]
+
+    def _rrf_fuse(self, 
+                  results_lists: List[List[Dict[str, Any]]], 
+                  k_constant: int = 60,
+                  weights: Optional[List[float]] = None) -> List[Tuple[str, float]]:
+        """
+        使用 (加权) RRF 融合多路召回结果，返回 (doc_id, rrf_score) 的列表。
+        """
+        return rrf_fuse(results_lists, k_constant, weights)
+
+    async def hybrid_search(
+        self, 
+        query_text: str, 
+        k: int = 5, 
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[RetrievedChunk]: # [修改] 返回类型变更
+        """
+        [异步] 高并发混合搜索 (BM25 + 4路向量)。
+        返回标准的 RetrievedChunk 列表。
+
+        :param fusion_mode: 'client' (客户端 RRF) 或 'server' (hybrid 查询 + search pipeline)，
+                            默认取 OPENSEARCH_FUSION_MODE，便于两种方式对比。
+        :param path_options: 按路径 (bm25 / embedding_*) 覆盖查询参数 (k、ef_search、
+                             oversample_factor、min_score / max_distance)，未指定的沿用配置。
+        :param filters: 限定文档 / 元数据范围，作为每一路召回的前置过滤条件。
+        """
+        log.info(f"--- 开始 *异步* 混合搜索 (5路召回) (查询: '{query_text}') ---")
+
+        if not query_text or not query_text.strip():
             return []
 
-        top_k_ids = [item[0] for item in top_k_results]
-        # 创建一个 id -> score 的映射，方便后续组装
-        score_map = {item[0]: item[1] for item in top_k_results}
+        # 提前校验过滤条件：不可过滤的 metadata 键直接报错，而不是被召回阶段的异常处理吞掉
+        self._build_filter_clauses(filters)
 
-        log.debug(f"RRF 融合后 Top-{k} ID: {top_k_ids}")
+        # 由路径策略决定本次各路的权重 (0 表示跳过)
+        path_weights = self.path_policy.select()
+        server_fusion = (fusion_mode or settings.opensearch.fusion_mode) == "server"
+        if server_fusion and self.path_policy.needs_observation():
+            # 服务端融合不返回各路结果: 需要贡献观测时改用客户端融合并执行全部路径
+            server_fusion = False
+            path_weights = [1.0 for _ in RECALL_PATHS]
+
+        if server_fusion:
+            server_results = await self._hybrid_search_server_batch(
+                [query_text], k=k, rrf_k=rrf_k, path_options=path_options, path_weights=path_weights,
+                filters=filters
+            )
+            if server_results is not None:
+                (retrieved_chunks,) = server_results
+                log.info(f"--- 混合搜索 (服务端融合) 成功，返回 {len(retrieved_chunks)} 个 RetrievedChunk ---")
+                return retrieved_chunks
         
-        # 4. 异步 mget 批量获取文档详情 (fetching full document content)
+        # 1 & 2. 多路召回 (BM25 + 各路向量)，默认通过一次 _msearch 往返完成
         try:
-            response = await self.client.mget(
-                index=self.index_name,
-                body={"ids": top_k_ids}
-            )
-            
-            # 5. 组装为 RetrievedChunk 对象列表
-            retrieved_chunks = []
-            
-            # 创建临时字典以按 ID 查找 mget 结果
-            docs_map = {doc['_id']: doc['_source'] for doc in response['docs'] if doc.get('found', False)}
-            
-            # 按照 RRF 排序的顺序构建结果
-            for doc_id in top_k_ids:
-                if doc_id in docs_map:
-                    source = docs_map[doc_id]
-                    score = score_map[doc_id]
-                    
-                    # 转换并添加
-                    ret_chunk = self._convert_to_retrieved_chunk(source, score)
-                    retrieved_chunks.append(ret_chunk)
-            
-            log.info(f"--- 混合搜索成功，返回 {len(retrieved_chunks)} 个 RetrievedChunk ---")
-            return retrieved_chunks
-            
-        except TransportError as e:
-            log.error(f"混合搜索 (mget) 时出错: {e.status_code} {e.info}", exc_info=True)
+            if settings.opensearch.use_msearch:
+                (all_results_lists,), (executed,) = await self._recall_batch_msearch(
+                    [query_text], candidate_k=k*2, path_options=path_options, path_weights=path_weights,
+                    filters=filters
+                )
+            else:
+                all_results_lists, executed = await self._recall_separately(
+                    query_text, candidate_k=k*2, path_options=path_options, path_weights=path_weights,
+                    filters=filters
+                )
+        except Exception as e:
+            log.error(f"混合搜索召回阶段失败: {e}", exc_info=True)
             return []
 
-    # --- 批量操作 ---
+        # 3 & 4. RRF 融合，并直接由命中结果的 _source 组装
+        (retrieved_chunks,) = self._fuse_results(
+            [all_results_lists], k=k, rrf_k=rrf_k, path_weights=path_weights, executed=[executed]
+        )
+        log.info(f"--- 混合搜索成功，返回 {len(retrieved_chunks)} 个 RetrievedChunk ---")
+        return retrieved_chunks
 
-    async def _generate_bulk_actions_async(
-        self, 
-        documents: List[DocumentChunk]
-    ) -> AsyncGenerator[Dict[str, Any], None]:
-        
-        all_content = [doc.content for doc in documents]
-        all_headings = [" ".join(doc.parent_headings) for doc in documents]
-        all_summaries = [doc.summary or "" for doc in documents]
-        all_questions = [" ".join(doc.hypothetical_questions) for doc in documents]
+    def _build_hybrid_query(
+        self,
+        tokenized_query: str,
+        query_embedding: Optional[List[float]],
+        k: int,
+        candidate_k: int,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        path_weights: Optional[List[float]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        [内部辅助] 构建服务端融合使用的 hybrid 复合查询，子查询与客户端多路召回一致。
+        服务端 RRF 不支持按子查询加权，路径策略在此仅用于跳过子查询。
+        所有子查询均被跳过时 (例如分词为空且查询向量获取失败) 返回 None，
+        OpenSearch 不接受空的 hybrid 查询。
+        """
+        path_bodies = self._build_recall_bodies(
+            tokenized_query, query_embedding, candidate_k, path_options, path_weights, filters
+        )
+        sub_queries = [body["query"] for body in path_bodies if body is not None]
+        if not sub_queries:
+            return None
+        return {
+            "size": k,
+            "_source": {"includes": RESULT_SOURCE_FIELDS},
+            "query": {
+                "hybrid": {
+                    "queries": sub_queries
+                }
+            }
+        }
 
-        log.info(f"批量处理 {len(documents)} 个文档：开始并发执行 Embedding (4批) 和 Jieba (1批)...")
+    async def _hybrid_search_server_batch(
+        self,
+        queries: List[str],
+        k: int,
+        rrf_k: int,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        path_weights: Optional[List[float]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> Optional[List[List[RetrievedChunk]]]:
+        """
+        [内部辅助] 服务端融合：每个查询发送一个 hybrid 查询，由 search pipeline 完成 RRF，
+        OpenSearch 直接返回融合后的 Top K。
+        search pipeline 不可用、任一查询没有可用的子查询或任一 hybrid 查询失败时返回 None，
+        调用方回退到客户端融合。
+        """
+        pipeline = await self._ensure_search_pipeline(rrf_k)
+        if pipeline is None:
+            log.warning("服务端融合不可用，回退到客户端 RRF 融合。")
+            return None
 
-        try:
-            tasks = [
-                self._get_embeddings_batch_async(all_content),
-                self._get_embeddings_batch_async(all_headings),
-                self._get_embeddings_batch_async(all_summaries),
-                self._get_embeddings_batch_async(all_questions),
-                asyncio.gather(*[self._tokenize_with_jieba_async(content) for content in all_content])
+        tokenized_queries, query_embeddings = await asyncio.gather(
+            asyncio.gather(*[self._tokenize_with_jieba_async(q) for q in queries]),
+            self._get_query_embeddings_batch_async(queries)
+        )
+
+        async def _search(query_text: str, body: Dict[str, Any]) -> Optional[List[RetrievedChunk]]:
+            try:
+                response = await self.client.search(
+                    index=self.index_name,
+                    body=body,
+                    search_pipeline=pipeline
+                )
+            except TransportError as e:
+                log.error(f"hybrid 查询 '{query_text}' 出错: {e.status_code} {e.info}", exc_info=True)
+                return None
+            return [
+                self._convert_to_retrieved_chunk(hit['_source'], hit['_score'])
+                for hit in response['hits']['hits']
             ]
-            
-            (
-                all_emb_content,
-                all_emb_headings,
-                all_emb_summaries,
-                all_emb_questions,
-                all_tokenized_content
-            ) = await asyncio.gather(*tasks)
 
-        except Exception as e:
-            log.error(f"批量处理 (gather) 失败: {e}", exc_info=True)
-            raise 
+        bodies = [
+            self._build_hybrid_query(
+                t, e, k=k, candidate_k=k*2, path_options=path_options, path_weights=path_weights,
+                filters=filters
+            )
+            for t, e in zip(tokenized_queries, query_embeddings)
+        ]
+        if any(body is None for body in bodies):
+            log.warning("存在没有可用子查询的查询，本批查询回退到客户端 RRF 融合。")
+            return None
+
+        results = await asyncio.gather(*[_search(q, body) for q, body in zip(queries, bodies)])
+        if any(result is None for result in results):
+            log.warning("服务端融合查询失败，本批查询回退到客户端 RRF 融合。")
+            return None
+        return results
+
+    def _fuse_results(
+        self,
+        per_query_results: List[List[List[Dict[str, Any]]]],
+        k: int,
+        rrf_k: int,
+        path_weights: Optional[List[float]] = None,
+        executed: Optional[List[List[bool]]] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        [内部辅助] 对每个查询的多路召回结果分别做 (加权) RRF 融合并截取 Top K，
+        直接使用命中结果中已过滤的 _source 组装 RetrievedChunk (无需再 mget)。
+        同时将各路对 Top K 的贡献记录到路径策略中 (只记录 executed 中实际执行的路)。
+        """
+        all_chunks: List[List[RetrievedChunk]] = []
+        path_weights = path_weights or [1.0 for _ in RECALL_PATHS]
+        executed = executed or [None for _ in per_query_results]
+
+        for all_results_lists, query_executed in zip(per_query_results, executed):
+            # 3. RRF 融合 (获取 [(id, score), ...])，截取 Top K
+            fused_results_with_score = self._rrf_fuse(all_results_lists, k_constant=rrf_k, weights=path_weights)
+            top_k_results = fused_results_with_score[:k]
+            self.path_policy.record(
+                all_results_lists, [doc_id for doc_id, _ in top_k_results], path_weights, query_executed
+            )
 
-        log.info("Embedding 和 Jieba 处理完毕，开始 yield...")
+            # 同一文档在各路结果中的 _source 相同，取首次出现的即可
+            sources: Dict[str, Dict[str, Any]] = {}
+            for results in all_results_lists:
+                for hit in results:
+                    if '_source' in hit:
+                        sources.setdefault(hit['_id'], hit['_source'])
 
+            log.debug(f"RRF 融合后 Top-{k} ID: {[doc_id for doc_id, _ in top_k_results]}")
+
+            # 4. 按照 RRF 排序的顺序组装为 RetrievedChunk 对象列表
+            all_chunks.append([
+                self._convert_to_retrieved_chunk(sources[doc_id], score)
+                for doc_id, score in top_k_results
+                if doc_id in sources
+            ])
+
+        if not any(all_chunks):
+            log.warning("混合搜索未找到任何结果。")
+        return all_chunks
+
+    # --- 批量操作 ---
+
+    async def _build_bulk_actions_async(self, documents: List[DocumentChunk], index: str) -> List[Dict[str, Any]]:
+        """
+        [内部辅助] 为一个子批次生成 bulk actions：索引结构预设启用的各路字段的 embedding 合并为一次调度，
+        与该批的 Jieba 分词 (进程池) 并发执行。
+        """
+        texts = {
+            "content": [doc.content for doc in documents],
+            "parent_headings_merged": [" ".join(doc.parent_headings) for doc in documents],
+            "summary": [doc.summary or "" for doc in documents],
+            "hypothetical_questions_merged": [" ".join(doc.hypothetical_questions) for doc in documents],
+        }
+
+        log.debug(
+            f"子批次 {len(documents)} 个文档：开始并发执行 Embedding ({len(VECTOR_SOURCE_FIELDS)} 路合并调度) "
+            f"和 Jieba (进程池批量分词)..."
+        )
+
+        n = len(documents)
+        # 各路字段流合并为一次调度：批内去重 + 按 token 打包 + 限流并发
+        all_embeddings, all_tokenized_content = await asyncio.gather(
+            self._get_embeddings_batch_async(
+                [text for text_field in VECTOR_SOURCE_FIELDS.values() for text in texts[text_field]]
+            ),
+            self._tokenize_batch_with_jieba_async(texts["content"])
+        )
+
+        actions: List[Dict[str, Any]] = []
         for i, doc in enumerate(documents):
             
             doc_body = {
@@ -509,63 +1684,225 @@ class AsyncOpenSearchRAGStore(SearchRepository):
                 "document_name": doc.document_name,
                 "content": doc.content,
                 "content_tokenized": all_tokenized_content[i],
-                "parent_headings_merged": all_headings[i], 
+                "parent_headings_merged": texts["parent_headings_merged"][i],
                 "summary": doc.summary,
-                "hypothetical_questions_merged": all_questions[i], 
-                "embedding_content": all_emb_content[i],
-                "embedding_parent_headings": all_emb_headings[i],
-                "embedding_summary": all_emb_summaries[i],
-                "embedding_hypothetical_questions": all_emb_questions[i],
-                "metadata": doc.metadata
+                "hypothetical_questions_merged": texts["hypothetical_questions_merged"][i],
+                **{field: all_embeddings[fi * n + i] for fi, field in enumerate(VECTOR_SOURCE_FIELDS)},
+                "metadata": doc.metadata,
+                "metadata_keywords": metadata_keywords(doc.metadata),
+                "collection": self.collection,
+                "content_hash": doc.content_hash
             }
             
-            action = {
+            actions.append({
                 "_op_type": "index",
-                "_index": self.index_name,
+                "_index": index,
                 "_id": doc.chunk_id, 
                 "_source": doc_body
-            }
-            
-            yield action 
+            })
+        return actions
 
-    async def bulk_add_documents(self, documents: List[DocumentChunk]):
+    async def bulk_add_documents(self, documents: List[DocumentChunk]) -> BulkIndexResult:
+        """
+        批量导入文档块 (流水线实现见 bulk_add_documents_stream)。
+        :return: 写入结果 (成功 / 永久失败 / 重试次数)。
+        """
         if not documents:
             log.warning("没有要添加的文档。")
-            return
+            return BulkIndexResult()
+
+        async def _iter_documents() -> AsyncGenerator[DocumentChunk, None]:
+            for doc in documents:
+                yield doc
+
+        return await self.bulk_add_documents_stream(_iter_documents())
+
+    async def bulk_add_documents_stream(
+        self, 
+        documents: AsyncIterable[DocumentChunk], 
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        [异步] 流水线式批量导入。三个阶段通过有界队列并发执行，整体速度由最慢的阶段决定:
+
+        1. 分批: 从输入流按 batch_size (默认 OPENSEARCH_BULK_PIPELINE_BATCH_SIZE) 切分子批次；
+           同时准备中的子批次数不超过 OPENSEARCH_BULK_MAX_INFLIGHT_BATCHES (反压到上游)。
+        2. 准备: 每个子批次并发执行 embedding 与 Jieba 分词，生成的 actions 放入有界队列
+           (容量 OPENSEARCH_BULK_QUEUE_SIZE)。
+        3. 写入: OPENSEARCH_BULK_CONCURRENCY 个 BulkWriter 从队列取 actions 发送，
+           请求大小由 AIMD 控制器按延迟与拒绝情况调整，被拒绝 (429) 的条目退避后重试。
+
+        因此第 N 批在写入时，第 N+1 批的 embedding 已经在进行。
+        :return: 写入结果；只有永久失败的块计入 failed。
+        """
+        index = await self._write_index()
+        return await self._run_bulk_pipeline(
+            documents,
+            lambda batch: self._build_bulk_actions_async(batch, index),
+            index=index,
+            item_id=lambda doc: doc.chunk_id,
+            batch_size=batch_size
+        )
+
+    async def _build_source_actions_async(self, sources: List[Dict[str, Any]], index: str) -> List[Dict[str, Any]]:
+        """
+        [内部辅助] 直接使用 _source 中已有的向量生成 bulk actions (不调用 embedding)。
+        缺少 content_tokenized 时补做 Jieba 分词；metadata_keywords 按当前配置重新生成；
+        当前索引结构预设未启用的向量字段被剔除。
+        """
+        missing = [i for i, source in enumerate(sources) if "content_tokenized" not in source]
+        tokenized = await self._tokenize_batch_with_jieba_async([sources[i].get("content") or "" for i in missing])
+        tokenized_map = dict(zip(missing, tokenized))
+
+        actions: List[Dict[str, Any]] = []
+        for i, source in enumerate(sources):
+            doc_body = {
+                key: value for key, value in source.items()
+                if not (key in ALL_VECTOR_FIELDS and (value is None or key not in VECTOR_FIELDS))
+            }
+            if i in tokenized_map:
+                doc_body["content_tokenized"] = tokenized_map[i]
+            doc_body["metadata_keywords"] = metadata_keywords(source.get("metadata"))
+            doc_body["collection"] = self.collection
+            actions.append({
+                "_op_type": "index",
+                "_index": index,
+                "_id": source["chunk_id"],
+                "_source": doc_body
+            })
+        return actions
+
+    async def bulk_add_sources(
+        self,
+        sources: AsyncIterable[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        [异步] 通过批量导入流水线写入已包含向量的 _source (快照恢复)，跳过 embedding 阶段。
+        """
+        index = await self._write_index()
+        return await self._run_bulk_pipeline(
+            sources,
+            lambda batch: self._build_source_actions_async(batch, index),
+            index=index,
+            item_id=lambda source: source["chunk_id"],
+            batch_size=batch_size
+        )
+
+    async def _run_bulk_pipeline(
+        self,
+        items: AsyncIterable[Any],
+        build_actions: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]],
+        index: str,
+        item_id: Callable[[Any], str],
+        batch_size: Optional[int] = None
+    ) -> BulkIndexResult:
+        """
+        [内部辅助] 分批 -> 准备 actions -> 写入 的流水线 (bulk_add_documents_stream 与 reindex 共用)。
+        :param build_actions: 将一个子批次转换为 bulk actions
+        :param index: 写入完成后 refresh 的目标
+        :param item_id: 准备失败时用于记录错误的条目 ID
+        """
+        config = settings.opensearch
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=config.bulk_queue_size)
+        inflight = asyncio.Semaphore(config.bulk_max_inflight_batches)
+        num_consumers = max(1, config.bulk_concurrency)
+        batch_size = batch_size or config.bulk_pipeline_batch_size
+
+        result = BulkIndexResult()
+
+        log.info(f"--- 开始 *异步* 流水线批量导入 (写入并发: {num_consumers}) ---")
+
+        async def _prepare(batch: List[Any]):
+            try:
+                actions = await build_actions(batch)
+                for action in actions:
+                    await queue.put(action)
+            except Exception as e:
+                result.failed += len(batch)
+                result.errors.extend({"_id": item_id(item), "error": str(e)} for item in batch)
+                log.error(f"子批次 ({len(batch)} 个文档) 生成 embedding / 分词失败: {e}", exc_info=True)
+            finally:
+                inflight.release()
+
+        async def _produce():
+            tasks: List[asyncio.Task] = []
+            batch: List[Any] = []
+
+            async def _submit(batch: List[Any]):
+                await inflight.acquire()
+                tasks.append(asyncio.create_task(_prepare(batch)))
+
+            try:
+                async for item in items:
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        await _submit(batch)
+                        batch = []
+                if batch:
+                    await _submit(batch)
+            finally:
+                await asyncio.gather(*tasks)
+                # 每个消费者一个结束标记
+                for _ in range(num_consumers):
+                    await queue.put(None)
+
+        async def _consume() -> BulkIndexResult:
+            writer = BulkWriter(
+                self.write_client,
+                self.bulk_sizer,
+                max_chunk_bytes=config.bulk_max_chunk_bytes,
+                max_retries=config.bulk_max_retries,
+                initial_backoff=config.bulk_initial_backoff,
+                max_backoff=config.bulk_max_backoff
+            )
+            try:
+                return await writer.write_from_queue(queue)
+            except Exception as e:
+                log.error(f"批量写入消费者异常退出: {e}", exc_info=True)
+                # 继续取空队列，避免生产者因队列已满而阻塞
+                drained = BulkIndexResult()
+                while (action := await queue.get()) is not None:
+                    drained.failed += 1
+                    drained.errors.append({"_id": action["_id"], "error": str(e)})
+                return drained
 
-        log.info(f"--- 开始 *异步* 批量导入 {len(documents)} 个文档 ---")
-        
         try:
-            actions_generator = self._generate_bulk_actions_async(documents)
-            
-            log.info("使用 'helpers.async_bulk' 开始导入...")
-            
-            success_count, errors = await async_bulk(
-                self.client, 
-                actions_generator, 
-                # 修改点：从 settings.opensearch 读取
-                chunk_size=settings.opensearch.bulk_chunk_size, 
-                max_chunk_bytes=10 * 1024 * 1024, # 关键：限制单次请求最大为 10MB
-                raise_on_error=False,          # 建议设为 False，避免单个失败炸掉整个流程
-                max_retries=3
+            producer_result, *consumer_results = await asyncio.gather(
+                _produce(), *[_consume() for _ in range(num_consumers)],
+                return_exceptions=True
             )
+            if isinstance(producer_result, Exception):
+                log.error(f"读取待导入文档流时发生错误: {producer_result}", exc_info=producer_result)
+            for consumer_result in consumer_results:
+                if isinstance(consumer_result, BulkIndexResult):
+                    result = result.merge(consumer_result)
 
-            log.info(f"批量导入完成。成功: {success_count}, 失败: {len(errors)}")
-            if errors:
+            log.info(
+                f"批量导入完成。成功: {result.success}, 失败: {result.failed}, 重试: {result.retried} "
+                f"(当前 bulk 大小: {self.bulk_sizer.size})"
+            )
+            if result.errors:
                 log.error("--- 批量导入错误示例 (最多显示5条) ---")
-                for i, err in enumerate(errors[:5]):
-                    log.error(json.dumps(err, indent=2, ensure_ascii=False))
+                for i, err in enumerate(result.errors[:5]):
+                    log.error(json.dumps(err, indent=2, ensure_ascii=False, default=str))
 
         except Exception as e:
             log.error(f"批量导入过程中发生严重错误: {e}", exc_info=True)
         
         finally:
-            log.info("正在执行手动刷新 (refresh)...")
-            try:
-                await self.client.indices.refresh(index=self.index_name)
-                log.info("--- 批量导入流程结束 (已刷新) ---")
-            except TransportError as e:
-                log.error(f"刷新索引 {self.index_name} 失败: {e.status_code} {e.info}", exc_info=True)
+            # 批量导入会话中由会话收尾时统一 refresh
+            if self._bulk_load_depth > 0:
+                log.info("--- 批量导入流程结束 (批量导入模式，跳过 refresh) ---")
+            else:
+                log.info("正在执行手动刷新 (refresh)...")
+                try:
+                    await self.write_client.indices.refresh(index=index)
+                    log.info("--- 批量导入流程结束 (已刷新) ---")
+                except TransportError as e:
+                    log.error(f"刷新索引 {index} 失败: {e.status_code} {e.info}", exc_info=True)
+
+        return result
 
     # --- 异步批量查询 ---
 
@@ -573,27 +1910,93 @@ class AsyncOpenSearchRAGStore(SearchRepository):
         self, 
         queries: List[str], 
         k: int = 5, 
-        rrf_k: int = 60
-    ) -> List[List[Dict[str, Any]]]:
+        rrf_k: int = 60,
+        fusion_mode: Optional[str] = None,
+        path_options: Optional[Dict[str, RecallPathOptions]] = None,
+        filters: Optional[SearchFilter] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        [异步] 批量混合搜索。
+        所有查询共用一次 embedding 调用和一次 _msearch (查询 × 召回路径)，
+        请求次数不随查询数量线性增长。返回值与 queries 一一对应。
+        filters 作用于所有查询。
+        """
         if not queries:
             return []
             
         log.info(f"--- 开始 *异步* 批量混合搜索 (共 {len(queries)} 个查询) ---")
-        
-        tasks = [
-            self.hybrid_search(query, k=k, rrf_k=rrf_k)
-            for query in queries
-        ]
+        self._build_filter_clauses(filters)
+
+        server_fusion = (fusion_mode or settings.opensearch.fusion_mode) == "server"
+
+        if not settings.opensearch.use_msearch and not server_fusion:
+            tasks = [
+                self.hybrid_search(
+                    query, k=k, rrf_k=rrf_k, fusion_mode="client", path_options=path_options, filters=filters
+                )
+                for query in queries
+            ]
+            try:
+                return await asyncio.gather(*tasks)
+            except Exception as e:
+                log.error(f"批量混合搜索过程中发生错误: {e}", exc_info=True)
+                return [[] for _ in queries]
+
+        # 空查询直接返回空结果；重复查询只检索一次
+        unique_queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        if not unique_queries:
+            return [[] for _ in queries]
         
         try:
-            all_results = await asyncio.gather(*tasks)
+            # 同一批查询共用一次路径策略决策
+            path_weights = self.path_policy.select()
+            if server_fusion and self.path_policy.needs_observation():
+                # 服务端融合不返回各路结果: 需要贡献观测时本批改用客户端融合并执行全部路径
+                server_fusion = False
+                path_weights = [1.0 for _ in RECALL_PATHS]
+
+            fused = None
+            if server_fusion:
+                fused = await self._hybrid_search_server_batch(
+                    unique_queries, k=k, rrf_k=rrf_k, path_options=path_options, path_weights=path_weights,
+                    filters=filters
+                )
+            if fused is None:
+                per_query_results, executed = await self._recall_batch_msearch(
+                    unique_queries, candidate_k=k*2, path_options=path_options, path_weights=path_weights,
+                    filters=filters
+                )
+                fused = self._fuse_results(
+                    per_query_results, k=k, rrf_k=rrf_k, path_weights=path_weights, executed=executed
+                )
+            results_map = dict(zip(unique_queries, fused))
+
             log.info(f"--- *异步* 批量混合搜索完成 ---")
-            return all_results
+            return [list(results_map.get(q, [])) for q in queries]
             
         except Exception as e:
             log.error(f"批量混合搜索过程中发生错误: {e}", exc_info=True)
             return [[] for _ in queries]
 
     async def close_connection(self):
-        await self.client.close()
-        log.info("OpenSearch 异步连接已关闭。")
\ No newline at end of file
+        if self._owns_clients:
+            await asyncio.gather(self.client.close(), self.write_client.close())
+            log.info("OpenSearch 异步连接已关闭。")
+        log.info(f"Embedding 缓存统计: {self.get_embedding_cache_stats()}")
+        log.info(f"召回路径贡献统计: {self.get_recall_path_stats()}")
+        log.info(f"Jieba 查询分词缓存统计: {self.tokenizer.stats()}")
+
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """
+        返回持久化 Embedding 缓存与查询向量缓存的命中统计。
+        """
+        return {
+            "persistent": self.embedding_cache.stats() if self.embedding_cache else None,
+            "query": self.query_embedding_cache.stats() if self.query_embedding_cache else None,
+        }
+
+    def get_recall_path_stats(self) -> Dict[str, Any]:
+        """
+        返回各召回路径对融合 Top K 的贡献统计 (贡献率、独有贡献率、平均最好名次、被跳过次数)。
+        """
+        return self.path_policy.stats()
@@ -0,0 +1,195 @@
+import random
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class PathContributionTracker:
+    """
+    统计每一路召回对 RRF 融合结果的贡献。
+
+    对每次执行了该路召回的查询记录一条观测 (仅保留最近 window 条):
+    - contributed: 该路至少有一个命中进入融合后的 Top K
+    - unique:      该路至少有一个进入 Top K 的命中是其他路都没有召回的 (跳过该路会直接丢失的结果)
+    - best_rank:   该路命中在融合 Top K 中的最好名次 (1 开始，未进入为 None)
+    """
+
+    def __init__(self, paths: List[str], window: int = 2000):
+        self.paths = list(paths)
+        self._observations: Dict[str, Deque[Tuple[bool, bool, Optional[int]]]] = {
+            path: deque(maxlen=window) for path in self.paths
+        }
+        self.skipped: Dict[str, int] = {path: 0 for path in self.paths}
+
+    def record(
+        self,
+        path_results: List[List[Dict[str, Any]]],
+        fused_top_ids: List[str],
+        executed: List[bool]
+    ):
+        """
+        :param path_results: 各路召回结果，顺序与 paths 一致
+        :param fused_top_ids: 融合后 Top K 的 _id (按名次排序)
+        :param executed: 各路本次是否实际执行 (被策略跳过的路不计入观测)
+        """
+        fused_rank = {doc_id: rank for rank, doc_id in enumerate(fused_top_ids, 1)}
+        path_ids = [{hit['_id'] for hit in results} for results in path_results]
+
+        for pi, path in enumerate(self.paths):
+            if not executed[pi]:
+                self.skipped[path] += 1
+                continue
+
+            other_ids = set().union(*(ids for oi, ids in enumerate(path_ids) if oi != pi))
+            ranks = [fused_rank[doc_id] for doc_id in path_ids[pi] if doc_id in fused_rank]
+            unique = any(doc_id not in other_ids for doc_id in path_ids[pi] if doc_id in fused_rank)
+            self._observations[path].append((bool(ranks), unique, min(ranks) if ranks else None))
+
+    def samples(self, path: str) -> int:
+        return len(self._observations[path])
+
+    def contribution_rate(self, path: str) -> float:
+        observations = self._observations[path]
+        if not observations:
+            return 0.0
+        return sum(1 for contributed, _, _ in observations if contributed) / len(observations)
+
+    def unique_rate(self, path: str) -> float:
+        observations = self._observations[path]
+        if not observations:
+            return 0.0
+        return sum(1 for _, unique, _ in observations if unique) / len(observations)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for path in self.paths:
+            observations = self._observations[path]
+            total = len(observations)
+            ranks = [rank for _, _, rank in observations if rank is not None]
+            result[path] = {
+                "samples": total,
+                "skipped": self.skipped[path],
+                "contribution_rate": self.contribution_rate(path),
+                "unique_rate": self.unique_rate(path),
+                "mean_best_rank": (sum(ranks) / len(ranks)) if ranks else None,
+            }
+        return result
+
+
+class RecallPathPolicy:
+    """
+    根据贡献统计决定每一路召回的权重 (0 表示本次跳过该路)。
+
+    - off:     所有路权重为 1 (仅统计，不干预)
+    - profile: 使用配置中的固定权重 (未列出的路为 1)
+    - auto:    按最近窗口内的独有贡献率 (unique_rate) 调整向量路:
+               低于 skip_below 跳过，低于 downweight_below 降权为 downweight。
+               样本不足 min_samples 时视为置信度不足，使用全部路径；
+               向量路不会被全部跳过 (至少保留贡献率最高的一路)；
+               并以 explore_rate 的概率执行全部路径，保证被跳过的路仍有新的观测。
+
+    BM25 不发送 kNN 请求、代价很低，auto 模式下不会被跳过。
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        mode: str = "off",
+        weights: Optional[Dict[str, float]] = None,
+        min_samples: int = 200,
+        skip_below: float = 0.02,
+        downweight_below: float = 0.1,
+        downweight: float = 0.5,
+        explore_rate: float = 0.05,
+        window: int = 2000
+    ):
+        self.paths = list(paths)
+        self.mode = mode
+        self.weights = weights or {}
+        self.min_samples = min_samples
+        self.skip_below = skip_below
+        self.downweight_below = downweight_below
+        self.downweight = downweight
+        self.explore_rate = explore_rate
+        self.tracker = PathContributionTracker(self.paths, window=window)
+
+        unknown = set(self.weights) - set(self.paths)
+        if unknown:
+            log.warning(f"召回路径权重配置中包含未知路径: {sorted(unknown)}")
+
+        log.info(f"召回路径策略: {mode}" + (f"，权重: {self.weights}" if mode == "profile" else ""))
+
+    def select(self) -> List[float]:
+        """
+        返回本次查询各路的权重，顺序与 paths 一致。至少保留一路。
+        """
+        if self.mode == "profile":
+            weights = [float(self.weights.get(path, 1.0)) for path in self.paths]
+        elif self.mode == "auto":
+            weights = self._auto_weights()
+        else:
+            weights = [1.0 for _ in self.paths]
+
+        if not any(w > 0 for w in weights):
+            return [1.0 for _ in self.paths]
+        return weights
+
+    def _auto_weights(self) -> List[float]:
+        if random.random() < self.explore_rate:
+            return [1.0 for _ in self.paths]
+
+        weights: List[float] = []
+        for path in self.paths:
+            if path == "bm25" or self.tracker.samples(path) < self.min_samples:
+                weights.append(1.0)
+                continue
+
+            rate = self.tracker.unique_rate(path)
+            if rate < self.skip_below:
+                weights.append(0.0)
+            elif rate < self.downweight_below:
+                weights.append(self.downweight)
+            else:
+                weights.append(1.0)
+
+        # 多路向量结果高度重叠时各路的独有贡献率都很低，不能同时跳过：保留贡献率最高的一路
+        vector_indices = [i for i, path in enumerate(self.paths) if path != "bm25"]
+        if vector_indices and all(weights[i] <= 0 for i in vector_indices):
+            best = max(vector_indices, key=lambda i: self.tracker.contribution_rate(self.paths[i]))
+            weights[best] = 1.0
+        return weights
+
+    def needs_observation(self) -> bool:
+        """
+        auto 模式下本次查询是否需要记录贡献观测: 任一路样本不足 min_samples 时总是需要，之后按 explore_rate 抽样。
+        服务端融合不返回各路结果，需要观测时调用方应改用客户端召回 + 融合 (并执行全部路径)。
+        """
+        if self.mode != "auto":
+            return False
+        if any(self.tracker.samples(path) < self.min_samples for path in self.paths):
+            return True
+        return random.random() < self.explore_rate
+
+    def record(
+        self,
+        path_results: List[List[Dict[str, Any]]],
+        fused_top_ids: List[str],
+        weights: List[float],
+        executed: Optional[List[bool]] = None
+    ):
+        """
+        :param executed: 各路本次是否实际发送了召回请求；未指定时按权重 > 0 判断。
+                         权重 > 0 但未执行的路 (例如查询向量获取失败时的向量路) 不计入观测，
+                         否则会被记为"执行了但没有贡献"而拉低其独有贡献率。
+        """
+        if executed is None:
+            executed = [w > 0 for w in weights]
+        self.tracker.record(path_results, fused_top_ids, [w > 0 and e for w, e in zip(weights, executed)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "paths": self.tracker.stats(),
+        }
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+from contextlib import aclosing
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from ...core.config import settings
+from ...domain.interfaces import SearchRepository
+from ..llm.embedding_batcher import EmbeddingBatcher
+from .common import VECTOR_SOURCE_FIELDS
+
+log = logging.getLogger(__name__)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class EmbeddingProjector:
+    """
+    向量降维 (文档向量与查询向量使用同一个实例，保证投影一致):
+
+    - none:     原样返回
+    - truncate: 截断为前 dimension 维 (Matryoshka 模型的前缀本身就是有效的低维表示)
+    - pca:      (v - mean) @ components.T，矩阵由 fit_pca 拟合并保存为 .npz，首次使用时加载
+
+    降维后的向量重新归一化 (索引使用余弦相似度)。
+    """
+
+    def __init__(self, mode: str, source_dimension: int, dimension: Optional[int] = None, pca_path: Optional[str] = None):
+        if mode != "none":
+            if not dimension:
+                raise ValueError(f"EMBEDDING_PROJECTION_MODE={mode} 时必须设置 EMBEDDING_PROJECTION_DIMENSION。")
+            if dimension > source_dimension:
+                raise ValueError(f"降维后的维度 ({dimension}) 不能大于原始维度 ({source_dimension})。")
+
+        self.mode = mode
+        self.source_dimension = source_dimension
+        self.output_dimension = dimension if mode != "none" else source_dimension
+        self.pca_path = Path(pca_path) if pca_path else None
+
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._pca_digest: Optional[str] = None
+
+    def _load_pca(self):
+        if self._components is not None:
+            return
+        if self.pca_path is None or not self.pca_path.exists():
+            raise FileNotFoundError(
+                f"PCA 矩阵 {self.pca_path} 不存在，请先执行: python -m src.backend.cli fit-pca"
+            )
+        with np.load(self.pca_path) as data:
+            mean, components = data["mean"].astype(np.float32), data["components"].astype(np.float32)
+        if components.shape != (self.output_dimension, self.source_dimension):
+            raise ValueError(
+                f"PCA 矩阵形状 {components.shape} 与配置 ({self.output_dimension}, {self.source_dimension}) 不一致，请重新拟合。"
+            )
+        self._mean, self._components = mean, components
+        self._pca_digest = hashlib.sha256(self.pca_path.read_bytes()).hexdigest()[:12]
+        log.info(f"PCA 投影矩阵已加载: {self.pca_path} ({self.source_dimension} -> {self.output_dimension})")
+
+    def fingerprint(self) -> str:
+        """
+        投影方式的标识 (写入索引 _meta)，用于判断已有索引中的向量能否直接复用。
+        """
+        if self.mode == "none":
+            return "none"
+        if self.mode == "truncate":
+            return f"truncate:{self.output_dimension}"
+        self._load_pca()
+        return f"pca:{self.output_dimension}:{self._pca_digest}"
+
+    def project(self, vectors: List[Optional[List[float]]]) -> List[Optional[List[float]]]:
+        """
+        批量投影，缺失的向量 (None) 原样保留。
+        """
+        if self.mode == "none":
+            return vectors
+        present = [i for i, vector in enumerate(vectors) if vector is not None]
+        if not present:
+            return vectors
+
+        matrix = np.asarray([vectors[i] for i in present], dtype=np.float32)
+        if self.mode == "truncate":
+            matrix = matrix[:, :self.output_dimension]
+        else:
+            # 与拟合时一致: 先归一化再中心化投影
+            self._load_pca()
+            matrix = (_normalize(matrix) - self._mean) @ self._components.T
+        matrix = _normalize(matrix)
+
+        projected = list(vectors)
+        for i, row in zip(present, matrix.tolist()):
+            projected[i] = row
+        return projected
+
+
+@lru_cache()
+def get_embedding_projector() -> EmbeddingProjector:
+    """
+    获取向量降维器单例 (EMBEDDING_PROJECTION_*)。
+    """
+    config = settings.embedding_projection
+    return EmbeddingProjector(
+        mode=config.mode,
+        source_dimension=settings.embedding_llm.dimension,
+        dimension=config.dimension,
+        pca_path=config.pca_path
+    )
+
+
+async def fit_pca(
+    store: SearchRepository,
+    embedder: EmbeddingBatcher,
+    dimension: int,
+    output: Path,
+    sample_size: int = 10000
+) -> Dict[str, Any]:
+    """
+    从存储中读取文档块文本 (各路向量的源字段)，取原始维度的 embedding 拟合 PCA，保存为 .npz。
+    索引中的向量可能已经降维，因此使用文本重新获取原始向量 (通常由 embedding 缓存命中)。
+    返回拟合结果 (维度、样本数与保留的方差比例)。
+    """
+    source_dimension = settings.embedding_llm.dimension
+    if dimension > source_dimension:
+        raise ValueError(f"降维后的维度 ({dimension}) 不能大于原始维度 ({source_dimension})。")
+
+    texts: List[str] = []
+    async with aclosing(store.scan_chunks()) as sources:
+        async for source in sources:
+            texts.extend(text for field in VECTOR_SOURCE_FIELDS.values() if (text := source.get(field)))
+            if len(texts) >= sample_size:
+                break
+    texts = list(dict.fromkeys(texts))[:sample_size]
+    if len(texts) < dimension:
+        raise ValueError(f"样本数 ({len(texts)}) 少于目标维度 ({dimension})，无法拟合 PCA。")
+
+    log.info(f"正在获取 {len(texts)} 条样本的原始 embedding...")
+    samples = _normalize(np.asarray(await embedder.embed(texts), dtype=np.float32))
+
+    mean = samples.mean(axis=0)
+    _, singular_values, vt = np.linalg.svd(samples - mean, full_matrices=False)
+    variance = singular_values ** 2
+    explained = float(variance[:dimension].sum() / variance.sum()) if variance.sum() > 0 else 0.0
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        np.savez(
+            f,
+            mean=mean,
+            components=vt[:dimension].astype(np.float32),
+            model=np.array(settings.embedding_llm.model)
+        )
+
+    log.info(f"PCA 已保存到 {output}: {source_dimension} -> {dimension}，样本 {len(texts)}，保留方差 {explained:.2%}")
+    return {"dimension": dimension, "samples": len(texts), "explained_variance": explained}
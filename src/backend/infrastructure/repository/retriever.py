@@ -1,11 +1,11 @@
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 # 导入标准接口和数据模型
 from ...domain.interfaces import Retriever, SearchRepository
-from ...domain.models import RetrievedChunk
+from ...domain.models import RetrievedChunk, SearchFilter
 from ..llm.reranker import TEIRerankerClient
 
 # 初始化日志
@@ -21,11 +21,15 @@ class RetrievalService(Retriever):
         self,
         search_repo: SearchRepository,
         rewrite_llm,
-        rerank_client: TEIRerankerClient
+        rerank_client: TEIRerankerClient,
+        search_k: int = 10,
+        rrf_k: int = 60
     ):
         self.search_repo = search_repo
         self.rewrite_llm = rewrite_llm
         self.rerank_client = rerank_client
+        self.search_k = search_k
+        self.rrf_k = rrf_k
         
         # 定义查询改写的 Prompt
         self.rewrite_prompt = ChatPromptTemplate.from_template(
@@ -56,7 +60,11 @@ class RetrievalService(Retriever):
             log.error(f"查询改写失败，将仅使用原始查询: {e}")
             return []
 
-    async def _execute_parallel_search(self, queries: List[str]) -> List[RetrievedChunk]:
+    async def _execute_parallel_search(
+        self, 
+        queries: List[str], 
+        filters: Optional[SearchFilter] = None
+    ) -> List[RetrievedChunk]:
         """
         并发执行多路检索。
         直接利用 SearchRepository 提供的批量接口，减少 Service 层复杂度。
@@ -69,8 +77,9 @@ class RetrievalService(Retriever):
             # 返回类型是 List[List[RetrievedChunk]]
             batch_results = await self.search_repo.hybrid_search_batch(
                 queries=queries, 
-                k=10, 
-                rrf_k=60
+                k=self.search_k, 
+                rrf_k=self.rrf_k,
+                filters=filters
             )
             
             # 展平结果 (Flatten): List[List] -> List
@@ -108,7 +117,7 @@ class RetrievalService(Retriever):
         log.debug(f"去重完成: 输入 {len(chunks)} -> 输出 {len(deduplicated)}")
         return deduplicated
 
-    async def retrieve(self, query: str) -> List[RetrievedChunk]:
+    async def retrieve(self, query: str, filters: Optional[SearchFilter] = None) -> List[RetrievedChunk]:
         """
         编排完整的 RAG 检索流程。
         1. 调用 rewrite_client 改写查询
@@ -116,6 +125,8 @@ class RetrievalService(Retriever):
         3. 聚合、去重
         4. 调用 rerank_client 重排序
         5. 返回最终列表
+
+        :param filters: 限定检索范围，作用于所有查询变体。
         """
         log.info(f"--- 开始检索流程，用户查询: {query} ---")
 
@@ -126,7 +137,7 @@ class RetrievalService(Retriever):
         queries.extend(rewritten)
 
         # 2. 并发检索 (Step 2: Parallel Search)
-        raw_chunks = await self._execute_parallel_search(queries)
+        raw_chunks = await self._execute_parallel_search(queries, filters)
         
         if not raw_chunks:
             log.warning("所有检索路径均未返回结果。")
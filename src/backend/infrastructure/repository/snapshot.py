@@ -0,0 +1,189 @@
+import json
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, AsyncGenerator
+
+import numpy as np
+
+from ...core.config import settings
+from ...domain.interfaces import SearchRepository
+from ...domain.models import SearchFilter, BulkIndexResult
+from .mappings import VECTOR_FIELDS, ALL_VECTOR_FIELDS
+from .projection import get_embedding_projector
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+class _SnapshotShardWriter:
+    """
+    按分片写出快照: 每个分片一个 records-NNNNN.jsonl (不含向量的 _source，行号即矩阵行号)，
+    以及每个向量字段一个 {field}-NNNNN.npy (float32，可内存映射加载)。
+    """
+
+    def __init__(self, output_dir: Path, shard_size: int, dimension: int):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.dimension = dimension
+        self.shards: List[Dict[str, Any]] = []
+        self._records: List[Dict[str, Any]] = []
+        self._vectors = {field: np.zeros((shard_size, dimension), dtype=np.float32) for field in VECTOR_FIELDS}
+
+    def add(self, source: Dict[str, Any]):
+        row = len(self._records)
+        for field in VECTOR_FIELDS:
+            vector = source.get(field)
+            if vector is None:
+                # 缺失的向量保存为全零行，导入时还原为缺失
+                continue
+            if len(vector) != self.dimension:
+                raise ValueError(
+                    f"文档块 {source.get('chunk_id')} 的 {field} 维度为 {len(vector)}，与快照维度 {self.dimension} 不一致。"
+                )
+            self._vectors[field][row] = vector
+        self._records.append({k: v for k, v in source.items() if k not in ALL_VECTOR_FIELDS})
+        if len(self._records) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        count = len(self._records)
+        if not count:
+            return
+        shard_id = len(self.shards)
+        records_file = f"records-{shard_id:05d}.jsonl"
+        with open(self.output_dir / records_file, "w", encoding="utf-8") as f:
+            for record in self._records:
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+
+        vector_files: Dict[str, str] = {}
+        for field, matrix in self._vectors.items():
+            vector_files[field] = f"{field}-{shard_id:05d}.npy"
+            np.save(self.output_dir / vector_files[field], matrix[:count])
+            matrix[:count] = 0
+
+        self.shards.append({"count": count, "records": records_file, "vectors": vector_files})
+        self._records = []
+        log.info(f"快照分片 {shard_id} 已写出 ({count} 个文档块)。")
+
+
+async def export_snapshot(
+    store: SearchRepository,
+    output_dir: Path,
+    filters: Optional[SearchFilter] = None,
+    shard_size: int = 10000,
+    page_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    将文档块连同各路向量导出为快照目录，返回 manifest。
+    manifest.json 最后写出，存在即表示快照完整。
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if (output_dir / MANIFEST_FILE).exists():
+        raise FileExistsError(f"{output_dir} 中已存在快照，请指定新的目录。")
+
+    dimension = settings.vector_dimension
+    writer = _SnapshotShardWriter(output_dir, shard_size, dimension)
+    # 快照中出现的集合 (None 表示默认集合)，导入时据此为每个集合开启批量导入会话
+    collections: Dict[Optional[str], None] = {}
+    async for source in store.scan_chunks(filters=filters, page_size=page_size, include_vectors=True):
+        collections.setdefault(source.get("collection"))
+        writer.add(source)
+    writer.flush()
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": settings.embedding_llm.model,
+        "dimension": dimension,
+        "projection": get_embedding_projector().fingerprint(),
+        "fields": VECTOR_FIELDS,
+        "collections": list(collections),
+        "count": sum(shard["count"] for shard in writer.shards),
+        "shards": writer.shards,
+    }
+    with open(output_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    log.info(f"快照导出完成: {manifest['count']} 个文档块，{len(writer.shards)} 个分片 -> {output_dir}")
+    return manifest
+
+
+def load_manifest(input_dir: Path) -> Dict[str, Any]:
+    """
+    读取并校验快照 manifest (格式版本、向量字段与维度须与当前配置一致)。
+    """
+    manifest_path = input_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"{input_dir} 中没有 {MANIFEST_FILE}，快照不存在或未导出完成。")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"不支持的快照格式版本: {manifest.get('format_version')}")
+    if manifest["dimension"] != settings.vector_dimension:
+        raise ValueError(
+            f"快照向量维度 ({manifest['dimension']}) 与当前配置 ({settings.vector_dimension}) 不一致，"
+            f"请改用 reindex --mode reembed 重建。"
+        )
+    projection = get_embedding_projector().fingerprint()
+    if manifest.get("projection", "none") != projection:
+        raise ValueError(
+            f"快照的向量投影方式 ({manifest.get('projection', 'none')}) 与当前配置 ({projection}) 不一致，"
+            f"请改用 reindex --mode reembed 重建。"
+        )
+    missing_fields = set(VECTOR_FIELDS) - set(manifest["fields"])
+    if missing_fields:
+        raise ValueError(f"快照缺少向量字段: {sorted(missing_fields)}")
+    if manifest.get("embedding_model") != settings.embedding_llm.model:
+        log.warning(
+            f"快照的 embedding 模型 ({manifest.get('embedding_model')}) 与当前配置 ({settings.embedding_llm.model}) 不同，"
+            f"查询向量与文档向量可能不在同一空间。"
+        )
+    return manifest
+
+
+async def iter_snapshot(input_dir: Path, manifest: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    按分片顺序读取快照中的文档块 (向量矩阵以内存映射加载，逐行转换)。
+    """
+    for shard in manifest["shards"]:
+        matrices = {
+            field: np.load(input_dir / shard["vectors"][field], mmap_mode="r") for field in VECTOR_FIELDS
+        }
+        for field, matrix in matrices.items():
+            if matrix.shape[0] != shard["count"]:
+                raise ValueError(f"快照分片 {shard['records']} 的 {field} 行数 ({matrix.shape[0]}) 与记录数不一致。")
+
+        with open(input_dir / shard["records"], encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                source = json.loads(line)
+                for field, matrix in matrices.items():
+                    vector = matrix[row]
+                    source[field] = vector.tolist() if vector.any() else None
+                yield source
+
+
+async def import_snapshot(
+    store: SearchRepository,
+    input_dir: Path,
+    batch_size: Optional[int] = None
+) -> BulkIndexResult:
+    """
+    将快照通过批量导入路径写回存储 (直接使用快照中的向量，不调用 embedding 模型)。
+    对 manifest 中记录的每个集合各开启一个批量导入会话 (未记录集合的旧快照只对默认集合开启)。
+    """
+    manifest = load_manifest(input_dir)
+    log.info(f"开始导入快照 {input_dir} ({manifest['count']} 个文档块，{len(manifest['shards'])} 个分片)...")
+
+    collections = manifest.get("collections") or [None]
+    async with AsyncExitStack() as stack:
+        for collection in collections:
+            await stack.enter_async_context(store.bulk_load_session(collection=collection))
+        result = await store.bulk_add_sources(iter_snapshot(input_dir, manifest), batch_size=batch_size)
+
+    log.info(f"快照导入完成。成功: {result.success}, 失败: {result.failed}")
+    return result
@@ -0,0 +1,194 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List, Optional, Dict, Any
+
+import jieba
+
+from ...core.config import settings
+
+log = logging.getLogger(__name__)
+
+
+# --- 工作进程侧 (模块级函数，供进程池序列化调用) ---
+
+def _init_worker(user_dict: Optional[str]):
+    """
+    工作进程初始化：每个进程只加载一次 Jieba 词典。
+    """
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+    if user_dict:
+        jieba.load_userdict(user_dict)
+
+
+def _tokenize_many(texts: List[str]) -> List[str]:
+    return [" ".join(jieba.cut_for_search(text)) if text else "" for text in texts]
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class JiebaTokenizer:
+    """
+    Jieba 分词器 (BM25 的 content_tokenized 字段与查询分词)。
+
+    - 文档分词: 专用进程池，每个工作进程启动时加载一次词典，按 chunk_size 分片批量分词，
+      CPU 时间随核数扩展，且不占用 Docling 解析等使用的默认线程池。
+    - 查询分词: 在主进程执行，结果放入 LRU 缓存 (重复查询不再分词)。
+    - warmup(): 提前加载主进程词典并拉起工作进程，避免首个查询 / 首批文档承担加载耗时。
+
+    workers <= 0 时不使用进程池，文档分词退化为 asyncio.to_thread。
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        chunk_size: int = 64,
+        query_cache_size: int = 4096,
+        user_dict: Optional[str] = None
+    ):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self.query_cache_size = query_cache_size
+        self.user_dict = user_dict
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._main_initialized = False
+        self._query_cache: "OrderedDict[str, str]" = OrderedDict()
+
+        self.query_hits = 0
+        self.query_misses = 0
+
+    # --- 词典与进程池 ---
+
+    def _ensure_main_initialized(self):
+        if not self._main_initialized:
+            _init_worker(self.user_dict)
+            self._main_initialized = True
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用 spawn：主进程中已有事件循环与网络连接线程，fork 不安全
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.user_dict,)
+            )
+            log.info(f"Jieba 分词进程池已创建 (进程数: {self.workers})。")
+        return self._executor
+
+    def warmup(self):
+        """
+        [同步] 加载主进程词典，并提交空任务让进程池提前拉起所有工作进程 (不等待完成)。
+        """
+        self._ensure_main_initialized()
+        if self.workers > 0:
+            executor = self._get_executor()
+            for _ in range(self.workers):
+                executor.submit(_noop)
+        log.info("Jieba 分词器预热完成。")
+
+    # --- 分词接口 ---
+
+    def _tokenize_sync(self, text: str) -> str:
+        self._ensure_main_initialized()
+        (tokenized,) = _tokenize_many([text])
+        return tokenized
+
+    async def tokenize_many(self, texts: List[str]) -> List[str]:
+        """
+        批量文档分词，返回与 texts 等长的列表。
+        """
+        if not texts:
+            return []
+
+        if self.workers <= 0:
+            return await self._tokenize_many_in_thread(texts)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        parts = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        try:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(executor, _tokenize_many, part) for part in parts
+            ])
+        except BrokenProcessPool as e:
+            # 工作进程异常退出：丢弃进程池 (下次调用时重建)，本批改为线程内分词
+            log.error(f"Jieba 分词进程池不可用: {e}。本批改为线程内分词。", exc_info=True)
+            self.close()
+            return await self._tokenize_many_in_thread(texts)
+        return [tokenized for part in results for tokenized in part]
+
+    async def _tokenize_many_in_thread(self, texts: List[str]) -> List[str]:
+        return await asyncio.to_thread(lambda: [self._tokenize_sync(t) if t else "" for t in texts])
+
+    async def tokenize_query(self, text: str) -> str:
+        """
+        查询分词 (带 LRU 缓存)。
+        """
+        if not text:
+            return ""
+
+        cached = self._query_cache.get(text)
+        if cached is not None:
+            self.query_hits += 1
+            self._query_cache.move_to_end(text)
+            return cached
+
+        self.query_misses += 1
+        tokenized = await asyncio.to_thread(self._tokenize_sync, text)
+
+        self._query_cache[text] = tokenized
+        while len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+        return tokenized
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.query_hits + self.query_misses
+        return {
+            "query_hits": self.query_hits,
+            "query_misses": self.query_misses,
+            "query_cache_size": len(self._query_cache),
+            "query_hit_rate": (self.query_hits / total) if total else 0.0,
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_jieba_tokenizer() -> JiebaTokenizer:
+    """
+    获取 Jieba 分词器单例 (JIEBA_*)。
+    """
+    config = settings.jieba
+    workers = config.workers if config.workers is not None else (os.cpu_count() or 1)
+    tokenizer = JiebaTokenizer(
+        workers=workers,
+        chunk_size=config.chunk_size,
+        query_cache_size=config.query_cache_size,
+        user_dict=config.user_dict
+    )
+    if config.warmup:
+        tokenizer.warmup()
+    return tokenizer
+
+
+def close_jieba_tokenizer():
+    """
+    关闭分词器单例的进程池 (未创建时不做任何处理)。
+    分词器由所有存储 (各集合) 共享，只应在应用退出时由应用层调用，不由单个存储关闭。
+    """
+    if get_jieba_tokenizer.cache_info().currsize:
+        get_jieba_tokenizer().close()
+        log.info("Jieba 分词进程池已关闭。")
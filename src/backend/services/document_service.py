@@ -0,0 +1,79 @@
+import time
+import logging
+from typing import List, Optional, Tuple
+
+from ..domain.interfaces import SearchRepository, DocumentCatalog
+from ..domain.models import DocumentRecord
+
+log = logging.getLogger(__name__)
+
+
+class DocumentService:
+    """
+    文档管理服务: 列出 / 查看 / 删除已摄入的文档。
+
+    - 列出与查看只读取文档目录，与文档块数量无关
+    - 删除以后台任务执行 (立即返回)，目录记录标记为 deleting；
+      查看或列出时顺带查询任务进度，完成后移除目录记录，失败时标记为 delete_failed
+    """
+
+    def __init__(self, store: SearchRepository, catalog: DocumentCatalog):
+        self.store = store
+        self.catalog = catalog
+
+    async def _refresh_deletion(self, record: DocumentRecord) -> DocumentRecord:
+        """
+        [内部辅助] 查询 deleting 状态记录的删除任务进度，任务结束时更新目录。
+        """
+        if record.status != "deleting" or not record.delete_task_id:
+            return record
+
+        status = await self.store.get_deletion_status(record.delete_task_id)
+        if not status.completed:
+            return record
+        if status.error:
+            log.error(f"文档 {record.document_id} 删除失败: {status.error}")
+            record = record.model_copy(update={"status": "delete_failed", "error": status.error, "updated_at": time.time()})
+            await self.catalog.upsert(record)
+            return record
+
+        log.info(f"文档 {record.document_id} 已删除 ({status.deleted} 个文档块)。")
+        await self.catalog.remove(record.document_id, record.collection)
+        return record.model_copy(update={"status": "deleted", "updated_at": time.time()})
+
+    async def list_documents(
+        self,
+        collection: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DocumentRecord], Optional[str]]:
+        records, next_cursor = await self.catalog.list(
+            collection=collection, status=status, page_size=page_size, cursor=cursor
+        )
+        return [await self._refresh_deletion(record) for record in records], next_cursor
+
+    async def get_document(self, document_id: str, collection: Optional[str] = None) -> Optional[DocumentRecord]:
+        record = await self.catalog.get(document_id, collection)
+        return await self._refresh_deletion(record) if record else None
+
+    async def delete_document(self, document_id: str, collection: Optional[str] = None) -> Optional[DocumentRecord]:
+        """
+        提交后台删除任务并将目录记录标记为 deleting，返回更新后的记录；文档不存在时返回 None。
+        已在删除中的文档不重复提交。
+        """
+        record = await self.catalog.get(document_id, collection)
+        if record is None:
+            return None
+        if record.status == "deleting":
+            return await self._refresh_deletion(record)
+
+        task_id = await self.store.start_document_deletion(document_id, collection=record.collection)
+        record = record.model_copy(update={
+            "status": "deleting",
+            "delete_task_id": task_id,
+            "error": None,
+            "updated_at": time.time()
+        })
+        await self.catalog.upsert(record)
+        return await self._refresh_deletion(record)
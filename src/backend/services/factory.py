@@ -5,6 +5,7 @@ from ..domain.interfaces import AgentService
 # 1. 导入 Service 类
 from .ingestion_service import IngestionService
 from .agent_service import AgentServiceImpl
+from .document_service import DocumentService
 
 # 2. 导入其他基础设施的工厂函数
 from ..infrastructure.parse.factory import (
@@ -12,7 +13,7 @@ from ..infrastructure.parse.factory import (
     get_llm_preprocessor,
     get_markdown_splitter
 )
-from ..infrastructure.repository.factory import get_opensearch_store
+from ..infrastructure.repository.factory import get_search_repository, get_document_catalog
 
 log = logging.getLogger(__name__)
 
@@ -33,14 +34,16 @@ def get_ingestion_service() -> IngestionService:
         parser_instance = get_docling_parser()
         splitter_instance = get_markdown_splitter()
         preprocessor_instance = get_llm_preprocessor()
-        store_instance = get_opensearch_store()
+        store_instance = get_search_repository()
+        catalog_instance = get_document_catalog()
         
         # 注入依赖并实例化
         service = IngestionService(
             parser=parser_instance,
             splitter=splitter_instance,
             preprocessor=preprocessor_instance,
-            store=store_instance
+            store=store_instance,
+            catalog=catalog_instance
         )
         
         return service
@@ -50,6 +53,14 @@ def get_ingestion_service() -> IngestionService:
         raise e
     
 
+@lru_cache()
+def get_document_service() -> DocumentService:
+    """
+    [工厂方法] 组装并获取 DocumentService 单例 (文档目录 + 后台删除)。
+    """
+    return DocumentService(store=get_search_repository(), catalog=get_document_catalog())
+
+
 @lru_cache()
 def get_agent_service() -> AgentService:
     """
@@ -1,10 +1,12 @@
+import time
 import logging
 import asyncio
-from typing import Callable, Awaitable, Optional, List
+from typing import Callable, Awaitable, Optional, List, AsyncGenerator
 
 # --- 导入领域模型和接口 ---
-from ..domain.interfaces import Ingestor, DocumentParser, PreProcessor, TextSplitter, SearchRepository
-from ..domain.models import DocumentSource, DocumentChunk
+from ..core.config import settings
+from ..domain.interfaces import Ingestor, DocumentParser, PreProcessor, TextSplitter, SearchRepository, DocumentCatalog
+from ..domain.models import DocumentSource, DocumentChunk, BulkIndexResult, DocumentRecord, document_content_hash
 
 # --- 导入日志配置 ---
 from ..core.logging import setup_logging
@@ -18,11 +20,13 @@ class IngestionService(Ingestor):
     """
     文档摄入服务 (业务流程编排)。
     
-    Pipeline 的第 3 和 第 4 步合并为一个流式处理循环。
-    不再一次性拿到所有 enriched_chunks，而是每处理完一批（BATCH_SIZE）就写入数据库。
+    Pipeline 的第 3 和 第 4 步合并为一个流式处理过程。
+    不再一次性拿到所有 enriched_chunks，而是将预处理产生的流直接交给存储层的流水线写入
+    (embedding、分词与 bulk 请求并发执行，由有界队列限制内存占用)。
+    同时维护文档目录 (每个文档一条记录: 块数、内容哈希、摄入时间与状态)。
     """
 
-    # 定义写入数据库的批次大小，防止内存积压
+    # 进度汇报间隔 (块数)
     BATCH_SIZE = 50
 
     def __init__(
@@ -30,14 +34,38 @@ class IngestionService(Ingestor):
         parser: DocumentParser,
         splitter: TextSplitter,
         preprocessor: PreProcessor,
-        store: SearchRepository
+        store: SearchRepository,
+        catalog: Optional[DocumentCatalog] = None
     ):
         self.parser = parser
         self.splitter = splitter
         self.preprocessor = preprocessor
         self.store = store
+        self.catalog = catalog
         log.info("IngestionService 初始化完毕 (依赖已注入)。")
 
+    async def _update_catalog(self, source: DocumentSource, **fields):
+        """
+        更新文档目录中该文档的记录 (目录不可用时只记录日志，不影响摄入)。
+        """
+        if self.catalog is None:
+            return
+        try:
+            now = time.time()
+            record = await self.catalog.get(source.document_id, source.collection)
+            if record is None:
+                record = DocumentRecord(
+                    document_id=source.document_id,
+                    document_name=source.document_name,
+                    collection=source.collection or settings.opensearch.default_collection,
+                    created_at=now
+                )
+            await self.catalog.upsert(record.model_copy(update={
+                **fields, "document_name": source.document_name, "updated_at": now
+            }))
+        except Exception as e:
+            log.warning(f"更新文档目录失败 (document_id: {source.document_id}): {e}")
+
     async def _emit(self, msg: str, status_callback: Optional[Callable[[str], Awaitable[None]]] = None):
         """辅助方法：同时打印日志并调用回调"""
         log.info(msg)
@@ -83,32 +111,76 @@ class IngestionService(Ingestor):
                 return
                 
             await self._emit(f"步骤 2/4: 切分成功，生成 {len(initial_chunks)} 个块。", status_callback)
+            catalog_fields = {
+                "chunk_count": len(initial_chunks),
+                "content_hash": document_content_hash([chunk.content_hash for chunk in initial_chunks]),
+                "error": None,
+            }
+
+            # --- 增量比对: 内容未变化的块跳过预处理与 embedding，已不存在的块稍后删除 ---
+            existing_hashes = await self.store.get_chunk_hashes(source.document_id, collection=source.collection)
+            current_ids = {chunk.chunk_id for chunk in initial_chunks}
+            removed_chunk_ids = [chunk_id for chunk_id in existing_hashes if chunk_id not in current_ids]
+            changed_chunks = [
+                chunk for chunk in initial_chunks
+                if existing_hashes.get(chunk.chunk_id) != chunk.content_hash
+            ]
+            unchanged_count = len(initial_chunks) - len(changed_chunks)
+
+            if existing_hashes:
+                await self._emit(
+                    f"增量比对: 未变化 {unchanged_count} 个，新增/变化 {len(changed_chunks)} 个，"
+                    f"待删除 {len(removed_chunk_ids)} 个。", 
+                    status_callback
+                )
+            if not changed_chunks and not removed_chunk_ids:
+                await self._update_catalog(source, status="ready", **catalog_fields)
+                await self._emit(f"✅ 文档 {source.document_name} 内容未变化，无需重新处理。", status_callback)
+                return
+            initial_chunks = changed_chunks
+            await self._update_catalog(source, status="ingesting", **catalog_fields)
 
             # --- 3 & 4. 预处理 (Preprocess) 并 流式写入 (Store) ---
-            await self._emit(f"步骤 3-4: 正在并发预处理并分批写入 (Batch Size: {self.BATCH_SIZE})...", status_callback)
-            
-            processed_buffer: List[DocumentChunk] = []
-            total_stored = 0
+            await self._emit(f"步骤 3-4: 正在并发预处理并流水线写入...", status_callback)
             
-            # 使用 async for 消费 preprocessor 产生的流
-            async for enriched_chunk in self.preprocessor.run_concurrent_preprocessing(initial_chunks):
-                processed_buffer.append(enriched_chunk)
-                
-                # 如果缓冲区达到批次大小，执行写入
-                if len(processed_buffer) >= self.BATCH_SIZE:
-                    await self.store.bulk_add_documents(processed_buffer)
-                    total_stored += len(processed_buffer)
-                    await self._emit(f"  -> 已批次写入 {len(processed_buffer)} 个块 (累计: {total_stored})", status_callback)
-                    processed_buffer.clear() # 清空缓冲区，释放内存
-
-            # 循环结束后，处理剩余未满一批的块
-            if processed_buffer:
-                await self.store.bulk_add_documents(processed_buffer)
-                total_stored += len(processed_buffer)
-                await self._emit(f"  -> 写入剩余 {len(processed_buffer)} 个块", status_callback)
-                processed_buffer.clear()
-
-            if total_stored == 0:
+            total_submitted = 0
+
+            async def enriched_stream() -> AsyncGenerator[DocumentChunk, None]:
+                nonlocal total_submitted
+                # 使用 async for 消费 preprocessor 产生的流
+                async for enriched_chunk in self.preprocessor.run_concurrent_preprocessing(initial_chunks):
+                    total_submitted += 1
+                    if total_submitted % self.BATCH_SIZE == 0:
+                        await self._emit(f"  -> 已送入写入流水线 {total_submitted} 个块", status_callback)
+                    yield enriched_chunk
+
+            # 批量导入会话：写入期间暂停索引自动刷新，结束时统一 refresh 一次
+            async with self.store.bulk_load_session(collection=source.collection):
+                write_result = BulkIndexResult()
+                if initial_chunks:
+                    write_result = await self.store.bulk_add_documents_stream(enriched_stream())
+                total_stored = write_result.success
+
+                # 新内容写入后再删除已不存在的旧块，避免更新期间文档内容缺失
+                if removed_chunk_ids:
+                    deleted = await self.store.delete_chunks(removed_chunk_ids, collection=source.collection)
+                    await self._emit(f"  -> 已删除 {deleted} 个过期块", status_callback)
+
+            if write_result.retried:
+                await self._emit(f"  -> 写入过程中 {write_result.retried} 次被拒绝后已重试", status_callback)
+            if write_result.failed:
+                await self._emit_error(
+                    f"部分块写入失败: 成功 {total_stored}，永久失败 {write_result.failed} (共 {total_submitted} 个)。", 
+                    status_callback
+                )
+
+            if write_result.failed or (total_stored == 0 and initial_chunks):
+                error = f"{write_result.failed} 个块写入失败" if write_result.failed else "没有存储任何块"
+                await self._update_catalog(source, status="failed", **{**catalog_fields, "error": error})
+            else:
+                await self._update_catalog(source, status="ready", **catalog_fields)
+
+            if total_stored == 0 and initial_chunks:
                  await self._emit_error(f"警告: 流程结束但没有存储任何块 (可能是预处理全部失败)。", status_callback)
             else:
                 await self._emit(f"步骤 3-4: 完成。共存储 {total_stored} 个块。", status_callback)
@@ -117,6 +189,7 @@ class IngestionService(Ingestor):
         except FileNotFoundError:
             await self._emit_error(f"文件未找到: {source.file_path}", status_callback)
         except Exception as e:
+            await self._update_catalog(source, status="failed", error=str(e))
             await self._emit_error(f"处理过程发生未知错误: {str(e)}", status_callback)
             import traceback
             traceback.print_exc()
\ No newline at end of file
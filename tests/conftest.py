@@ -0,0 +1,41 @@
+import os
+
+# 配置在导入时加载: 先填入测试用的占位配置 (不会真正访问任何服务)
+for _prefix in ("DOCLING_VLM", "DOCLING_LLM", "PREPROCESSING_LLM", "EMBEDDING_LLM", "REWRITE_LLM", "RESEARCH_LLM"):
+    os.environ.setdefault(f"{_prefix}_API_KEY", "test")
+    os.environ.setdefault(f"{_prefix}_BASE_URL", "http://localhost")
+    os.environ.setdefault(f"{_prefix}_MODEL", "test")
+for _key in ("LITELLM_PROXY_URL", "LANGFUSE_SECRET_KEY", "LANGFUSE_PUBLIC_KEY", "LANGFUSE_BASE_URL"):
+    os.environ.setdefault(_key, "test")
+os.environ.setdefault("EMBEDDING_LLM_DIMENSION", "3")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("JIEBA_WORKERS", "0")
+os.environ.setdefault("OPENSEARCH_FILTERABLE_METADATA_KEYS", '["lang"]')
+
+import asyncio
+from typing import List
+
+import pytest
+
+
+class FakeEmbeddings:
+    """
+    确定性的假 embedding 模型: 向量由文本长度与首字符派生。
+    """
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(0)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(0)
+        return self._embed(text)
+
+    @staticmethod
+    def _embed(text: str) -> List[float]:
+        return [float(len(text)), float(ord(text[0])) if text else 0.0, 1.0]
+
+
+@pytest.fixture
+def fake_embeddings() -> FakeEmbeddings:
+    return FakeEmbeddings()
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+
+from opensearchpy.serializer import JSONSerializer
+
+from src.backend.infrastructure.repository.bulk_writer import AdaptiveBulkSizer, BulkWriter
+
+
+class FakeBulkClient:
+    """
+    假的 OpenSearch 客户端: 记录每个 bulk 请求中的 _id，按 status_for(_id, 请求序号) 返回逐条状态。
+    """
+
+    def __init__(self, status_for: Callable[[str, int], int]):
+        self.status_for = status_for
+        self.requests: List[List[str]] = []
+        self.transport = type("Transport", (), {"serializer": JSONSerializer()})()
+
+    async def bulk(self, body: str):
+        lines = body.strip().split("\n")
+        ids = [json.loads(line)["index"]["_id"] for line in lines[0::2]]
+        request_no = len(self.requests)
+        self.requests.append(ids)
+        items = [{"index": {"_id": doc_id, "status": self.status_for(doc_id, request_no)}} for doc_id in ids]
+        return {"errors": any(item["index"]["status"] >= 300 for item in items), "items": items}
+
+
+def make_writer(client: FakeBulkClient, size: int = 10, max_retries: int = 5) -> BulkWriter:
+    sizer = AdaptiveBulkSizer(initial_size=size, min_size=1, max_size=size)
+    return BulkWriter(client, sizer, max_retries=max_retries, initial_backoff=0, flush_interval=0.01)
+
+
+async def write(writer: BulkWriter, count: int):
+    queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+    for i in range(count):
+        queue.put_nowait({"_index": "idx", "_id": f"c{i}", "_source": {"content": f"文档块 {i}"}})
+    queue.put_nowait(None)
+    return await writer.write_from_queue(queue)
+
+
+def test_sizer_increases_additively_and_decreases_multiplicatively():
+    sizer = AdaptiveBulkSizer(initial_size=100, min_size=10, max_size=160, target_latency=1.0, increase_step=50)
+
+    sizer.record_success(0.1)
+    assert sizer.size == 150
+    sizer.record_success(0.1)
+    assert sizer.size == 160
+
+    sizer.record_success(5.0)
+    assert sizer.size == 80
+    sizer.record_rejection()
+    assert sizer.size == 40
+    for _ in range(5):
+        sizer.record_rejection()
+    assert sizer.size == 10
+
+    assert sizer.stats() == {"size": 10, "requests": 9, "rejections": 6, "decreases": 7}
+
+
+def test_sizer_clamps_initial_size():
+    assert AdaptiveBulkSizer(initial_size=5000, max_size=2000).size == 2000
+    assert AdaptiveBulkSizer(initial_size=1, min_size=50).size == 50
+
+
+async def test_rejected_items_are_retried_without_double_counting():
+    # 第一次请求中 c1、c3 被拒绝 (429)，重试时成功
+    client = FakeBulkClient(lambda doc_id, request_no: 429 if request_no == 0 and doc_id in ("c1", "c3") else 201)
+    writer = make_writer(client)
+
+    result = await write(writer, 5)
+
+    assert result.success == 5
+    assert result.failed == 0 and result.errors == []
+    assert result.retried == 2
+    assert client.requests[0] == ["c0", "c1", "c2", "c3", "c4"]
+    assert client.requests[1] == ["c1", "c3"]
+    assert writer.sizer.rejections == 1
+
+
+async def test_items_exceeding_max_retries_fail_permanently():
+    client = FakeBulkClient(lambda doc_id, request_no: 429 if doc_id == "c2" else 201)
+    writer = make_writer(client, max_retries=2)
+
+    result = await write(writer, 4)
+
+    assert result.success == 3
+    assert result.failed == 1
+    assert result.retried == 2
+    assert [error["_id"] for error in result.errors] == ["c2"]
+    # 首次请求 + 2 次重试
+    assert sum(ids.count("c2") for ids in client.requests) == 3
+
+
+async def test_non_retryable_errors_fail_immediately():
+    client = FakeBulkClient(lambda doc_id, request_no: 400 if doc_id == "c0" else 201)
+    writer = make_writer(client)
+
+    result = await write(writer, 3)
+
+    assert (result.success, result.failed, result.retried) == (2, 1, 0)
+    assert result.errors[0]["_id"] == "c0" and result.errors[0]["status"] == 400
+    assert len(client.requests) == 1
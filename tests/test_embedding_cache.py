@@ -0,0 +1,111 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from src.backend.infrastructure.llm.embedding_cache import QueryEmbeddingCache
+
+
+class SlowCompute:
+    """
+    记录每次调用的假 compute: 在 release 被设置前阻塞，便于构造并发场景。
+    """
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, texts: List[str]) -> List[Optional[List[float]]]:
+        self.calls.append(list(texts))
+        await self.release.wait()
+        return [[float(len(text))] for text in texts]
+
+
+async def test_concurrent_requests_are_coalesced():
+    cache = QueryEmbeddingCache()
+    compute = SlowCompute()
+
+    first = asyncio.create_task(cache.get_or_compute_many(["a", "bb"], compute))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get_or_compute_many(["bb", "ccc"], compute))
+    await asyncio.sleep(0)
+    compute.release.set()
+
+    assert await first == [[1.0], [2.0]]
+    assert await second == [[2.0], [3.0]]
+    # "bb" 正在计算中: 第二个调用方共享该任务，只计算新的 "ccc"
+    assert compute.calls == [["a", "bb"], ["ccc"]]
+    assert cache.coalesced == 1 and cache.misses == 3
+
+    assert await cache.get_or_compute("bb", compute) == [2.0]
+    assert cache.hits == 1 and len(compute.calls) == 2
+
+
+async def test_cancelled_initiator_does_not_cancel_waiters():
+    cache = QueryEmbeddingCache()
+    compute = SlowCompute()
+
+    initiator = asyncio.create_task(cache.get_or_compute("q", compute))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_compute("q", compute))
+    await asyncio.sleep(0)
+
+    initiator.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await initiator
+
+    compute.release.set()
+    assert await waiter == [1.0]
+    assert compute.calls == [["q"]]
+    # 发起方被取消后计算仍然完成并写入缓存
+    assert await cache.get_or_compute("q", compute) == [1.0]
+    assert len(compute.calls) == 1
+
+
+async def test_compute_errors_reach_all_waiters_and_are_not_cached():
+    cache = QueryEmbeddingCache()
+    calls = []
+
+    async def failing(texts):
+        calls.append(list(texts))
+        await asyncio.sleep(0)
+        raise RuntimeError("embedding 服务不可用")
+
+    results = await asyncio.gather(
+        cache.get_or_compute("q", failing), cache.get_or_compute("q", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert calls == [["q"]]
+
+    compute = SlowCompute()
+    compute.release.set()
+    assert await cache.get_or_compute("q", compute) == [1.0]
+
+
+async def test_entries_expire_after_ttl():
+    cache = QueryEmbeddingCache(ttl_seconds=0.05)
+    compute = SlowCompute()
+    compute.release.set()
+
+    await cache.get_or_compute("q", compute)
+    await cache.get_or_compute("q", compute)
+    assert len(compute.calls) == 1 and cache.hits == 1
+
+    await asyncio.sleep(0.1)
+    await cache.get_or_compute("q", compute)
+    assert len(compute.calls) == 2
+    assert cache.expired == 1
+
+
+async def test_lru_evicts_oldest_entry():
+    cache = QueryEmbeddingCache(max_entries=2)
+    compute = SlowCompute()
+    compute.release.set()
+
+    await cache.get_or_compute_many(["a", "b"], compute)
+    await cache.get_or_compute("a", compute)
+    await cache.get_or_compute("c", compute)
+
+    # "b" 最久未使用，被淘汰
+    await cache.get_or_compute_many(["a", "b", "c"], compute)
+    assert compute.calls == [["a", "b"], ["c"], ["b"]]
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.backend.domain.models import DocumentChunk, SearchFilter
+from src.backend.infrastructure.llm.embedding_batcher import EmbeddingBatcher
+from src.backend.infrastructure.repository.local_store import LocalRAGStore, _BM25Field, _standard_analyze
+
+CONTENTS = [
+    "苹果 手机 发布会", "香蕉 价格 上涨", "机器学习 模型 训练", "深度 学习 框架",
+    "数据库 索引 优化", "向量 检索 系统", "苹果 公司 财报", "python 编程 语言",
+]
+
+
+def make_docs(prefix: str, document_id: str, count: int = len(CONTENTS)):
+    return [
+        DocumentChunk(
+            chunk_id=f"{prefix}{i}",
+            document_id=document_id,
+            document_name=f"{document_id}.pdf",
+            content=CONTENTS[i % len(CONTENTS)],
+            parent_headings=["标题"],
+            metadata={"lang": "zh"},
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def make_store(tmp_path, fake_embeddings):
+    stores = []
+
+    def _make() -> LocalRAGStore:
+        store = LocalRAGStore(str(tmp_path / "store"))
+        store.embedder = EmbeddingBatcher(fake_embeddings)
+        store.query_embedding_cache = None
+        stores.append(store)
+        return store
+
+    return _make
+
+
+def assert_consistent(store: LocalRAGStore):
+    assert set(store._rows) == set(store._records)
+    for chunk_id, row in store._rows.items():
+        assert store._row_ids[row] == chunk_id
+        assert store._alive[row]
+    assert int(store._alive[:store._size].sum()) == len(store._records)
+
+
+def test_bm25_remove_only_touches_document_postings():
+    index = _BM25Field(_standard_analyze, 1.2, 0.75)
+    index.add("a", "apple banana")
+    index.add("b", "apple cherry")
+    index.remove("a")
+
+    assert index.postings == {"apple": {"b": 1}, "cherry": {"b": 1}}
+    assert index.lengths == {"b": 2}
+    assert index.total_length == 2
+    assert "a" not in index.doc_tokens
+    assert set(index.score("apple")) == {"b"}
+
+
+def test_bm25_readd_replaces_previous_tokens():
+    index = _BM25Field(_standard_analyze, 1.2, 0.75)
+    index.add("a", "apple banana")
+    index.add("a", "cherry")
+
+    assert index.postings == {"cherry": {"a": 1}}
+    assert index.total_length == 1
+
+
+async def test_add_search_and_reload(make_store):
+    store = make_store()
+    result = await store.bulk_add_documents(make_docs("c", "d1"))
+    assert result.success == len(CONTENTS)
+
+    hits = await store.hybrid_search("苹果", k=3)
+    assert hits and hits[0].chunk.content.startswith("苹果")
+
+    reloaded = make_store()
+    assert set(reloaded._records) == set(store._records)
+    assert_consistent(reloaded)
+    hits = await reloaded.hybrid_search("苹果", k=3, filters=SearchFilter(document_ids=["d1"]))
+    assert {hit.chunk.document_id for hit in hits} == {"d1"}
+
+
+async def test_delete_chunks_persists(make_store):
+    store = make_store()
+    await store.bulk_add_documents(make_docs("c", "d1"))
+
+    assert await store.delete_chunks(["c0", "c1", "missing"]) == 2
+    assert_consistent(store)
+
+    reloaded = make_store()
+    assert "c0" not in reloaded._records and "c2" in reloaded._records
+    assert all("c0" not in docs for index in reloaded._bm25.values() for docs in index.postings.values())
+
+
+async def test_writes_during_persist_are_not_lost(make_store, monkeypatch):
+    store = make_store()
+    await store.bulk_add_documents(make_docs("c", "d1"))
+
+    writing = threading.Event()
+    write_files = store._write_files
+
+    def _slow_write_files(rows, records):
+        writing.set()
+        time.sleep(0.2)
+        write_files(rows, records)
+
+    monkeypatch.setattr(store, "_write_files", _slow_write_files)
+
+    async def _wait_until_writing():
+        while not writing.is_set():
+            await asyncio.sleep(0.01)
+
+    # 第一批写入后开始写盘；写盘期间并发写入新文档、删除旧文档并检索
+    first = asyncio.create_task(store.bulk_add_documents(make_docs("e", "d2")))
+    await _wait_until_writing()
+    _, deleted, hits = await asyncio.gather(
+        store.bulk_add_documents(make_docs("f", "d3", count=5)),
+        store.delete_chunks(["c0", "c1"]),
+        store.hybrid_search("苹果", k=5, filters=SearchFilter(document_ids=["d1", "d2"])),
+    )
+    await first
+
+    assert deleted == 2
+    assert {hit.chunk.document_id for hit in hits} <= {"d1", "d2"}
+    expected = {f"c{i}" for i in range(2, 8)} | {f"e{i}" for i in range(8)} | {f"f{i}" for i in range(5)}
+    assert set(store._records) == expected
+    assert_consistent(store)
+
+    reloaded = make_store()
+    assert set(reloaded._records) == expected
+    assert_consistent(reloaded)
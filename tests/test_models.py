@@ -0,0 +1,22 @@
+from src.backend.domain.models import DocumentSource, DocumentChunk, stable_document_id
+
+
+def test_document_id_follows_collection_and_name(tmp_path):
+    first = DocumentSource(file_path=tmp_path / "upload-1_report.pdf", document_name="report.pdf")
+    second = DocumentSource(file_path=tmp_path / "upload-2_report.pdf", document_name="report.pdf")
+    other = DocumentSource(file_path=tmp_path / "report.pdf", collection="legal")
+
+    # 文件不存在也可以构造 (校验器不读取文件)
+    assert first.document_id == second.document_id == stable_document_id("report.pdf")
+    assert other.document_id == stable_document_id("report.pdf", "legal") != first.document_id
+
+
+def test_explicit_document_id_is_kept(tmp_path):
+    source = DocumentSource(document_id="doc-1", file_path=tmp_path / "a.pdf")
+    assert source.document_id == "doc-1"
+
+
+def test_content_hash_covers_metadata():
+    base = dict(document_id="d", document_name="n", content="正文", parent_headings=["标题"])
+    assert DocumentChunk(**base, metadata={"page": 1}).content_hash == DocumentChunk(**base, metadata={"page": 1}).content_hash
+    assert DocumentChunk(**base, metadata={"page": 1}).content_hash != DocumentChunk(**base, metadata={"page": 2}).content_hash